@@ -0,0 +1,99 @@
+"""
+Per-request GraphQL context: the request's database sessions and DataLoaders
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+from strawberry.fastapi import BaseContext
+
+from app.core.database import AsyncSessionLocal, ReadAsyncSessionLocal
+
+
+class Loaders:
+    """
+    DataLoaders of one GraphQL request, created on first use. Every `load` issued while
+    resolving one level of the document is answered by a single IN query per loader.
+    """
+
+    def __init__(self, context: "GraphQLContext"):
+        self._context = context
+        self._loaders: Dict[str, DataLoader] = {}
+
+    def _get(self, name: str, load_fn) -> DataLoader:
+        loader = self._loaders.get(name)
+        if loader is None:
+            loader = self._loaders[name] = DataLoader(load_fn=load_fn)
+        return loader
+
+    async def _by_id(self, model, keys: List[int], convert) -> List[Optional[object]]:
+        async with self._context.session(read=True) as db:
+            result = await db.execute(select(model).where(model.id.in_(set(keys))))
+            found = {obj.id: convert(obj) for obj in result.scalars()}
+        return [found.get(key) for key in keys]
+
+    @property
+    def location_by_id(self) -> DataLoader:
+        from app.modules.inventory.models import Location
+        from app.modules.locations.schemas import Location as LocationSchema
+
+        async def load(keys):
+            return await self._by_id(Location, keys, LocationSchema.from_orm)
+        return self._get("location_by_id", load)
+
+    @property
+    def area_by_id(self) -> DataLoader:
+        from app.modules.inventory.models import Area
+        from app.modules.locations.schemas import Area as AreaSchema
+
+        async def load(keys):
+            return await self._by_id(Area, keys, AreaSchema.from_orm)
+        return self._get("area_by_id", load)
+
+
+class GraphQLContext(BaseContext):
+    """
+    One primary and one read-replica session per GraphQL request, opened on first use,
+    so a document with several root fields holds at most one connection of each.
+
+    An AsyncSession must not be used concurrently and Strawberry resolves sibling fields
+    concurrently, so `session` hands it out to one resolver at a time and ends the
+    resolver's transaction afterwards (as closing a per-resolver session used to).
+    Await loaders outside the `session` block: their batch queries take the same lock.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._sessions: Dict[bool, AsyncSession] = {}
+        self._locks: Dict[bool, asyncio.Lock] = {}
+        self.loaders = Loaders(self)
+
+    @asynccontextmanager
+    async def session(self, read: bool = False) -> AsyncIterator[AsyncSession]:
+        lock = self._locks.setdefault(read, asyncio.Lock())
+        async with lock:
+            db = self._sessions.get(read)
+            if db is None:
+                db = self._sessions[read] = ReadAsyncSessionLocal() if read else AsyncSessionLocal()
+            try:
+                yield db
+            finally:
+                if db.in_transaction():
+                    await db.rollback()
+
+    async def close(self) -> None:
+        for db in self._sessions.values():
+            await db.close()
+        self._sessions.clear()
+
+
+async def get_graphql_context() -> AsyncIterator[GraphQLContext]:
+    """context_getter of the GraphQL router (a FastAPI dependency, closed after the response)"""
+    context = GraphQLContext()
+    try:
+        yield context
+    finally:
+        await context.close()
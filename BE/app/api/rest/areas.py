@@ -4,11 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.modules.inventory.service import AreaService
 from app.modules.inventory.models import Area
-from app.modules.inventory.schemas import AreaListResponse, AreaResponse, AreaUpdate
+from app.modules.inventory.schemas import (
+    AreaListResponse,
+    AreaResponse,
+    AreaUpdate,
+    AreaWarehouseCodeResponse,
+    AreaWarehouseCodesUpdate
+)
 
 router = APIRouter()
 
@@ -23,7 +29,9 @@ async def get_areas(
     description: Optional[str] = Query(None),
     address: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor (next_cursor of the previous page) for keyset pagination"),
+    count_mode: Optional[str] = Query(None, description="How total_items is computed: exact, estimated or cached"),
+    db: AsyncSession = Depends(get_read_db),
     #current_user: str = Depends(get_current_user)
 ):
     return await AreaService.get_areas_paginated(
@@ -35,10 +43,21 @@ async def get_areas(
         thu_kho=thu_kho,
         description=description,
         address=address,
-        is_active=is_active
+        is_active=is_active,
+        after=after,
+        count_mode=count_mode
     )
 
 
+@router.get("/warehouse-codes", response_model=List[AreaWarehouseCodeResponse])
+async def get_all_warehouse_codes(
+    db: AsyncSession = Depends(get_read_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """Bảng ánh xạ mã kho SAP -> kho WMS"""
+    return await AreaService.get_warehouse_codes(db)
+
+
 @router.post("/", response_model=List[AreaResponse])
 async def create_areas(
     areas_data: List[dict],
@@ -60,6 +79,28 @@ async def update_area_status(
     return await AreaService.update_area_status(db, area_id, bool(is_active))
 
 
+@router.get("/{area_id}/warehouse-codes", response_model=List[AreaWarehouseCodeResponse])
+async def get_area_warehouse_codes(
+    area_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    #current_user: str = Depends(get_current_user)
+):
+    return await AreaService.get_warehouse_codes(db, area_id)
+
+
+@router.put("/{area_id}/warehouse-codes", response_model=List[AreaWarehouseCodeResponse])
+async def set_area_warehouse_codes(
+    area_id: int,
+    codes_update: AreaWarehouseCodesUpdate,
+    db: AsyncSession = Depends(get_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """Thay toàn bộ mã kho SAP của kho (danh sách rỗng = bỏ ánh xạ)"""
+    return await AreaService.set_area_warehouse_codes(
+        db, area_id, codes_update.whs_codes, codes_update.updated_by
+    )
+
+
 @router.patch("/{area_id}", response_model=AreaResponse)
 async def update_area(
     area_id: int,
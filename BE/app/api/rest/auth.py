@@ -1,6 +1,7 @@
 """
 REST API endpoints for authentication
 """
+import logging
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, Cookie
 from fastapi.security import OAuth2PasswordRequestForm
@@ -26,6 +27,7 @@ from app.core.keycloak import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.post("/login")
 async def login(
@@ -54,7 +56,7 @@ async def read_users_me(current_user: dict = Depends(get_current_user)):
 async def keycloak_login():
     """Redirect to Keycloak login"""
     try:
-        auth_url = get_authorization_url()
+        auth_url = await get_authorization_url()
         return RedirectResponse(url=auth_url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Keycloak connection failed: {str(e)}")
@@ -66,13 +68,7 @@ async def keycloak_callback(
     state: str = Query(...)
 ):
     try:
-        print(f"Received callback with code: {code[:20]}...")
-        print(f"Attempting token exchange with client_id: {settings.KEYCLOAK_CLIENT_ID}")
-        print(f"Redirect URI: {settings.KEYCLOAK_REDIRECT_URI}")
-        
-        token_response = exchange_code_for_token(code)
-        
-        print(f"Token exchange successful!")
+        token_response = await exchange_code_for_token(code)
         
         # Store tokens in HTTP-only cookies for security
         response.set_cookie(
@@ -96,9 +92,7 @@ async def keycloak_callback(
         
         return RedirectResponse(url=f"http://localhost:4200/auth/callback?code={code}&state={state}")
     except Exception as e:
-        print(f"Token exchange error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Token exchange error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=f"Token exchange failed: {str(e)}")
 
 @router.post("/keycloak/refresh")
@@ -110,7 +104,7 @@ async def refresh_access_token(
         raise HTTPException(status_code=401, detail="No refresh token found")
     
     try:
-        token_response = keycloak_refresh_token(refresh_token)
+        token_response = await keycloak_refresh_token(refresh_token)
         
         response.set_cookie(
             key="access_token",
@@ -147,7 +141,7 @@ async def get_keycloak_userinfo(
         raise HTTPException(status_code=401, detail="No access token found")
     
     try:
-        user_info = get_user_info(token)
+        user_info = await get_user_info(token)
         user_info["authorities"] = user_info.get("realm_access", {}).get("roles", [])
         return user_info
     except Exception as e:
@@ -156,12 +150,13 @@ async def get_keycloak_userinfo(
 @router.post("/keycloak/logout")
 async def keycloak_logout_endpoint(
     response: Response,
-    refresh_token: Optional[str] = Cookie(None)
+    refresh_token: Optional[str] = Cookie(None),
+    access_token: Optional[str] = Cookie(None)
 ):
     """Logout from Keycloak and clear cookies"""
     try:
         if refresh_token:
-            keycloak_logout_user(refresh_token)
+            await keycloak_logout_user(refresh_token, access_token)
         
         response.delete_cookie(key="access_token")
         response.delete_cookie(key="refresh_token")
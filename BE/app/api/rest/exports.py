@@ -0,0 +1,121 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_read_db
+from app.core.security import get_current_user
+from app.core.export import export_response
+from app.modules.inventory.exports import (
+    DashboardExportService,
+    INVENTORY_COLUMNS,
+    GROUP_COLUMNS,
+    TRANSACTION_COLUMNS
+)
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# xuất dashboard tồn kho (cùng bộ lọc với inventoryDashboard), format=csv|xlsx
+@router.get("/inventory-dashboard")
+async def export_inventory_dashboard(
+    export_format: str = Query("csv", alias="format"),
+    name: Optional[str] = None,
+    client_id: Optional[str] = None,
+    serial_pallet: Optional[str] = None,
+    identifier: Optional[str] = None,
+    po: Optional[str] = None,
+    location_id: Optional[int] = None,
+    area_id: Optional[int] = None,
+    status: Optional[str] = None,
+    updated_by: Optional[str] = None,
+    code_match: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    #current_user: str = Depends(get_current_user)
+):
+    rows = await DashboardExportService.inventory_rows(
+        db,
+        name=name,
+        client_id=client_id,
+        serial_pallet=serial_pallet,
+        identifier=identifier,
+        po=po,
+        location_id=location_id,
+        area_id=area_id,
+        status=status,
+        updated_by=updated_by,
+        code_match=code_match
+    )
+    return export_response(export_format, "inventory_dashboard", INVENTORY_COLUMNS, rows)
+
+
+# xuất dashboard tồn kho theo nhóm (cùng bộ lọc với inventoryDashboardGrouped)
+@router.get("/inventory-dashboard/grouped")
+async def export_inventory_dashboard_grouped(
+    export_format: str = Query("csv", alias="format"),
+    group_by: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = None,
+    name: Optional[str] = None,
+    client_id: Optional[str] = None,
+    serial_pallet: Optional[str] = None,
+    identifier: Optional[str] = None,
+    po: Optional[str] = None,
+    location_id: Optional[int] = None,
+    area_id: Optional[int] = None,
+    status: Optional[str] = None,
+    updated_by: Optional[str] = None,
+    code_match: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    #current_user: str = Depends(get_current_user)
+):
+    rows = await DashboardExportService.group_rows(
+        db,
+        group_by=group_by,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        name=name,
+        client_id=client_id,
+        serial_pallet=serial_pallet,
+        identifier=identifier,
+        po=po,
+        location_id=location_id,
+        area_id=area_id,
+        status=status,
+        updated_by=updated_by,
+        code_match=code_match
+    )
+    return export_response(export_format, "inventory_dashboard_grouped", GROUP_COLUMNS, rows)
+
+
+# xuất dashboard giao dịch (cùng bộ lọc với transactionsDashboard)
+@router.get("/transactions-dashboard")
+async def export_transactions_dashboard(
+    export_format: str = Query("csv", alias="format"),
+    transaction_type: Optional[str] = None,
+    request_code: Optional[str] = None,
+    branch: Optional[str] = None,
+    production_team: Optional[str] = None,
+    from_warehouse: Optional[int] = None,
+    to_warehouse: Optional[int] = None,
+    status: Optional[bool] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    updated_by: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    #current_user: str = Depends(get_current_user)
+):
+    rows = await DashboardExportService.transaction_rows(
+        db,
+        transaction_type=transaction_type,
+        request_code=request_code,
+        industry=branch,
+        production_team=production_team,
+        from_warehouse=from_warehouse,
+        to_warehouse=to_warehouse,
+        status=status,
+        from_date=from_date,
+        to_date=to_date,
+        updated_by=updated_by
+    )
+    return export_response(export_format, "transactions_dashboard", TRANSACTION_COLUMNS, rows)
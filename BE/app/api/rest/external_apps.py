@@ -130,5 +130,29 @@ async def get_external_apps_osr_by_doc_entry(
         )
 
 
+@router.get("/sap-sync/status")
+async def get_sap_sync_status(
+    db: AsyncSession = Depends(get_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Trạng thái đồng bộ bản sao SAP: độ trễ (lag_seconds), số dòng của lần chạy gần nhất, lỗi gần nhất
+    """
+    from app.modules.inventory.sap_mirror_service import SapMirrorSyncService
+
+    return {"documents": await SapMirrorSyncService.get_sync_status(db)}
 
 
+@router.post("/sap-sync/run")
+async def run_sap_sync(
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Chạy đồng bộ bản sao SAP ngay (bỏ qua nếu một tiến trình khác đang đồng bộ)
+    """
+    from app.modules.inventory.sap_mirror_service import SapMirrorSyncService
+
+    results = await SapMirrorSyncService.sync_all_locked()
+    if results is None:
+        return {"status": "skipped", "message": "Đang có tiến trình đồng bộ khác chạy"}
+    return {"status": "completed", "documents": results}
@@ -1,11 +1,14 @@
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.exceptions import NotFoundException
 from app.core.security import get_current_user
+from app.core.progress import progress_stream, progress_topic, IMPORT
 from app.modules.inventory.service import WarehouseImportService, IWTRService
 from app.modules.inventory.schemas import (
     WarehouseImportRequest,
@@ -13,6 +16,7 @@ from app.modules.inventory.schemas import (
     WarehouseImportContainerResponse,
     WMSImportRequest,
     WMSImportResponse,
+    ImportRequirementBatchSearchRequest,
     ContainerInventoryCreate,
     ContainerInventoryResponse,
     WarehouseImportRequirementUpdate
@@ -41,13 +45,23 @@ async def get_import_requirement_details(
 ):
     """Get detailed information for a specific import requirement in WMS structure"""
     try:
-        # Get the import requirement in WMS structure
-        wms_data = await WarehouseImportService.get_wms_import_requirement_by_id(db, req_id)
-
-        return wms_data
-    except Exception as e:
+        # Get the import requirement in WMS structure, streamed pallet by pallet
+        wms_chunks = await WarehouseImportService.stream_wms_import_requirement_by_id(db, req_id)
+    except NotFoundException as e:
         raise HTTPException(status_code=404, detail=f"Import requirement with ID {req_id} not found: {str(e)}")
 
+    return StreamingResponse(wms_chunks, media_type="application/json")
+
+
+@router.get("/{req_id}/progress/stream")
+async def stream_import_requirement_progress(
+    req_id: int,
+    request: Request,
+    #current_user: str = Depends(get_current_user)
+):
+    """Server-Sent Events: confirmed boxes and status changes of the import requirement as they commit"""
+    return progress_stream(request, progress_topic(IMPORT, req_id))
+
 
 @router.patch("/{req_id}", response_model=WarehouseImportResponse)
 async def update_import_requirement(
@@ -154,15 +168,19 @@ async def get_container_inventories_by_import_container_id(
     import_container_id: int,
     page: int = 1,
     size: int = 200,
+    after: Optional[str] = None,
+    count_mode: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     #current_user: str = Depends(get_current_user)
 ):
     """Get container inventories by import_container_id"""
     try:
         result = await ContainerInventoryService.get_container_inventories_by_import_container_id(
-            db, import_container_id, page, size
+            db, import_container_id, page, size, after, count_mode
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching container inventories for import_container_id {import_container_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to fetch container inventories: {str(e)}")
@@ -179,7 +197,8 @@ async def create_wms_import_requirement(
         result = await WarehouseImportService.create_wms_import_with_nested_data(db, import_data)
         
         return WMSImportResponse(
-            success=True
+            success=True,
+            **result
         )
     except Exception as e:
         logger.error(f"Gửi nhập kho WMS thất bại: {str(e)}", exc_info=True)
@@ -199,4 +218,16 @@ async def search_warehouse_import_requirement(
         return result
     except Exception as e:
         logger.error(f"Error searching warehouse import requirement: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=400, detail=f"Error searching warehouse import requirement: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error searching warehouse import requirement: {str(e)}")
+
+
+@router.post("/search", response_model=dict)
+async def search_warehouse_import_requirements_batch(
+    request: ImportRequirementBatchSearchRequest,
+    db: AsyncSession = Depends(get_db),
+    # #current_user: str = Depends(get_current_user)
+):
+    """
+    Tìm kiếm yêu cầu nhập kho cho nhiều mã thùng/pallet trong một lần gọi
+    """
+    return await WarehouseImportService.search_warehouse_import_requirements_by_codes(db, request.codes)
@@ -1,12 +1,14 @@
 
 import logging
+from typing import Optional
 from fastapi import APIRouter, Depends
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.modules.inventory.external_apps_schemas import InventoryUpdateResponse, UpdateInventoryLocationRequest, UpdateInventoryQuantityRequest, InventoriesWHRequest, InventoriesWHResponse
 from app.modules.inventory.external_apps_service import InventoryUpdateService
 from app.modules.inventory.service import InventoryService, ContainerInventoryService
+from app.modules.inventory.stock_ledger import StockLedger
 from app.modules.inventory.schemas import ContainerInventoryCreate, ContainerInventoryResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,6 +16,29 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+@router.get("/stock-summary")
+async def get_stock_summary(
+    group_by: str = "sap_code",
+    sap_code: Optional[str] = None,
+    area_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    page: int = 1,
+    size: int = 50,
+    db: AsyncSession = Depends(get_read_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """Tồn kho theo mã SAP / vị trí / kho, đọc từ bảng cộng dồn stock_rollups"""
+    return await StockLedger.get_stock_summary(
+        db,
+        group_by=group_by,
+        sap_code=sap_code,
+        area_id=area_id,
+        location_id=location_id,
+        page=page,
+        size=size
+    )
+
+
 @router.get("/{identifier}")
 async def get_inventory_by_identifier(
     identifier: str,
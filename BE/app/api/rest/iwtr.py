@@ -1,19 +1,22 @@
 
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.modules.inventory.schemas import BulkUpdateInventoriesInIWTRRequest, IWTRUpdateRequest
-from app.core.database import get_db, get_external_apps_db
+from app.core.database import get_db, get_iwtr_sap_db
 from app.core.security import get_current_user
+from app.core.progress import progress_stream, progress_topic, IWTR
 from app.modules.inventory.service import IWTRService
-from app.modules.inventory.external_apps_service import ExternalAppsIWTRService, ExternalAppsDataMapper
+from app.modules.inventory.external_apps_service import ExternalAppsIWTRService, ExternalAppsDataMapper, SapDocumentImportService
 from app.modules.inventory.schemas import IWTRResponse, IWTRFullDetailResponse
 from app.modules.inventory.external_apps_schemas import (
     IWTRHeaderResponse,
     IWTRCreateRequest,
     IWTRFullResponse,
     IWTRFullOWTRWTR1Response,
+    IWTRBatchOWTRWTR1Response,
+    SAPDocumentBatchRequest,
     ExternalAppsSyncResponse,
     IWTRWithInventoriesRequest,
     IWTRWithInventoriesResponse,
@@ -32,7 +35,7 @@ router = APIRouter()
 
 @router.get("/sap/iwtr", response_model=List[IWTRHeaderResponse])
 async def get_iwtr_from_external_apps(
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
     doc_entry: Optional[int] = Query(None, description="Filter by DocEntry"),
     doc_num: Optional[int] = Query(None, description="Filter by DocNum"),
     doc_status: Optional[str] = Query(None, description="Filter by DocStatus (O=Open, C=Closed)"),
@@ -62,7 +65,7 @@ async def get_iwtr_from_external_apps(
 @router.get("/sap/iwtr/{doc_entry}", response_model=IWTRFullOWTRWTR1Response)
 async def get_iwtr_by_doc_entry(
     doc_entry: int,
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
     #current_user: str = Depends(get_current_user)
 ):
     """
@@ -84,7 +87,7 @@ async def get_iwtr_by_doc_entry(
 @router.get("/sap/iwtr/{doc_entry}/header", response_model=IWTRHeaderResponse)
 async def get_iwtr_header_by_doc_entry(
     doc_entry: int,
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
     #current_user: str = Depends(get_current_user)
 ):
     """
@@ -106,7 +109,7 @@ async def get_iwtr_header_by_doc_entry(
 @router.get("/sap/iwtr/{doc_entry}/full", response_model=IWTRFullResponse)
 async def get_full_iwtr_by_doc_entry(
     doc_entry: int,
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
     #current_user: str = Depends(get_current_user)
 ):
     """
@@ -123,9 +126,46 @@ async def get_full_iwtr_by_doc_entry(
         raise HTTPException(status_code=500, detail=f"Error fetching full IWTR from SAP: {str(e)}")
 
 
+@router.post("/sap/iwtr/batch", response_model=IWTRBatchOWTRWTR1Response)
+async def get_iwtr_batch(
+    request: SAPDocumentBatchRequest,
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Get several IWTR documents (OWTR/WTR1 format) by DocEntry and/or DocNum in one call
+    """
+    try:
+        return await ExternalAppsIWTRService.get_iwtr_owtr_wtr1_batch(
+            external_apps_db, request.doc_entries, request.doc_nums
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching IWTR batch from SAP: {str(e)}")
+
+
+@router.post("/sap/iwtr/import", response_model=ExternalAppsSyncResponse)
+async def import_open_iwtr_from_sap(
+    from_date: Optional[datetime] = Query(None, description="DocDate from (default: SAP_IMPORT_WINDOW_DAYS days ago)"),
+    to_date: Optional[datetime] = Query(None, description="DocDate to (default: now)"),
+    updated_by: str = Query("system", max_length=15, description="User recorded on the imported requests"),
+    db: AsyncSession = Depends(get_db),
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Import (upsert) all open SAP IWTR documents of the window with their lines; safe to re-run
+    """
+    try:
+        return await SapDocumentImportService.import_open_iwtr(
+            db, external_apps_db, from_date=from_date, to_date=to_date, updated_by=updated_by
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing IWTR from SAP: {str(e)}")
+
+
 @router.get("/sap/iwtr/open", response_model=List[IWTRHeaderResponse])
 async def get_open_iwtr_from_external_apps(
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_iwtr_sap_db),
     limit: int = Query(100, ge=1, le=1000, description="Maximum records to fetch"),
     #current_user: str = Depends(get_current_user)
 ):
@@ -288,6 +328,19 @@ async def get_iwtr_request_details(
         )
 
 
+@router.get("/requests/{request_id}/progress/stream")
+async def stream_iwtr_progress(
+    request_id: int,
+    request: Request,
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Server-Sent Events: scan counters, newly scanned identifiers and status changes of
+    the request as they commit (replaces polling /requests/details/{request_id})
+    """
+    return progress_stream(request, progress_topic(IWTR, request_id))
+
+
 
 @router.post("/requests/with-items", response_model=IWTRResponse)
 async def create_iwtr_with_inventories(
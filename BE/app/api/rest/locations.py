@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from pydantic import ValidationError
 # from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.modules.inventory.service import LocationService
 from app.modules.inventory.schemas import LocationListResponse, LocationResponse
@@ -25,7 +25,9 @@ async def get_locations(
     description: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
     parent_location_id: Optional[int] = Query(None, description="Filter by parent location ID. Leave empty to get parent locations only."),
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor (next_cursor of the previous page) for keyset pagination"),
+    count_mode: Optional[str] = Query(None, description="How total_items is computed: exact, estimated or cached"),
+    db: AsyncSession = Depends(get_read_db),
     # #current_user: str = Depends(get_current_user)
 ):
     return await LocationService.get_locations_paginated(
@@ -38,7 +40,9 @@ async def get_locations(
         address=address,
         description=description,
         is_active=is_active,
-        parent_location_id=parent_location_id
+        parent_location_id=parent_location_id,
+        after=after,
+        count_mode=count_mode
     )
 
 
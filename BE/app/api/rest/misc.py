@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_db, get_pool_stats
 from app.core.security import get_current_user
 from sqlalchemy import text
 
@@ -26,4 +26,10 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
\ No newline at end of file
+        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+
+
+@router.get("/health/db-pools")
+async def get_db_pool_stats():
+    """Connection pool usage of the WMS primary, WMS read and SAP engines"""
+    return get_pool_stats()
@@ -1,18 +1,21 @@
 
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db, get_external_apps_db
+from app.core.database import get_db, get_osr_sap_db
 from app.core.security import get_current_user
+from app.core.progress import progress_stream, progress_topic, OSR
 from app.modules.inventory.service import OSRService
-from app.modules.inventory.external_apps_service import ExternalAppsOSRService, ExternalAppsDataMapper
+from app.modules.inventory.external_apps_service import ExternalAppsOSRService, ExternalAppsDataMapper, SapDocumentImportService
 from app.modules.inventory.schemas import OSRResponse, OSRUpdateRequest
 from app.modules.inventory.external_apps_schemas import (
     OSRHeaderResponse,
     OSRCreateRequest,
     OSRFullResponse,
+    OSRBatchORDRRDR1Response,
+    SAPDocumentBatchRequest,
     ExternalAppsSyncResponse,
     OSRCreateResponse,
     OSRInventoriesCreateRequest,
@@ -28,7 +31,7 @@ router = APIRouter()
 
 @router.get("/sap/osr", response_model=List[OSRHeaderResponse])
 async def get_osr_from_external_apps(
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_osr_sap_db),
     doc_entry: Optional[int] = Query(None, description="Filter by DocEntry"),
     doc_num: Optional[int] = Query(None, description="Filter by DocNum"),
     doc_status: Optional[str] = Query(None, description="Filter by DocStatus (O=Open, C=Closed)"),
@@ -60,7 +63,7 @@ async def get_osr_from_external_apps(
 @router.get("/sap/osr/{doc_entry}", response_model=OSRHeaderResponse)
 async def get_osr_by_doc_entry(
     doc_entry: int,
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_osr_sap_db),
     #current_user: str = Depends(get_current_user)
 ):
 
@@ -77,7 +80,7 @@ async def get_osr_by_doc_entry(
 
 @router.get("/sap/osr/open", response_model=List[OSRHeaderResponse])
 async def get_open_osr_from_external_apps(
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_osr_sap_db),
     limit: int = Query(100, ge=1, le=1000, description="Maximum records to fetch"),
     #current_user: str = Depends(get_current_user)
 ):
@@ -92,7 +95,7 @@ async def get_open_osr_from_external_apps(
 @router.get("/sap/osr/full/{doc_entry}", response_model=OSRFullResponse)
 async def get_full_osr_by_doc_entry(
     doc_entry: int,
-    external_apps_db: AsyncSession = Depends(get_external_apps_db),
+    external_apps_db: AsyncSession = Depends(get_osr_sap_db),
     #current_user: str = Depends(get_current_user)
 ):
 
@@ -107,6 +110,43 @@ async def get_full_osr_by_doc_entry(
         raise HTTPException(status_code=500, detail=f"Error fetching full OSR from SAP: {str(e)}")
 
 
+@router.post("/sap/osr/batch", response_model=OSRBatchORDRRDR1Response)
+async def get_osr_batch(
+    request: SAPDocumentBatchRequest,
+    external_apps_db: AsyncSession = Depends(get_osr_sap_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Get several OSR documents (ORDR/RDR1 format) by DocEntry and/or DocNum in one call
+    """
+    try:
+        return await ExternalAppsOSRService.get_osr_ordr_rdr1_batch(
+            external_apps_db, request.doc_entries, request.doc_nums
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching OSR batch from SAP: {str(e)}")
+
+
+@router.post("/sap/osr/import", response_model=ExternalAppsSyncResponse)
+async def import_open_osr_from_sap(
+    from_date: Optional[datetime] = Query(None, description="DocDate from (default: SAP_IMPORT_WINDOW_DAYS days ago)"),
+    to_date: Optional[datetime] = Query(None, description="DocDate to (default: now)"),
+    updated_by: str = Query("system", max_length=15, description="User recorded on the imported requests"),
+    db: AsyncSession = Depends(get_db),
+    external_apps_db: AsyncSession = Depends(get_osr_sap_db),
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Import (upsert) all open SAP OSR documents of the window with their lines; safe to re-run
+    """
+    try:
+        return await SapDocumentImportService.import_open_osr(
+            db, external_apps_db, from_date=from_date, to_date=to_date, updated_by=updated_by
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing OSR from SAP: {str(e)}")
+
+
 @router.get("/requests", response_model=List[dict])
 async def get_osr_requests(
     db: AsyncSession = Depends(get_db),
@@ -339,4 +379,17 @@ async def get_osr_request_details(
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching OSR details: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching OSR details: {str(e)}")
+
+
+@router.get("/requests/{request_id}/progress/stream")
+async def stream_osr_progress(
+    request_id: int,
+    request: Request,
+    #current_user: str = Depends(get_current_user)
+):
+    """
+    Server-Sent Events: scan counters, newly scanned identifiers and status changes of
+    the request as they commit (replaces polling /requests/details/{request_id})
+    """
+    return progress_stream(request, progress_topic(OSR, request_id))
@@ -0,0 +1,31 @@
+
+import logging
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.modules.inventory.external_apps_schemas import ScannerSyncRequest, ScannerSyncResponse
+from app.modules.inventory.scanner_sync import ScannerSyncService
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# đồng bộ lô sự kiện quét ngoại tuyến (xác nhận thùng nhập, quét IWTR/OSR, chuyển vị trí)
+@router.post("/events", response_model=ScannerSyncResponse)
+async def sync_scanner_events(
+    request: ScannerSyncRequest,
+    db: AsyncSession = Depends(get_db),
+    #current_user: str = Depends(get_current_user)
+):
+    events = [event.model_dump() for event in request.events]
+    return await ScannerSyncService.sync(db, request.device_id, events)
+
+
+@router.get("/devices/{device_id}")
+async def get_scanner_device_status(
+    device_id: str,
+    db: AsyncSession = Depends(get_db),
+    #current_user: str = Depends(get_current_user)
+):
+    return await ScannerSyncService.get_device_status(db, device_id)
@@ -1,7 +1,7 @@
 
 from typing import List
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import get_current_user
@@ -12,15 +12,15 @@ router = APIRouter()
 
 @router.get("/areas", response_model=List[dict])
 async def get_ui_areas(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     # current_user: str = Depends(get_current_user)
 ):
-    return UIService.get_ui_areas(db)
+    return await UIService.get_ui_areas(db)
 
 
 @router.get("/locations", response_model=List[dict])
 async def get_ui_locations(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     # current_user: str = Depends(get_current_user)
 ):
-    return UIService.get_ui_locations(db)
\ No newline at end of file
+    return await UIService.get_ui_locations(db)
\ No newline at end of file
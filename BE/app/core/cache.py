@@ -0,0 +1,227 @@
+"""
+Response cache backed by Redis, with an in-process fallback when Redis is unreachable
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cache namespaces - one per family of read endpoints, invalidated from the write paths
+AREAS = "areas"
+LOCATIONS = "locations"
+DASHBOARD_STATS = "dashboard_stats"
+INVENTORY_DASHBOARD = "inventory_dashboard"
+TRANSACTIONS_DASHBOARD = "transactions_dashboard"
+IMPORT_SEARCH = "import_search"
+CONTAINER_INVENTORIES = "container_inventories"
+WAREHOUSE_CODES = "warehouse_codes"
+
+# Arguments never used to build a cache key (sessions, GraphQL info, request objects)
+_SKIPPED_ARGS = {"db", "external_apps_db", "info", "request", "response"}
+
+MISSING = object()
+
+
+class _LocalTTLStore:
+    """Small LRU store with per-entry expiry, used while Redis is down"""
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+
+class ResponseCache:
+    """Namespaced JSON cache. Redis is shared by all workers; the local store is per process."""
+
+    def __init__(self):
+        self._redis: Optional[aioredis.Redis] = None
+        self._redis_retry_at = 0.0
+        self._local = _LocalTTLStore(settings.CACHE_LOCAL_MAX_ENTRIES)
+
+    def _namespace_prefix(self, namespace: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{namespace}:"
+
+    def make_key(self, namespace: str, parts: Any) -> str:
+        digest = hashlib.sha1(
+            json.dumps(jsonable_encoder(parts), sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return self._namespace_prefix(namespace) + digest
+
+    def _get_redis(self) -> Optional[aioredis.Redis]:
+        if not settings.REDIS_ENABLED or time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                password=settings.REDIS_PASSWORD or None,
+                db=settings.REDIS_DB,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            )
+        return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        if self._redis_retry_at < time.monotonic():
+            logger.warning(f"Redis unavailable, using in-process cache for {settings.REDIS_RETRY_SECONDS}s: {error}")
+        self._redis_retry_at = time.monotonic() + settings.REDIS_RETRY_SECONDS
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value, or MISSING"""
+        if not settings.CACHE_ENABLED:
+            return MISSING
+        raw = None
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(key)
+            except (RedisError, OSError) as e:
+                self._mark_redis_down(e)
+                raw = self._local.get(key)
+        else:
+            raw = self._local.get(key)
+        if raw is None:
+            return MISSING
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        if not settings.CACHE_ENABLED:
+            return
+        ttl = settings.CACHE_EXPIRE_SECONDS if ttl is None else ttl
+        if ttl <= 0:
+            return
+        raw = json.dumps(jsonable_encoder(value))
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.set(key, raw, ex=ttl)
+                return
+            except (RedisError, OSError) as e:
+                self._mark_redis_down(e)
+        self._local.set(key, raw, ttl)
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Return the cached values for `keys` in order, MISSING where absent"""
+        if not settings.CACHE_ENABLED or not keys:
+            return [MISSING] * len(keys)
+        raws = None
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raws = await client.mget(keys)
+            except (RedisError, OSError) as e:
+                self._mark_redis_down(e)
+        if raws is None:
+            raws = [self._local.get(key) for key in keys]
+        return [MISSING if raw is None else json.loads(raw) for raw in raws]
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        if not settings.CACHE_ENABLED or not items:
+            return
+        ttl = settings.CACHE_EXPIRE_SECONDS if ttl is None else ttl
+        if ttl <= 0:
+            return
+        raws = {key: json.dumps(jsonable_encoder(value)) for key, value in items.items()}
+        client = self._get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, raw in raws.items():
+                        pipe.set(key, raw, ex=ttl)
+                    await pipe.execute()
+                return
+            except (RedisError, OSError) as e:
+                self._mark_redis_down(e)
+        for key, raw in raws.items():
+            self._local.set(key, raw, ttl)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """Drop every entry of the given namespaces"""
+        for namespace in namespaces:
+            prefix = self._namespace_prefix(namespace)
+            self._local.delete_prefix(prefix)
+            client = self._get_redis()
+            if client is None:
+                continue
+            try:
+                keys = [key async for key in client.scan_iter(match=prefix + "*", count=500)]
+                if keys:
+                    await client.unlink(*keys)
+            except (RedisError, OSError) as e:
+                self._mark_redis_down(e)
+
+
+cache = ResponseCache()
+
+
+def get_cache() -> ResponseCache:
+    """FastAPI dependency returning the shared cache"""
+    return cache
+
+
+def cached(namespace: str, ttl: Optional[int] = None, key_builder: Optional[Callable[..., Any]] = None):
+    """
+    Cache the JSON-serialisable result of an async function.
+
+    The key is built from the call arguments, skipping sessions and request objects
+    (db, external_apps_db, info, request, response). Entries live for `ttl` seconds
+    (CACHE_EXPIRE_SECONDS by default) or until `cache.invalidate(namespace)`.
+    A cache hit returns the JSON form of the value (datetimes become ISO strings).
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if key_builder is not None:
+                parts = key_builder(*args, **kwargs)
+            else:
+                bound = signature.bind_partial(*args, **kwargs)
+                bound.apply_defaults()
+                parts = {k: v for k, v in bound.arguments.items() if k not in _SKIPPED_ARGS}
+            key = cache.make_key(namespace, [func.__qualname__, parts])
+
+            value = await cache.get(key)
+            if value is not MISSING:
+                return value
+
+            value = await func(*args, **kwargs)
+            await cache.set(key, value, ttl)
+            return value
+
+        return wrapper
+
+    return decorator
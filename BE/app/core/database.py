@@ -1,12 +1,28 @@
+from typing import Dict
+
+from fastapi import Query
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.core.config import settings
 
+
+def _pool_options(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    **_pool_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -17,10 +33,28 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Read-only traffic (dashboards, listings) - the replica when configured, otherwise the
+# primary through its own pool so heavy reads cannot exhaust the connections of the scanners
+read_engine = create_async_engine(
+    settings.DATABASE_READ_URL or settings.DATABASE_URL,
+    echo=settings.DEBUG,
+    future=True,
+    **_pool_options(settings.READ_DB_POOL_SIZE, settings.READ_DB_MAX_OVERFLOW)
+)
+
+ReadAsyncSessionLocal = async_sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 external_apps_engine = create_async_engine(
     settings.DATABASE_URL_2,
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    **_pool_options(settings.EXTERNAL_DB_POOL_SIZE, settings.EXTERNAL_DB_MAX_OVERFLOW)
 )
 
 ExternalAppsAsyncSessionLocal = async_sessionmaker(
@@ -47,13 +81,89 @@ async def get_async_db():
         yield db
 
 
+# HÀM GET_READ_DB BẤT ĐỒNG BỘ (Read replica, chỉ dùng cho truy vấn đọc)
+async def get_read_db():
+    async with ReadAsyncSessionLocal() as db:
+        yield db
+
+
 # HÀM GET_EXTERNAL_APPS_DB BẤT ĐỒNG BỘ (External Apps Database)
 async def get_external_apps_db():
     async with ExternalAppsAsyncSessionLocal() as db:
         yield db
 
 
+# Chứng từ SAP đã có ít nhất một lần đồng bộ hoàn tất vào bản sao cục bộ (xem sap_db)
+_synced_sap_documents = set()
+
+
+async def _sap_mirror_ready(db: AsyncSession, document: str) -> bool:
+    """Whether the mirror of `document` holds a completed sync run (remembered once true)"""
+    if document in _synced_sap_documents:
+        return True
+    from app.modules.inventory.sap_mirror_models import SapSyncState
+
+    result = await db.execute(
+        select(SapSyncState.last_synced_at).where(SapSyncState.document == document)
+    )
+    if result.scalar() is None:
+        return False
+    _synced_sap_documents.add(document)
+    return True
+
+
+def sap_db(document: str):
+    """
+    Dependency returning the session for the SAP `document` (OWTR, ORDR): the local mirror,
+    or SAP itself when live=true, when the mirror is disabled, or while the mirror of the
+    document has not completed its first sync.
+    """
+    async def get_sap_db(
+        live: bool = Query(False, description="Đọc trực tiếp từ SAP thay vì bản sao cục bộ")
+    ):
+        use_live = live or not settings.SAP_MIRROR_ENABLED
+        if not use_live:
+            async with ReadAsyncSessionLocal() as db:
+                if await _sap_mirror_ready(db, document):
+                    db.info["sap_live"] = False
+                    yield db
+                    return
+        async with ExternalAppsAsyncSessionLocal() as db:
+            db.info["sap_live"] = True
+            yield db
+
+    return get_sap_db
+
+
+# HÀM GET_SAP_DB BẤT ĐỒNG BỘ (chứng từ SAP: bản sao cục bộ, hoặc SAP trực tiếp khi live=true)
+get_iwtr_sap_db = sap_db("OWTR")
+get_osr_sap_db = sap_db("ORDR")
+
+
+# Bảng do migration Alembic tạo (scripts/migration): create_tables bỏ qua các bảng này
+MIGRATION_OWNED = {"migration_owned": True}
+
+
 # HÀM TẠO BẢNG BẤT ĐỒNG BỘ
 async def create_tables():
+    tables = [table for table in Base.metadata.sorted_tables if not table.info.get("migration_owned")]
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
+def get_pool_stats() -> Dict[str, dict]:
+    """Connection usage of each engine pool"""
+    stats = {}
+    for name, pool_engine in (("wms", engine), ("wms_read", read_engine), ("external_apps", external_apps_engine)):
+        pool = pool_engine.pool
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        stats[name] = {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "utilization": round(checked_out / capacity, 3) if capacity else None,
+        }
+    return stats
@@ -0,0 +1,227 @@
+"""
+Xuất dữ liệu dashboard ra CSV / XLSX dạng luồng (bộ nhớ không phụ thuộc số dòng)
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Callable, List, Optional
+from xml.sax.saxutils import escape
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+
+CSV = "csv"
+XLSX = "xlsx"
+EXPORT_FORMATS = (CSV, XLSX)
+
+MEDIA_TYPES = {
+    CSV: "text/csv",
+    XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Excel sheets hold at most 1,048,576 rows; longer exports continue on the next sheet
+XLSX_SHEET_ROWS = 1048576
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_RELATIONSHIP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PACKAGE_RELATIONSHIP_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+async def stream_rows(
+    db: AsyncSession,
+    query,
+    columns: List[str],
+    convert: Optional[Callable[[dict], dict]] = None
+) -> AsyncIterator[list]:
+    """
+    Values of `columns` for every row of `query`, read through a server-side cursor
+    EXPORT_BATCH_ROWS rows at a time; `convert` may rewrite each row mapping first.
+    """
+    result = await db.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_ROWS))
+    async for row in result.mappings():
+        row = convert(dict(row)) if convert else row
+        yield [row[key] for key in columns]
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+async def _csv_chunks(columns: List[str], rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the UTF-8 (Vietnamese) text correctly
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    pending = 0
+    async for row in rows:
+        writer.writerow([_text(value) for value in row])
+        pending += 1
+        if pending >= settings.EXPORT_BATCH_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable target for ZipFile; the bytes written so far are taken with `drain`"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_row(letters: List[str], row_number: int, values) -> str:
+    cells = []
+    for letter, value in zip(letters, values):
+        if value is None:
+            continue
+        ref = f"{letter}{row_number}"
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub("", _text(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+async def _xlsx_chunks(columns: List[str], rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """
+    Minimal SpreadsheetML package written straight into a streamed zip: inline strings,
+    no shared string table or styles, so nothing grows with the row count. The workbook
+    parts that list the sheets are written last, once the sheet count is known.
+    """
+    letters = [_column_letter(index) for index in range(len(columns))]
+    sink = _ZipSink()
+    package = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    sheet_count = 0
+    sheet = None
+    row_number = 0
+    pending = 0
+
+    def open_sheet():
+        nonlocal sheet, sheet_count, row_number
+        sheet_count += 1
+        sheet = package.open(f"xl/worksheets/sheet{sheet_count}.xml", "w", force_zip64=True)
+        sheet.write(
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{_SPREADSHEET_NS}"><sheetData>'
+            .encode("utf-8")
+        )
+        sheet.write(_xlsx_row(letters, 1, columns).encode("utf-8"))
+        row_number = 1
+
+    def close_sheet():
+        sheet.write(b"</sheetData></worksheet>")
+        sheet.close()
+
+    open_sheet()
+    async for row in rows:
+        if row_number >= XLSX_SHEET_ROWS:
+            close_sheet()
+            open_sheet()
+        row_number += 1
+        sheet.write(_xlsx_row(letters, row_number, row).encode("utf-8"))
+        pending += 1
+        if pending >= settings.EXPORT_BATCH_ROWS:
+            data = sink.drain()
+            if data:
+                yield data
+            pending = 0
+    close_sheet()
+
+    sheets = range(1, sheet_count + 1)
+    package.writestr("[Content_Types].xml", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in sheets
+        )
+        + '</Types>'
+    ))
+    package.writestr("_rels/.rels", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="{_PACKAGE_RELATIONSHIP_NS}">'
+        f'<Relationship Id="rId1" Type="{_RELATIONSHIP_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ))
+    package.writestr("xl/workbook.xml", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{_SPREADSHEET_NS}" xmlns:r="{_RELATIONSHIP_NS}"><sheets>'
+        + "".join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in sheets)
+        + '</sheets></workbook>'
+    ))
+    package.writestr("xl/_rels/workbook.xml.rels", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="{_PACKAGE_RELATIONSHIP_NS}">'
+        + "".join(
+            f'<Relationship Id="rId{n}" Type="{_RELATIONSHIP_NS}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in sheets
+        )
+        + '</Relationships>'
+    ))
+    package.close()
+    yield sink.drain()
+
+
+def export_response(
+    export_format: str,
+    filename: str,
+    columns: List[str],
+    rows: AsyncIterator[list]
+) -> StreamingResponse:
+    """StreamingResponse sending `rows` as a CSV or XLSX attachment while they are read"""
+    export_format = (export_format or CSV).lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationException(f"format phải là một trong: {', '.join(EXPORT_FORMATS)}")
+
+    chunks = _csv_chunks(columns, rows) if export_format == CSV else _xlsx_chunks(columns, rows)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}_{stamp}.{export_format}"'}
+    )
@@ -1,75 +1,238 @@
+"""
+Async Keycloak (OpenID Connect) adapter sharing one pooled HTTP client
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+import httpx
 
-from keycloak import KeycloakOpenID
 from app.core.config import settings
 
-
-def get_keycloak_openid():
-    return KeycloakOpenID(
-        server_url=settings.KEYCLOAK_URL,
-        client_id=settings.KEYCLOAK_CLIENT_ID,
-        realm_name=settings.KEYCLOAK_REALM,
-        client_secret_key=settings.KEYCLOAK_CLIENT_SECRET,
-        verify=False  # Disable SSL verification for development
-    )
-
-
-def get_well_known_openid_configuration():
-    try:
-        keycloak_openid = get_keycloak_openid()
-        return keycloak_openid.well_known()
-    except Exception as e:
-        print(f"Keycloak well-known config error: {e}")
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class KeycloakError(Exception):
+    """Keycloak could not be reached or rejected the request"""
+
+    def __init__(self, detail: str, status_code: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+class KeycloakClient:
+    """
+    OIDC calls used by the auth router (token, refresh, userinfo, logout, certs).
+
+    One httpx.AsyncClient with a bounded connection pool and timeouts is shared by
+    every request. The well-known configuration and userinfo responses are cached
+    in process; logout evicts the userinfo of the access tokens issued with the
+    revoked refresh token (and of `access_token` if given). Pass `transport` (e.g. httpx.ASGITransport over scripts/fake_idp.py)
+    to talk to a local IdP.
+    """
+
+    def __init__(
+        self,
+        server_url: Optional[str] = None,
+        realm: Optional[str] = None,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.server_url = (server_url or settings.KEYCLOAK_URL).rstrip("/")
+        self.realm = realm or settings.KEYCLOAK_REALM
+        self.client_id = client_id or settings.KEYCLOAK_CLIENT_ID
+        self.client_secret = settings.KEYCLOAK_CLIENT_SECRET if client_secret is None else client_secret
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._well_known: Optional[Dict] = None
+        self._well_known_at = 0.0
+        self._userinfo: "OrderedDict[str, tuple]" = OrderedDict()
+        # refresh token key -> access token keys issued in that session
+        self._sessions: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    @property
+    def realm_url(self) -> str:
+        return f"{self.server_url}/realms/{self.realm}"
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                verify=settings.KEYCLOAK_VERIFY_SSL,
+                timeout=httpx.Timeout(settings.KEYCLOAK_HTTP_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.KEYCLOAK_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.KEYCLOAK_HTTP_MAX_CONNECTIONS
+                ),
+                transport=self._transport
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self.http.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            raise KeycloakError(f"Keycloak request failed: {e}")
+        if response.status_code >= 400:
+            try:
+                error = response.json()
+                detail = error.get("error_description") or error.get("error") or response.text
+            except ValueError:
+                detail = response.text
+            raise KeycloakError(f"Keycloak returned {response.status_code}: {detail}", response.status_code)
+        return response
+
+    def _default_endpoints(self) -> Dict:
+        base = f"{self.realm_url}/protocol/openid-connect"
         return {
-            "authorization_endpoint": f"{settings.KEYCLOAK_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/auth",
-            "token_endpoint": f"{settings.KEYCLOAK_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/token",
-            "userinfo_endpoint": f"{settings.KEYCLOAK_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/userinfo",
-            "end_session_endpoint": f"{settings.KEYCLOAK_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/logout"
+            "authorization_endpoint": f"{base}/auth",
+            "token_endpoint": f"{base}/token",
+            "userinfo_endpoint": f"{base}/userinfo",
+            "end_session_endpoint": f"{base}/logout",
+            "jwks_uri": f"{base}/certs"
         }
 
-
-def get_authorization_url():
-
-    try:
-        keycloak_openid = get_keycloak_openid()
-        return keycloak_openid.auth_url(
-            redirect_uri=settings.KEYCLOAK_REDIRECT_URI,
-            scope="openid profile email",
-            state="random_state_string"
-        )
-    except Exception as e:
-        print(f"Keycloak connection error: {e}")
-        # Fallback to manual URL construction
-        auth_url = f"{settings.KEYCLOAK_URL}/realms/{settings.KEYCLOAK_REALM}/protocol/openid-connect/auth"
+    async def well_known(self) -> Dict:
+        """OpenID configuration of the realm, cached; falls back to the standard Keycloak paths"""
+        if self._well_known is not None and time.monotonic() - self._well_known_at < settings.KEYCLOAK_WELL_KNOWN_CACHE_SECONDS:
+            return self._well_known
+        try:
+            response = await self._request("GET", f"{self.realm_url}/.well-known/openid-configuration")
+            self._well_known = response.json()
+            self._well_known_at = time.monotonic()
+        except (KeycloakError, ValueError) as e:
+            logger.warning(f"Keycloak well-known config error: {e}")
+            if self._well_known is None:
+                return self._default_endpoints()
+        return self._well_known
+
+    async def _endpoint(self, name: str) -> str:
+        well_known = await self.well_known()
+        return well_known.get(name) or self._default_endpoints()[name]
+
+    def _client_credentials(self) -> Dict:
+        data = {"client_id": self.client_id}
+        if self.client_secret:
+            data["client_secret"] = self.client_secret
+        return data
+
+    async def auth_url(self, redirect_uri: str, scope: str = "openid profile email", state: str = "") -> str:
         params = {
-            "client_id": settings.KEYCLOAK_CLIENT_ID,
-            "redirect_uri": settings.KEYCLOAK_REDIRECT_URI,
-            "scope": "openid profile email",
+            "client_id": self.client_id,
+            "redirect_uri": redirect_uri,
+            "scope": scope,
             "response_type": "code",
-            "state": "random_state_string"
+            "state": state
+        }
+        return f"{await self._endpoint('authorization_endpoint')}?{urlencode(params)}"
+
+    async def token(self, code: str, redirect_uri: str) -> Dict:
+        data = {
+            "grant_type": "authorization_code",
+            "code": code,
+            "redirect_uri": redirect_uri,
+            **self._client_credentials()
         }
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"{auth_url}?{query_string}"
+        response = await self._request("POST", await self._endpoint("token_endpoint"), data=data)
+        tokens = response.json()
+        self._remember_session(tokens)
+        return tokens
+
+    async def refresh_token(self, refresh_token: str) -> Dict:
+        data = {"grant_type": "refresh_token", "refresh_token": refresh_token, **self._client_credentials()}
+        response = await self._request("POST", await self._endpoint("token_endpoint"), data=data)
+        tokens = response.json()
+        self._remember_session(tokens, self._sessions.pop(_cache_key(refresh_token), []))
+        return tokens
+
+    def _remember_session(self, tokens: Dict, access_keys: Optional[List[str]] = None) -> None:
+        """Link the access tokens of a session to its current refresh token, for logout"""
+        if not tokens.get("refresh_token") or not tokens.get("access_token"):
+            return
+        key = _cache_key(tokens["refresh_token"])
+        self._sessions[key] = [*(access_keys or []), _cache_key(tokens["access_token"])]
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > settings.KEYCLOAK_USERINFO_CACHE_SIZE:
+            self._sessions.popitem(last=False)
+
+    async def userinfo(self, access_token: str) -> Dict:
+        """Userinfo of the token owner, cached per token for KEYCLOAK_USERINFO_CACHE_SECONDS"""
+        key = _cache_key(access_token)
+        entry = self._userinfo.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._userinfo.move_to_end(key)
+            return dict(entry[1])
+
+        response = await self._request(
+            "GET",
+            await self._endpoint("userinfo_endpoint"),
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        user_info = response.json()
+
+        self._userinfo[key] = (time.monotonic() + settings.KEYCLOAK_USERINFO_CACHE_SECONDS, user_info)
+        self._userinfo.move_to_end(key)
+        while len(self._userinfo) > settings.KEYCLOAK_USERINFO_CACHE_SIZE:
+            self._userinfo.popitem(last=False)
+        return dict(user_info)
 
+    async def logout(self, refresh_token: str, access_token: Optional[str] = None) -> None:
+        data = {"refresh_token": refresh_token, **self._client_credentials()}
+        await self._request("POST", await self._endpoint("end_session_endpoint"), data=data)
+        access_keys = self._sessions.pop(_cache_key(refresh_token), [])
+        if access_token:
+            access_keys.append(_cache_key(access_token))
+        for key in access_keys:
+            self._userinfo.pop(key, None)
 
-def exchange_code_for_token(code: str):
-    keycloak_openid = get_keycloak_openid()
-    return keycloak_openid.token(
-        grant_type="authorization_code",
-        code=code,
-        redirect_uri=settings.KEYCLOAK_REDIRECT_URI
+    async def certs(self) -> Dict:
+        response = await self._request("GET", await self._endpoint("jwks_uri"))
+        return response.json()
+
+
+keycloak_client = KeycloakClient()
+
+
+async def close_keycloak_client() -> None:
+    await keycloak_client.aclose()
+
+
+async def get_well_known_openid_configuration() -> Dict:
+    return await keycloak_client.well_known()
+
+
+async def get_authorization_url() -> str:
+    return await keycloak_client.auth_url(
+        redirect_uri=settings.KEYCLOAK_REDIRECT_URI,
+        scope="openid profile email",
+        state="random_state_string"
     )
 
 
-def refresh_token(refresh_token: str):
-    keycloak_openid = get_keycloak_openid()
-    return keycloak_openid.refresh_token(refresh_token)
+async def exchange_code_for_token(code: str) -> Dict:
+    return await keycloak_client.token(code, redirect_uri=settings.KEYCLOAK_REDIRECT_URI)
+
+
+async def refresh_token(refresh_token: str) -> Dict:
+    return await keycloak_client.refresh_token(refresh_token)
 
 
-def get_user_info(access_token: str):
-    keycloak_openid = get_keycloak_openid()
-    return keycloak_openid.userinfo(access_token)
+async def get_user_info(access_token: str) -> Dict:
+    return await keycloak_client.userinfo(access_token)
 
 
-def logout_user(refresh_token: str):
-    keycloak_openid = get_keycloak_openid()
-    return keycloak_openid.logout(refresh_token)
\ No newline at end of file
+async def logout_user(refresh_token: str, access_token: Optional[str] = None) -> None:
+    await keycloak_client.logout(refresh_token, access_token)
@@ -0,0 +1,146 @@
+"""
+Opaque cursor helpers for keyset pagination and total count strategies
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+from app.core.cache import cache, MISSING
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+
+# How `total_items` of a paginated response is computed
+COUNT_EXACT = "exact"  # COUNT(*) over the filtered query
+COUNT_ESTIMATED = "estimated"  # planner row estimate of the filtered query (Postgres only)
+COUNT_CACHED = "cached"  # exact count, kept per filter set until the next write or TTL
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_CACHED)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque token"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decode a token produced by encode_cursor, checking it has `size` parts"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationException("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationException("Invalid pagination cursor")
+    return values
+
+
+def parse_cursor_datetime(value: Any) -> Optional[datetime]:
+    """Parse a datetime part of a decoded cursor (None is kept as None)"""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValidationException("Invalid pagination cursor")
+
+
+def keyset_after(date_column, id_column, cursor: str):
+    """
+    WHERE clause selecting the rows after `cursor` for
+    ORDER BY date_column DESC NULLS FIRST, id_column DESC.
+    The cursor is the `next_cursor` of the previous page (encodes date, id).
+    """
+    date_value, id_value = decode_cursor(cursor, 2)
+    date_value = parse_cursor_datetime(date_value)
+    if not isinstance(id_value, int):
+        raise ValidationException("Invalid pagination cursor")
+
+    if date_value is None:
+        return or_(
+            date_column.is_not(None),
+            and_(date_column.is_(None), id_column < id_value)
+        )
+    return and_(
+        date_column.is_not(None),
+        tuple_(date_column, id_column) < tuple_(date_value, id_value)
+    )
+
+
+def split_page(rows: list, size: int, cursor_values: Callable[[Any], List[Any]]) -> Tuple[list, Optional[str]]:
+    """Trim rows fetched with LIMIT size + 1 and build the cursor of the next page (None on the last page)"""
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, encode_cursor(cursor_values(rows[-1]))
+    return rows, None
+
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bound parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def _estimated_count(db: AsyncSession, query) -> int:
+    result = await db.execute(_Explain(query))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _exact_count(db: AsyncSession, query) -> int:
+    result = await db.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar() or 0
+
+
+async def count_total(
+    db: AsyncSession,
+    query,
+    count_mode: Optional[str] = None,
+    namespace: Optional[str] = None
+) -> Tuple[int, str]:
+    """
+    Count the rows of `query` (the filtered query before ORDER BY / LIMIT).
+
+    `count_mode` is one of COUNT_MODES and defaults to settings.COUNT_STRATEGY.
+    Cached counts are stored under the cache `namespace` of the endpoint, so the
+    invalidation its write paths already do drops them too.
+    Returns (total, mode actually used) for the response meta.
+    """
+    count_mode = count_mode or settings.COUNT_STRATEGY
+    if count_mode not in COUNT_MODES:
+        raise ValidationException(f"Invalid count mode '{count_mode}', expected one of: {', '.join(COUNT_MODES)}")
+
+    dialect = db.get_bind().dialect
+    if count_mode == COUNT_ESTIMATED:
+        if dialect.name == "postgresql":
+            return await _estimated_count(db, query), COUNT_ESTIMATED
+        count_mode = COUNT_EXACT
+
+    if count_mode == COUNT_CACHED and namespace:
+        compiled = query.compile(dialect=dialect)
+        key = cache.make_key(namespace, ["count", str(compiled), compiled.params])
+        total = await cache.get(key)
+        if total is not MISSING:
+            return total, COUNT_CACHED
+        total = await _exact_count(db, query)
+        await cache.set(key, total, settings.COUNT_CACHE_SECONDS)
+        return total, COUNT_CACHED
+
+    return await _exact_count(db, query), COUNT_EXACT
@@ -0,0 +1,187 @@
+"""
+Đẩy tiến độ phiếu (IWTR, OSR, yêu cầu nhập kho) tới màn hình giám sát qua Postgres LISTEN/NOTIFY
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+import asyncpg
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = "wms_progress"
+
+# NOTIFY payloads must stay below 8000 bytes; bigger events are replaced by a resync
+MAX_PAYLOAD_BYTES = 7900
+
+# Topic kinds - one stream per request
+IWTR = "iwtr"
+OSR = "osr"
+IMPORT = "import"
+
+
+def progress_topic(kind: str, req_id: int) -> str:
+    return f"{kind}:{req_id}"
+
+
+async def publish_progress(db: AsyncSession, topic: str, event: dict) -> None:
+    """
+    Queue a progress delta on the caller's transaction. Postgres delivers it to the
+    listeners only when the transaction commits, and drops it on rollback.
+    """
+    if not settings.PROGRESS_PUSH_ENABLED:
+        return
+    payload = json.dumps(jsonable_encoder({"topic": topic, **event}), separators=(",", ":"))
+    if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps({"topic": topic, "type": "resync"})
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": PROGRESS_CHANNEL, "payload": payload}
+    )
+
+
+class ProgressBroker:
+    """
+    One LISTEN connection per process, fanned out to the in-process subscriber queues.
+
+    The connection is opened with the first subscriber and closed once nobody listens.
+    Once the LISTEN is back after a lost connection, or when a slow subscriber's queue
+    overflows, subscribers get a "resync" event and should reload the request once.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.listening = asyncio.Event()
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PROGRESS_QUEUE_SIZE)
+        self._subscribers.setdefault(topic, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _put(self, queue: asyncio.Queue, event: dict) -> None:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"topic": event.get("topic"), "type": "resync"})
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed progress payload: {payload[:200]}")
+            return
+        for queue in list(self._subscribers.get(event.get("topic"), ())):
+            self._put(queue, event)
+
+    def _resync_all(self) -> None:
+        for topic, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._put(queue, {"topic": topic, "type": "resync"})
+
+    async def _listen(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        resync = False
+        while self._subscribers:
+            connection = None
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(dsn)
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(PROGRESS_CHANNEL, self._on_notify)
+                self.listening.set()
+                if resync:
+                    # Deltas committed while disconnected are lost; reload once new ones arrive again
+                    self._resync_all()
+                    resync = False
+                while self._subscribers and not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                if not lost.is_set():
+                    # Nobody listens; the loop checks again after closing, as subscribe()
+                    # starts no new task while this one is still running
+                    continue
+                logger.warning("Progress LISTEN connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress LISTEN connection failed: {str(e)}")
+            finally:
+                self.listening.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            resync = True
+            await asyncio.sleep(settings.PROGRESS_RECONNECT_SECONDS)
+
+
+progress_broker = ProgressBroker()
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+def progress_stream(request: Request, topic: str) -> StreamingResponse:
+    """
+    Server-Sent Events stream of one request's progress deltas.
+
+    The first event is "ready", sent once the process listens; clients load the request
+    after it (and after every "resync") and then apply the deltas.
+    """
+    if not settings.PROGRESS_PUSH_ENABLED:
+        raise HTTPException(status_code=404, detail="Progress push is disabled")
+
+    async def events():
+        async with progress_broker.subscribe(topic) as queue:
+            try:
+                await asyncio.wait_for(progress_broker.listening.wait(), timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            yield _sse({"topic": topic, "type": "ready"})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,46 @@
+"""
+Routing of free-text filters to the matching search index
+"""
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.exceptions import ValidationException
+
+# How a code filter (identifier, serial_pallet, sap_code, po, lot) matches, chosen by the caller
+MATCH_CONTAINS = "contains"  # ILIKE '%abc%' on the trigram index (default)
+MATCH_PREFIX = "prefix"  # lower(col) LIKE 'abc%' on the lower(col) text_pattern_ops btree
+MATCH_EXACT = "exact"  # lower(col) = 'abc' on the same btree
+MATCH_MODES = (MATCH_CONTAINS, MATCH_PREFIX, MATCH_EXACT)
+
+
+def _escape_like(value: str, escape: str = "\\") -> str:
+    return value.replace(escape, escape * 2).replace("%", escape + "%").replace("_", escape + "_")
+
+
+def text_search_filter(column, value: str) -> ColumnElement:
+    """
+    Case-insensitive substring match (ILIKE '%ABC%'), served by the pg_trgm GIN index
+    of the column (search index migration, scripts/migration).
+    """
+    return column.ilike(f"%{value}%")
+
+
+def code_search_filter(column, value: str, match: Optional[str] = None) -> ColumnElement:
+    """
+    Filter of a code column (identifier, serial_pallet, sap_code, po, lot).
+
+    `match` is one of MATCH_MODES. The default is the same substring match as
+    text_search_filter; a client that sends a whole scanned code or its beginning
+    asks for `exact` / `prefix`, both case-insensitive, which the
+    lower(col) text_pattern_ops btree index answers.
+    """
+    match = match or MATCH_CONTAINS
+    if match == MATCH_CONTAINS:
+        return text_search_filter(column, value)
+    if match == MATCH_PREFIX:
+        return func.lower(column).like(_escape_like(value.lower()) + "%", escape="\\")
+    if match == MATCH_EXACT:
+        return func.lower(column) == value.lower()
+    raise ValidationException(f"Invalid match mode '{match}', expected one of: {', '.join(MATCH_MODES)}")
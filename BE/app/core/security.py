@@ -1,20 +1,25 @@
 """
 Security utilities for authentication and authorization
 """
+import asyncio
+import hashlib
+import logging
 import time
-import base64
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict
-from jose import JWTError, jwt, jwk
+from typing import Optional, Dict, Tuple
+
+from jose import JOSEError, JWTError, jwt, jwk
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from cryptography.x509 import load_pem_x509_certificate
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.keycloak import get_keycloak_openid
+from app.core.keycloak import KeycloakError, keycloak_client
+
+logger = logging.getLogger(__name__)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -22,11 +27,6 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token scheme
 security = HTTPBearer()
 
-# JWKS cache for Keycloak token verification
-_jwks_cache = None
-_jwks_cache_time = 0
-JWKS_CACHE_DURATION = 3600  # 1 hour
-
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -35,74 +35,133 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
-def get_jwks() -> Dict:
-    """Fetch and cache JWKS from Keycloak"""
-    global _jwks_cache, _jwks_cache_time
-    current_time = time.time()
 
-    if _jwks_cache is None or (current_time - _jwks_cache_time) > JWKS_CACHE_DURATION:
-        print("Fetching JWKS from Keycloak...")
-        keycloak_openid = get_keycloak_openid()
-        _jwks_cache = keycloak_openid.certs()
-        print(f"JWKS fetched: {_jwks_cache}")
-        _jwks_cache_time = current_time
+class KeycloakKeySet:
+    """
+    Public keys of the Keycloak realm, constructed once per `kid`.
+
+    The JWKS is fetched asynchronously. Once loaded, an expired key set keeps
+    serving requests while a single background task refreshes it
+    (stale-while-revalidate), so verification never waits on Keycloak except
+    for the very first load and for an unknown `kid` (key rotation, rate limited).
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, object] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _fetch(self) -> dict:
+        return await keycloak_client.certs()
+
+    async def refresh(self) -> None:
+        """Fetch the JWKS and rebuild the key map (one fetch at a time)"""
+        async with self._lock:
+            self._last_attempt = time.monotonic()
+            try:
+                jwks = await self._fetch()
+            except (KeycloakError, ValueError) as e:
+                logger.warning(f"Failed to fetch Keycloak JWKS: {e}")
+                return
+
+            keys = {}
+            for key in jwks.get("keys", []):
+                if key.get("use", "sig") != "sig" or not key.get("kid"):
+                    continue
+                try:
+                    keys[key["kid"]] = jwk.construct(key)
+                except Exception as e:
+                    logger.warning(f"Skipping JWKS key {key.get('kid')}: {e}")
+
+            if set(self._keys) - set(keys):
+                # A signing key was withdrawn, tokens it signed must be verified again
+                verified_tokens.clear()
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            logger.info(f"Loaded {len(keys)} Keycloak signing keys")
+
+    def _may_fetch(self, now: float) -> bool:
+        return self._last_attempt is None or now - self._last_attempt > settings.KEYCLOAK_JWKS_MIN_REFRESH_SECONDS
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def get_key(self, kid: str):
+        """Public key for `kid`, or None if Keycloak does not know it"""
+        now = time.monotonic()
+        if self._fetched_at is None:
+            if self._may_fetch(now):
+                await self.refresh()
+        elif now - self._fetched_at > settings.KEYCLOAK_JWKS_REFRESH_SECONDS:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and self._may_fetch(now):
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token payloads, keyed by token hash and valid until `exp`"""
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self._key(token)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return payload
 
-    return _jwks_cache
+    def set(self, token: str, payload: Dict) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        key = self._key(token)
+        self._data[key] = (float(exp), payload)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
 
-def verify_keycloak_token(token: str) -> Optional[Dict]:
-    """Verify Keycloak JWT token using JWKS"""
-    try:
-        print(f"Verifying token: {token[:50]}...")
-        # Decode header để lấy kid
-        header = jwt.get_unverified_header(token)
-        kid = header.get('kid')
-        print(f"Token kid: {kid}")
+    def clear(self) -> None:
+        self._data.clear()
 
-        if not kid:
-            print("No kid in header")
-            return None
 
-        # Decode payload manually to check claims
-        try:
-            import base64
-            import json
-            parts = token.split('.')
-            if len(parts) != 3:
-                print("Invalid JWT format")
-                return None
-            payload_b64 = parts[1]
-            payload_bytes = base64.urlsafe_b64decode(payload_b64 + '==')
-            payload_str = payload_bytes.decode('utf-8')
-            print(f"Payload string: {payload_str}")
-            unverified_payload = json.loads(payload_str)
-            aud = unverified_payload.get('aud')
-            iss = unverified_payload.get('iss')
-            exp = unverified_payload.get('exp')
-            print(f"Unverified payload - aud: {aud}, iss: {iss}, exp: {exp}")
-        except Exception as e:
-            print(f"Failed to decode payload manually: {e}")
-            return None
+keycloak_keys = KeycloakKeySet()
+verified_tokens = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
 
-        # Lấy JWKS
-        jwks = get_jwks()
-        print(f"JWKS keys count: {len(jwks.get('keys', []))}")
-        key = None
 
-        # Tìm key theo kid
-        for jwk_key in jwks['keys']:
-            if jwk_key['kid'] == kid:
-                key = jwk_key
-                break
+async def verify_keycloak_token(token: str) -> Optional[Dict]:
+    """Verify Keycloak JWT token using the cached JWKS"""
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
 
-        if not key:
-            print(f"Key not found for kid: {kid}")
+    try:
+        # Decode header để lấy kid
+        kid = jwt.get_unverified_header(token).get('kid')
+        if not kid:
+            logger.debug("Rejected token without kid")
             return None
 
-        # Construct the public key from JWK
-        try:
-            public_key = jwk.construct(key)
-        except Exception as e:
-            print(f"Failed to construct public key from JWK: {e}")
+        public_key = await keycloak_keys.get_key(kid)
+        if public_key is None:
+            logger.debug(f"Rejected token signed with unknown kid: {kid}")
             return None
 
         # Verify token với public key
@@ -114,17 +173,13 @@ def verify_keycloak_token(token: str) -> Optional[Dict]:
             audience='account',  # Audience is 'account' for public clients
             issuer=expected_issuer  # Verify issuer
         )
-        print("Token verified successfully")
-
-        return payload
-
-    except JWTError as e:
-        print(f"JWTError: {e}")
-        return None
-    except Exception as e:
-        print(f"Other error in verify_keycloak_token: {e}")
+    except JOSEError as e:
+        logger.debug(f"Rejected token: {e}")
         return None
 
+    verified_tokens.set(token, payload)
+    return payload
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -137,10 +192,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
+async def verify_token(token: str) -> Optional[str]:
     """Verify token - support both internal JWT and Keycloak tokens"""
     # Thử verify Keycloak token trước
-    keycloak_payload = verify_keycloak_token(token)
+    keycloak_payload = await verify_keycloak_token(token)
     if keycloak_payload:
         return keycloak_payload.get('preferred_username') or keycloak_payload.get('sub')
 
@@ -173,7 +228,7 @@ async def get_current_user(
     if not token:
         raise credentials_exception
 
-    user_info = verify_keycloak_token(token)
+    user_info = await verify_keycloak_token(token)
 
     if user_info is None:
         raise credentials_exception
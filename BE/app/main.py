@@ -1,11 +1,16 @@
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from strawberry.fastapi import GraphQLRouter
 
 from app.core.config import settings
 from app.core.database import create_tables
+from app.core.keycloak import close_keycloak_client
+from app.core.progress import progress_broker
 from app.api.graphql import schema
+from app.api.graphql_context import get_graphql_context
 from app.api.rest.auth import router as auth_router
 from app.api.rest.misc import router as misc_router
 from app.api.rest.areas import router as areas_router
@@ -16,6 +21,10 @@ from app.api.rest.iwtr import router as iwtr_router
 from app.api.rest.osr import router as osr_router
 from app.api.rest.external_apps import router as external_apps_router
 from app.api.rest.warehouse_import import router as warehouse_import_router
+from app.api.rest.scanner_sync import router as scanner_sync_router
+from app.api.rest.exports import router as exports_router
+from app.modules.inventory.sap_mirror_service import run_sap_mirror_scheduler
+from app.modules.inventory.group_summary import run_group_summary_scheduler
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -50,13 +59,30 @@ app.include_router(iwtr_router, prefix="/api/iwtr", tags=["IWTR"])
 app.include_router(osr_router, prefix="/api/osr", tags=["OSR"])
 app.include_router(external_apps_router, prefix="/api/external-apps", tags=["External Apps"])
 app.include_router(warehouse_import_router, prefix="/api/warehouse-import", tags=["Warehouse Import"])
+app.include_router(scanner_sync_router, prefix="/api/scanner-sync", tags=["Scanner Sync"])
+app.include_router(exports_router, prefix="/api/exports", tags=["Exports"])
 
-graphql_app = GraphQLRouter(schema)
+graphql_app = GraphQLRouter(schema, context_getter=get_graphql_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 @app.on_event("startup")
 async def startup_event():
     await create_tables()
+    if settings.SAP_MIRROR_ENABLED:
+        app.state.sap_mirror_task = asyncio.create_task(run_sap_mirror_scheduler())
+    if settings.GROUP_SUMMARY_ENABLED:
+        app.state.group_summary_task = asyncio.create_task(run_group_summary_scheduler())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    sap_mirror_task = getattr(app.state, "sap_mirror_task", None)
+    if sap_mirror_task is not None:
+        sap_mirror_task.cancel()
+    group_summary_task = getattr(app.state, "group_summary_task", None)
+    if group_summary_task is not None:
+        group_summary_task.cancel()
+    await progress_broker.stop()
+    await close_keycloak_client()
 
 @app.get("/")
 async def root():
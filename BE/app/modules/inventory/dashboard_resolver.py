@@ -5,14 +5,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.types import Info
 
 from app.modules.inventory.service import (
-    AreaService,
-    LocationService,
     InventoryService,
-    WarehouseImportService,
-    IWTRService,
-    OSRService,
-    TransactionDashboardService
+    TransactionDashboardService,
+    DashboardStatsService
 )
+from app.modules.inventory.stock_ledger import StockLedger
+from app.modules.locations.resolvers import LocationType
 
 
 @strawberry.type
@@ -58,6 +56,7 @@ class InventoryDashboardItem:
 class InventoryDashboardGroupItem:
     group_key: str
     group_value: str
+    group_name: Optional[str]
     total_available_quantity: int
     total_initial_quantity: int
     item_count: int 
@@ -79,6 +78,9 @@ class PaginationMeta:
     size: int
     total_items: int
     total_pages: int
+    next_cursor: Optional[str] = None
+    count_mode: Optional[str] = None
+    refreshed_at: Optional[str] = None
 
 
 @strawberry.type
@@ -119,6 +121,11 @@ class FullInventoryItem:
     msd_level: Optional[str]
     comments: Optional[str]
 
+    @strawberry.field
+    async def location(self, info: Info) -> Optional[LocationType]:
+        """Location of the inventory (batched per request)"""
+        return await info.context.loaders.location_by_id.load(self.location_id)
+
 
 @strawberry.type
 class FullInventoryResponse:
@@ -156,36 +163,44 @@ class TransactionDashboardResponse:
     meta: PaginationMeta
 
 
+@strawberry.type
+class StockSummaryItem:
+    """Stock totals of one group, read from stock_rollups"""
+    sap_code: Optional[str] = None
+    location_id: Optional[int] = None
+    location_code: Optional[str] = None
+    area_id: Optional[int] = None
+    area_code: Optional[str] = None
+    area_name: Optional[str] = None
+    available_quantity: int = 0
+    box_count: int = 0
+    updated_date: Optional[str] = None
+
+
+@strawberry.type
+class StockSummaryResponse:
+    data: List[StockSummaryItem]
+    meta: PaginationMeta
+
+
 @strawberry.type
 class DashboardQuery:
 
     @strawberry.field
     async def dashboard(self, info: Info) -> DashboardDataType:
 
-        from app.core.database import AsyncSessionLocal
-        async with AsyncSessionLocal() as db:
-            total_areas = len(await AreaService.get_areas(db))
-            total_locations = len(await LocationService.get_locations(db))
-            total_inventory_items = len(await InventoryService.get_inventories(db))
-
-            import_reqs = await WarehouseImportService.get_import_requirements(db)
-            active_import_requirements = len([req for req in import_reqs if req.get('status') == 'False'])
-
-            iwtr_requests = await IWTRService.get_iwtr_requests(db)
-            pending_iwtr = len([req for req in iwtr_requests if req.get('status') != 'Hoàn thành'])
-
-            osr_requests = await OSRService.get_osr_requests(db)
-            pending_osr = len([req for req in osr_requests if req.get('status') != 'Hoàn thành'])
-
-            return DashboardDataType(
-                total_areas=total_areas,
-                total_locations=total_locations,
-                total_inventory_items=total_inventory_items,
-                active_import_requirements=active_import_requirements,
-                pending_iwtr=pending_iwtr,
-                pending_osr=pending_osr,
-                recent_activities=[],
-            )
+        async with info.context.session(read=True) as db:
+            stats = await DashboardStatsService.get_dashboard_stats(db)
+
+        return DashboardDataType(
+            total_areas=stats["total_areas"],
+            total_locations=stats["total_locations"],
+            total_inventory_items=stats["total_inventory_items"],
+            active_import_requirements=stats["active_import_requirements"],
+            pending_iwtr=stats["pending_iwtr"],
+            pending_osr=stats["pending_osr"],
+            recent_activities=[],
+        )
 
     @strawberry.field
     async def inventoryDashboard(
@@ -201,10 +216,12 @@ class DashboardQuery:
         location_id: Optional[int] = None,
         area_id: Optional[int] = None,
         status: Optional[str] = None,
-        updated_by: Optional[str] = None
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
     ) -> InventoryDashboardResponse:
-        from app.core.database import AsyncSessionLocal
-        async with AsyncSessionLocal() as db:
+        async with info.context.session(read=True) as db:
             result = await InventoryService.get_inventory_dashboard(
                 db=db,
                 page=page,
@@ -217,7 +234,10 @@ class DashboardQuery:
                 location_id=location_id,
                 area_id=area_id,
                 status=status,
-                updated_by=updated_by
+                updated_by=updated_by,
+                code_match=code_match,
+                after=after,
+                count_mode=count_mode
             )
 
         data = [
@@ -245,7 +265,9 @@ class DashboardQuery:
             page=result["meta"]["page"],
             size=result["meta"]["size"],
             total_items=result["meta"]["total_items"],
-            total_pages=result["meta"]["total_pages"]
+            total_pages=result["meta"]["total_pages"],
+            next_cursor=result["meta"]["next_cursor"],
+            count_mode=result["meta"]["count_mode"]
         )
 
         return InventoryDashboardResponse(data=data, meta=meta)
@@ -266,10 +288,13 @@ class DashboardQuery:
         location_id: Optional[int] = None,
         area_id: Optional[int] = None,
         status: Optional[str] = None,
-        updated_by: Optional[str] = None
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None
     ) -> InventoryDashboardGroupResponse:
-        from app.core.database import AsyncSessionLocal
-        async with AsyncSessionLocal() as db:
+        async with info.context.session(read=True) as db:
             result = await InventoryService.get_inventory_dashboard_grouped(
                 db=db,
                 group_by=group_by,
@@ -283,19 +308,24 @@ class DashboardQuery:
                 location_id=location_id,
                 area_id=area_id,
                 status=status,
-                updated_by=updated_by
+                updated_by=updated_by,
+                code_match=code_match,
+                count_mode=count_mode,
+                sort_by=sort_by,
+                sort_order=sort_order
             )
 
         data = [
             InventoryDashboardGroupItem(
                 group_key=group["group_key"],
                 group_value=group["group_value"],
+                group_name=group["group_name"],
                 total_available_quantity=group["total_available_quantity"],
                 total_initial_quantity=group["total_initial_quantity"],
                 item_count=group["item_count"],
                 
 
-                total_unique_products=group["total_clients"],
+                total_unique_products=group["total_unique_products"],
                 total_clients=group["total_clients"],
                 total_pos=group["total_pos"],
                 total_pallets=group["total_pallets"],
@@ -312,7 +342,9 @@ class DashboardQuery:
             page=result["meta"]["page"],
             size=result["meta"]["size"],
             total_items=result["meta"]["total_items"],
-            total_pages=result["meta"]["total_pages"]
+            total_pages=result["meta"]["total_pages"],
+            count_mode=result["meta"]["count_mode"],
+            refreshed_at=result["meta"]["refreshed_at"]
         )
 
         return InventoryDashboardGroupResponse(data=data, meta=meta)
@@ -332,7 +364,9 @@ class DashboardQuery:
         status: Optional[bool] = None,
         from_date: Optional[str] = None,
         to_date: Optional[str] = None,
-        updated_by: Optional[str] = None
+        updated_by: Optional[str] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
     ) -> TransactionDashboardResponse:
         """
         Unified dashboard for all transaction types (IMPORT, TRANSFER, EXPORT)
@@ -348,10 +382,11 @@ class DashboardQuery:
             from_date: Filter by date range start
             to_date: Filter by date range end
             updated_by: Filter by user who updated
+            after: Opaque cursor (meta.next_cursor of the previous page) for keyset paging
+            count_mode: How meta.total_items is computed (exact, estimated, cached)
         """
-        from app.core.database import AsyncSessionLocal
         
-        async with AsyncSessionLocal() as db:
+        async with info.context.session(read=True) as db:
             result = await TransactionDashboardService.get_transactions_dashboard(
                 db=db,
                 page=page,
@@ -365,7 +400,9 @@ class DashboardQuery:
                 status=status,
                 from_date=from_date,
                 to_date=to_date,
-                updated_by=updated_by
+                updated_by=updated_by,
+                cursor=after,
+                count_mode=count_mode
             )
 
         # Convert to Strawberry types
@@ -397,7 +434,47 @@ class DashboardQuery:
             page=result["meta"]["page"],
             size=result["meta"]["size"],
             total_items=result["meta"]["total_items"],
-            total_pages=result["meta"]["total_pages"]
+            total_pages=result["meta"]["total_pages"],
+            next_cursor=result["meta"]["next_cursor"],
+            count_mode=result["meta"]["count_mode"]
         )
 
-        return TransactionDashboardResponse(data=data, meta=meta)
\ No newline at end of file
+        return TransactionDashboardResponse(data=data, meta=meta)
+
+    @strawberry.field
+    async def stockSummary(
+        self,
+        info: Info,
+        group_by: str = "sap_code",
+        sap_code: Optional[str] = None,
+        area_id: Optional[int] = None,
+        location_id: Optional[int] = None,
+        page: int = 1,
+        size: int = 50
+    ) -> StockSummaryResponse:
+        """
+        Stock per SAP code, location, area or (SAP code, area), from the stock_rollups table
+
+        Args:
+            group_by: sap_code, location, area or sap_code_area
+        """
+        async with info.context.session(read=True) as db:
+            result = await StockLedger.get_stock_summary(
+                db,
+                group_by=group_by,
+                sap_code=sap_code,
+                area_id=area_id,
+                location_id=location_id,
+                page=page,
+                size=size
+            )
+
+        return StockSummaryResponse(
+            data=[StockSummaryItem(**item) for item in result["data"]],
+            meta=PaginationMeta(
+                page=result["meta"]["page"],
+                size=result["meta"]["size"],
+                total_items=result["meta"]["total_items"],
+                total_pages=result["meta"]["total_pages"]
+            )
+        )
@@ -0,0 +1,197 @@
+"""
+Dòng xuất CSV/XLSX của dashboard tồn kho, tồn kho theo nhóm và giao dịch
+"""
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.export import stream_rows
+from app.modules.inventory.models import Inventory
+from app.modules.inventory.group_summary import InventoryGroupSummaryService, GROUP_DIMENSIONS, dashboard_filters
+from app.modules.inventory.service import InventoryService, TransactionDashboardService
+
+INVENTORY_COLUMNS = [
+    "id",
+    "identifier",
+    "name",
+    "client_id",
+    "serial_pallet",
+    "po",
+    "available_quantity",
+    "initial_quantity",
+    "location_id",
+    "area_code",
+    "area_name",
+    "status",
+    "updated_by",
+    "received_date",
+    "updated_date",
+]
+
+GROUP_COLUMNS = [
+    "group_key",
+    "group_value",
+    "group_name",
+    "total_available_quantity",
+    "total_initial_quantity",
+    "item_count",
+    "total_unique_products",
+    "total_clients",
+    "total_pos",
+    "total_pallets",
+    "total_containers",
+    "total_locations",
+    "last_updated",
+    "last_received",
+]
+
+TRANSACTION_COLUMNS = [
+    "id",
+    "transaction_type",
+    "request_code",
+    "doc_entry",
+    "branch",
+    "production_team",
+    "from_warehouse",
+    "to_warehouse",
+    "created_date",
+    "status",
+    "updated_by",
+    "updated_date",
+    "po_number",
+    "client_id",
+    "lot_number",
+    "don_vi_linh",
+    "don_vi_nhan",
+    "note",
+]
+
+
+class DashboardExportService:
+    """
+    Rows of the dashboards for export, in the dashboards' own order and with their filters,
+    streamed from the database (see app.core.export) instead of paged. Arguments are
+    checked before the rows are returned, so a bad request is still answered with an error
+    status rather than a truncated file.
+    """
+
+    @staticmethod
+    async def inventory_rows(
+        db: AsyncSession,
+        name: Optional[str] = None,
+        client_id: Optional[str] = None,
+        serial_pallet: Optional[str] = None,
+        identifier: Optional[str] = None,
+        po: Optional[str] = None,
+        location_id: Optional[int] = None,
+        area_id: Optional[int] = None,
+        status: Optional[str] = None,
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None
+    ):
+        query = InventoryService.inventory_dashboard_query(
+            name=name,
+            client_id=client_id,
+            serial_pallet=serial_pallet,
+            identifier=identifier,
+            po=po,
+            location_id=location_id,
+            area_id=area_id,
+            status=status,
+            updated_by=updated_by,
+            code_match=code_match
+        ).order_by(Inventory.updated_date.desc().nulls_first(), Inventory.id.desc())
+
+        def convert(row: dict) -> dict:
+            row["status"] = "available" if row["available_quantity"] > 0 else "unavailable"
+            return row
+
+        return stream_rows(db, query, INVENTORY_COLUMNS, convert)
+
+    @staticmethod
+    async def group_rows(
+        db: AsyncSession,
+        group_by: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        name: Optional[str] = None,
+        client_id: Optional[str] = None,
+        serial_pallet: Optional[str] = None,
+        identifier: Optional[str] = None,
+        po: Optional[str] = None,
+        location_id: Optional[int] = None,
+        area_id: Optional[int] = None,
+        status: Optional[str] = None,
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None
+    ):
+        filters = dashboard_filters(
+            name=name,
+            client_id=client_id,
+            serial_pallet=serial_pallet,
+            identifier=identifier,
+            po=po,
+            location_id=location_id,
+            area_id=area_id,
+            status=status,
+            updated_by=updated_by,
+            code_match=code_match
+        )
+        group_by, query, _ = await InventoryGroupSummaryService.groups_query(db, group_by, filters, sort_by, sort_order)
+        group_key = GROUP_DIMENSIONS[group_by][0]
+
+        def convert(row: dict) -> dict:
+            row["group_key"] = group_key
+            row["group_value"] = row["group_value"] or "Unknown"
+            row["group_name"] = row["group_name"] or row["group_value"]
+            return row
+
+        return stream_rows(db, query, GROUP_COLUMNS, convert)
+
+    @staticmethod
+    async def transaction_rows(
+        db: AsyncSession,
+        transaction_type: Optional[str] = None,
+        request_code: Optional[str] = None,
+        industry: Optional[str] = None,
+        production_team: Optional[str] = None,
+        from_warehouse: Optional[int] = None,
+        to_warehouse: Optional[int] = None,
+        status: Optional[bool] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        updated_by: Optional[str] = None
+    ):
+        from sqlalchemy import select
+
+        transactions = TransactionDashboardService._build_transactions_union(
+            transaction_type=transaction_type,
+            request_code=request_code,
+            industry=industry,
+            production_team=production_team,
+            from_warehouse=from_warehouse,
+            to_warehouse=to_warehouse,
+            status=status,
+            from_date=from_date,
+            to_date=to_date,
+            updated_by=updated_by
+        )
+
+        async def no_rows():
+            return
+            yield
+
+        if transactions is None:
+            return no_rows()
+
+        query = select(transactions).order_by(
+            transactions.c.updated_date.desc().nulls_last(),
+            transactions.c.transaction_type.desc(),
+            transactions.c.id.desc()
+        )
+
+        def convert(row: dict) -> dict:
+            row["branch"] = row["industry"]
+            return row
+
+        return stream_rows(db, query, TRANSACTION_COLUMNS, convert)
@@ -20,6 +20,7 @@ class OWTR(ExternalAppsBase):
     DocDate = Column(DateTime)
     DocDueDate = Column(DateTime)
     TaxDate = Column(DateTime)
+    UpdateDate = Column(DateTime)  # Ngày cập nhật gần nhất
     
     # Business Partner Information
     CardCode = Column(String(15))
@@ -27,6 +28,7 @@ class OWTR(ExternalAppsBase):
     
     # Warehouse Information
     BPLId = Column(Integer)  # Từ chi nhánh
+    Filler = Column(String(8))  # Từ kho
     ToWhsCode = Column(String(8))  # Đến kho
     
     # Additional Information
@@ -67,6 +69,10 @@ class WTR1(ExternalAppsBase):
     Quantity = Column(Numeric(19, 6))  # Số lượng sản phẩm
     UomCode = Column(String(100))  # Mã đơn vị tính
     
+    # Warehouse Information
+    FromWhsCod = Column(String(8))  # Từ kho
+    WhsCode = Column(String(8))  # Đến kho
+
     # Additional Information
     ShipDate = Column(DateTime)  # Ngày giao hàng
     FreeTxt = Column(Text)  # Ghi chú sản phẩm trong phiếu
@@ -90,6 +96,7 @@ class ORDR(ExternalAppsBase):
     DocDate = Column(DateTime)  # Ngày nhập
     DocDueDate = Column(DateTime)  # Ngày giao hàng
     TaxDate = Column(DateTime)  # Ngày chứng từ
+    UpdateDate = Column(DateTime)  # Ngày cập nhật gần nhất
     
     # Business Partner Information
     CardCode = Column(String(15))  # Mã khách hàng
@@ -141,6 +148,7 @@ class RDR1(ExternalAppsBase):
     UomCode = Column(String(100))  # Mã đơn vị tính
     
     # Warehouse and Shipping
+    WhsCode = Column(String(8))  # Kho xuất
     ShipDate = Column(DateTime)  # Ngày giao hàng
     FreeTxt = Column(Text)  # Ghi chú sản phẩm trong đơn hàng
     
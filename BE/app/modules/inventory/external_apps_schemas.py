@@ -1,7 +1,7 @@
 
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Optional, List, Literal, Union, Annotated
+from pydantic import BaseModel, Field, model_validator
 
 
 class InventoryWHItem(BaseModel):
@@ -82,6 +82,7 @@ class IWTRHeaderResponse(BaseModel):
     CardCode: Optional[str] = None
     CardName: Optional[str] = None
     BPLId: Optional[int] = None
+    Filler: Optional[str] = None
     ToWhsCode: Optional[str] = None
     OwnerCode: Optional[int] = None
     Comments: Optional[str] = None
@@ -258,6 +259,7 @@ class RDR1LineResponse(BaseModel):
     U_PO: Optional[str] = None
     U_QDDNGH: Optional[str] = None
     U_soPOPI: Optional[str] = None
+    WhsCode: Optional[str] = None
     Quantity: Optional[float] = None
     UomCode: Optional[str] = None
     FreeTxt: Optional[str] = None
@@ -276,6 +278,8 @@ class WTR1LineResponse(BaseModel):
     ShipDate: Optional[datetime] = None
     U_PO: Optional[str] = None
     ToWhsCode: Optional[str] = None
+    FromWhsCod: Optional[str] = None
+    WhsCode: Optional[str] = None
     Quantity: Optional[float] = None
     UomCode: Optional[str] = None
     FreeTxt: Optional[str] = None
@@ -710,6 +714,9 @@ class OSRScanDetailResponse(BaseModel):
     """Response schema for OSR scan operation"""
     success: bool
     details: Optional[List[dict]] = None
+    duplicates: List[dict] = Field(default_factory=list, description="Scan trùng (sản phẩm, inventory) đã bỏ qua")
+    rejected: List[dict] = Field(default_factory=list, description="Scan bị từ chối do không đủ tồn hoặc không có inventory")
+    progress: Optional[dict] = Field(None, description="Tiến độ quét của phiếu")
 
     class Config:
         json_schema_extra = {
@@ -782,6 +789,9 @@ class IWTRScanDetailResponse(BaseModel):
     """Response schema for IWTR scan operation"""
     success: bool
     details: Optional[List[dict]] = None
+    duplicates: List[dict] = Field(default_factory=list, description="Scan trùng (sản phẩm, inventory) đã bỏ qua")
+    rejected: List[dict] = Field(default_factory=list, description="Scan bị từ chối do không đủ tồn hoặc không có inventory")
+    progress: Optional[dict] = Field(None, description="Tiến độ quét của phiếu")
 
     class Config:
         json_schema_extra = {
@@ -824,6 +834,8 @@ class WTR1Response(BaseModel):
     BaseLine: Optional[int] = None
     ShipDate: Optional[datetime] = None
     U_PO: Optional[str] = None
+    FromWhsCod: Optional[str] = None
+    WhsCode: Optional[str] = None
     Quantity: Optional[float] = None
     UomCode: Optional[str] = None
     FreeTxt: Optional[str] = None
@@ -850,6 +862,44 @@ class OSRFullORDRRDR1Response(BaseModel):
         from_attributes = True
 
 
+# 500 + 500 giá trị IN vẫn dưới giới hạn 2100 tham số của MSSQL
+SAP_BATCH_MAX_DOCUMENTS = 500
+
+
+class SAPDocumentBatchRequest(BaseModel):
+    """Request schema for loading several SAP documents at once"""
+    doc_entries: List[int] = Field(default_factory=list, max_length=SAP_BATCH_MAX_DOCUMENTS, description="Danh sách DocEntry")
+    doc_nums: List[int] = Field(default_factory=list, max_length=SAP_BATCH_MAX_DOCUMENTS, description="Danh sách DocNum")
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if not self.doc_entries and not self.doc_nums:
+            raise ValueError("doc_entries hoặc doc_nums phải có ít nhất một giá trị")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "doc_entries": [1201, 1202],
+                "doc_nums": [25000123]
+            }
+        }
+
+
+class IWTRBatchOWTRWTR1Response(BaseModel):
+    """Response schema for a batch of IWTR documents in OWTR/WTR1 structure"""
+    data: List[IWTRFullOWTRWTR1Response]
+    missing_doc_entries: List[int] = []
+    missing_doc_nums: List[int] = []
+
+
+class OSRBatchORDRRDR1Response(BaseModel):
+    """Response schema for a batch of OSR documents in ORDR/RDR1 structure"""
+    data: List[OSRFullORDRRDR1Response]
+    missing_doc_entries: List[int] = []
+    missing_doc_nums: List[int] = []
+
+
 class TransactionDashboardItem(BaseModel):
     """Unified transaction dashboard item for all transaction types"""
     id: int
@@ -934,4 +984,100 @@ class TransactionDashboardResponse(BaseModel):
                     "total_pages": 5
                 }
             }
-        }
\ No newline at end of file
+        }
+
+
+SCANNER_SYNC_MAX_EVENTS = 2000
+
+
+class ScannerSyncEventBase(BaseModel):
+    sequence: int = Field(..., ge=0, description="Số thứ tự sự kiện do máy quét cấp, tăng dần theo thiết bị")
+
+
+class ImportConfirmSyncEvent(ScannerSyncEventBase):
+    """Xác nhận thùng nhập kho (PATCH /container-inventories)"""
+    type: Literal["import_confirm"]
+    container_inventory_id: int
+    confirmed: bool = True
+    quantity_imported: Optional[int] = Field(None, ge=0)
+    location_id: Optional[int] = None
+    scan_by: Optional[str] = Field(None, max_length=10)
+
+
+class IWTRScanSyncEvent(ScannerSyncEventBase, IWTRScanDetailItem):
+    """Quét thùng cho phiếu IWTR (POST /api/iwtr/requests/{request_id}/scan)"""
+    type: Literal["iwtr_scan"]
+    request_id: int
+
+
+class OSRScanSyncEvent(ScannerSyncEventBase, OSRScanDetailItem):
+    """Quét thùng cho phiếu OSR (POST /api/osr/requests/{request_id}/scan)"""
+    type: Literal["osr_scan"]
+    request_id: int
+
+
+class LocationMoveSyncEvent(ScannerSyncEventBase):
+    """Chuyển vị trí thùng (PUT /api/inventories/inventory/update-location)"""
+    type: Literal["location_move"]
+    inventory_identifier: str = Field(..., max_length=20)
+    location_id: int
+    updated_by: Optional[str] = Field(None, max_length=50)
+
+
+ScannerSyncEventItem = Annotated[
+    Union[ImportConfirmSyncEvent, IWTRScanSyncEvent, OSRScanSyncEvent, LocationMoveSyncEvent],
+    Field(discriminator="type")
+]
+
+
+class ScannerSyncRequest(BaseModel):
+    """Request schema for an offline scanner batch"""
+    device_id: str = Field(..., min_length=1, max_length=64, description="Mã thiết bị quét")
+    events: List[ScannerSyncEventItem] = Field(..., min_length=1, max_length=SCANNER_SYNC_MAX_EVENTS)
+
+    @model_validator(mode="after")
+    def check_unique_sequences(self):
+        sequences = [event.sequence for event in self.events]
+        if len(sequences) != len(set(sequences)):
+            raise ValueError("sequence phải là duy nhất trong một lô")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "device_id": "PDA-07",
+                "events": [
+                    {"sequence": 41, "type": "import_confirm", "container_inventory_id": 1001, "scan_by": "user1"},
+                    {
+                        "sequence": 42,
+                        "type": "iwtr_scan",
+                        "request_id": 12,
+                        "product_in_iwtr_id": 1,
+                        "inventory_identifier": "INV-001",
+                        "serial_pallet": "PALLET-001",
+                        "quantity_dispatched": 100,
+                        "scan_time": "2024-01-15T10:30:00",
+                        "scan_by": "user1"
+                    },
+                    {"sequence": 43, "type": "location_move", "inventory_identifier": "INV-001", "location_id": 5}
+                ]
+            }
+        }
+
+
+class ScannerSyncEventResult(BaseModel):
+    sequence: int
+    status: str = Field(..., description="applied | duplicate | rejected")
+    reason: Optional[str] = None
+    replayed: bool = Field(False, description="Sự kiện đã được áp dụng ở lần đồng bộ trước")
+
+
+class ScannerSyncResponse(BaseModel):
+    """Response schema for an offline scanner batch"""
+    device_id: str
+    last_sequence: Optional[int] = None
+    applied: int
+    duplicates: int
+    rejected: int
+    replayed: int
+    results: List[ScannerSyncEventResult]
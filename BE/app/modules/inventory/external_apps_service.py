@@ -1,10 +1,27 @@
 
-from typing import List, Optional
-from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, delete, func, literal_column, Table
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.core.config import settings
+from app.core.cache import cache, INVENTORY_DASHBOARD, DASHBOARD_STATS, TRANSACTIONS_DASHBOARD
 from app.modules.inventory.external_apps_models import OWTR, WTR1, ORDR, RDR1
+from app.modules.inventory.sap_mirror_models import SapOWTR, SapWTR1, SapORDR, SapRDR1
+from app.modules.inventory.sap_mirror_service import SAP_IN_CHUNK_SIZE, _chunks
+from app.modules.inventory.warehouse_codes import warehouse_codes, resolve_whs_code
+from app.modules.inventory.stock_ledger import StockLedger, movement, ADJUST, MOVE
+from app.modules.inventory.models import (
+    InternalWarehouseTransferRequest,
+    ProductsInIWTR,
+    InventoriesInIWTR,
+    OutboundShipmentRequestOnOrder,
+    ProductsInOSR,
+    InventoriesInOSR
+)
 from app.modules.inventory.external_apps_schemas import (
     IWTRHeaderResponse,
     OSRHeaderResponse,
@@ -15,10 +32,76 @@ from app.modules.inventory.external_apps_schemas import (
     IWTRFullOWTRWTR1Response,
     OSRFullORDRRDR1Response,
     WTR1Response,
+    IWTRBatchOWTRWTR1Response,
+    OSRBatchORDRRDR1Response,
+    ExternalAppsSyncResponse,
     FilterParams
 )
 
 
+def _iwtr_models(external_apps_db: AsyncSession):
+    """OWTR/WTR1 trên SAP, hoặc bản sao cục bộ khi session đọc từ mirror (xem sap_db)"""
+    if external_apps_db.info.get("sap_live", True):
+        return OWTR, WTR1
+    return SapOWTR, SapWTR1
+
+
+def _osr_models(external_apps_db: AsyncSession):
+    """ORDR/RDR1 trên SAP, hoặc bản sao cục bộ khi session đọc từ mirror (xem sap_db)"""
+    if external_apps_db.info.get("sap_live", True):
+        return ORDR, RDR1
+    return SapORDR, SapRDR1
+
+
+_IWTR_HEADERS = TypeAdapter(List[IWTRHeaderResponse])
+_WTR1_LINES = TypeAdapter(List[WTR1Response])
+_OSR_HEADERS = TypeAdapter(List[OSRHeaderResponse])
+_RDR1_LINES = TypeAdapter(List[RDR1LineResponse])
+
+
+async def _load_documents(
+    external_apps_db: AsyncSession,
+    header_model,
+    line_model,
+    doc_entries: List[int],
+    doc_nums: List[int]
+) -> Tuple[List[dict], Dict[int, List[dict]], List[int], List[int]]:
+    """
+    Headers matching any DocEntry/DocNum (one IN query) and all their lines (one more),
+    grouped by DocEntry. Headers keep the request order; also returns the values not found.
+    """
+    filters = []
+    if doc_entries:
+        filters.append(header_model.DocEntry.in_(doc_entries))
+    if doc_nums:
+        filters.append(header_model.DocNum.in_(doc_nums))
+
+    result = await external_apps_db.execute(select(header_model.__table__).where(or_(*filters)))
+    rows = [dict(row) for row in result.mappings()]
+    by_entry = {row["DocEntry"]: row for row in rows}
+    by_num = {row["DocNum"]: row for row in rows}
+
+    headers, seen = [], set()
+    for row in [by_entry.get(doc_entry) for doc_entry in doc_entries] + [by_num.get(doc_num) for doc_num in doc_nums]:
+        if row is not None and row["DocEntry"] not in seen:
+            seen.add(row["DocEntry"])
+            headers.append(row)
+    missing_doc_entries = [doc_entry for doc_entry in doc_entries if doc_entry not in by_entry]
+    missing_doc_nums = [doc_num for doc_num in doc_nums if doc_num not in by_num]
+
+    lines: Dict[int, List[dict]] = {doc_entry: [] for doc_entry in seen}
+    if seen:
+        result = await external_apps_db.execute(
+            select(line_model.__table__)
+            .where(line_model.DocEntry.in_(list(seen)))
+            .order_by(line_model.DocEntry, line_model.LineNum)
+        )
+        for row in result.mappings():
+            lines[row["DocEntry"]].append(dict(row))
+
+    return headers, lines, missing_doc_entries, missing_doc_nums
+
+
 class ExternalAppsIWTRService:
 
     
@@ -34,28 +117,29 @@ class ExternalAppsIWTRService:
         limit: int = 100
     ) -> List[IWTRHeaderResponse]:
 
-        query = select(OWTR)
+        header_model, line_model = _iwtr_models(external_apps_db)
+        query = select(header_model)
         
         # Build filters
-        filters = [OWTR.CANCELED == canceled]
+        filters = [header_model.CANCELED == canceled]
         
         if doc_entry:
-            filters.append(OWTR.DocEntry == doc_entry)
+            filters.append(header_model.DocEntry == doc_entry)
         
         if doc_num:
-            filters.append(OWTR.DocNum == doc_num)
+            filters.append(header_model.DocNum == doc_num)
         
         if doc_status:
-            filters.append(OWTR.DocStatus == doc_status)
+            filters.append(header_model.DocStatus == doc_status)
         
         if from_date:
-            filters.append(OWTR.DocDate >= from_date)
+            filters.append(header_model.DocDate >= from_date)
         
         if to_date:
-            filters.append(OWTR.DocDate <= to_date)
+            filters.append(header_model.DocDate <= to_date)
         
         query = query.where(and_(*filters))
-        query = query.order_by(OWTR.DocEntry.desc())
+        query = query.order_by(header_model.DocEntry.desc())
         query = query.limit(limit)
 
         result = await external_apps_db.execute(query)
@@ -69,7 +153,8 @@ class ExternalAppsIWTRService:
         doc_entry: int
     ) -> Optional[IWTRHeaderResponse]:
 
-        query = select(OWTR).where(OWTR.DocEntry == doc_entry)
+        header_model, line_model = _iwtr_models(external_apps_db)
+        query = select(header_model).where(header_model.DocEntry == doc_entry)
         result = await external_apps_db.execute(query)
         record = result.scalar_one_or_none()
         
@@ -96,7 +181,8 @@ class ExternalAppsIWTRService:
         doc_entry: int
     ) -> List[WTR1LineResponse]:
 
-        query = select(WTR1).where(WTR1.DocEntry == doc_entry).order_by(WTR1.LineNum)
+        header_model, line_model = _iwtr_models(external_apps_db)
+        query = select(line_model).where(line_model.DocEntry == doc_entry).order_by(line_model.LineNum)
         result = await external_apps_db.execute(query)
         records = result.scalars().all()
 
@@ -125,7 +211,8 @@ class ExternalAppsIWTRService:
         doc_num: int
     ) -> Optional[IWTRFullResponse]:
 
-        query = select(OWTR).where(OWTR.DocNum == doc_num)
+        header_model, line_model = _iwtr_models(external_apps_db)
+        query = select(header_model).where(header_model.DocNum == doc_num)
         result = await external_apps_db.execute(query)
         record = result.scalar_one_or_none()
 
@@ -158,6 +245,33 @@ class ExternalAppsIWTRService:
             WTR1=wtr1_lines
         )
 
+    @staticmethod
+    async def get_iwtr_owtr_wtr1_batch(
+        external_apps_db: AsyncSession,
+        doc_entries: List[int],
+        doc_nums: List[int]
+    ) -> IWTRBatchOWTRWTR1Response:
+        """Several IWTR documents in OWTR/WTR1 format with two queries, validated in bulk"""
+        header_model, line_model = _iwtr_models(external_apps_db)
+        headers, lines, missing_doc_entries, missing_doc_nums = await _load_documents(
+            external_apps_db, header_model, line_model, doc_entries, doc_nums
+        )
+
+        owtr = _IWTR_HEADERS.validate_python(headers)
+        wtr1 = _WTR1_LINES.validate_python([line for header in headers for line in lines[header["DocEntry"]]])
+        wtr1_by_doc: Dict[int, List[WTR1Response]] = {header["DocEntry"]: [] for header in headers}
+        for line in wtr1:
+            wtr1_by_doc[line.DocEntry].append(line)
+
+        return IWTRBatchOWTRWTR1Response.model_construct(
+            data=[
+                IWTRFullOWTRWTR1Response.model_construct(OWTR=header, WTR1=wtr1_by_doc[header.DocEntry])
+                for header in owtr
+            ],
+            missing_doc_entries=missing_doc_entries,
+            missing_doc_nums=missing_doc_nums
+        )
+
 
 class ExternalAppsOSRService:
     
@@ -174,31 +288,32 @@ class ExternalAppsOSRService:
         limit: int = 100
     ) -> List[OSRHeaderResponse]:
 
-        query = select(ORDR)
+        header_model, line_model = _osr_models(external_apps_db)
+        query = select(header_model)
         
         # Build filters
-        filters = [ORDR.CANCELED == canceled]
+        filters = [header_model.CANCELED == canceled]
         
         if doc_entry:
-            filters.append(ORDR.DocEntry == doc_entry)
+            filters.append(header_model.DocEntry == doc_entry)
         
         if doc_num:
-            filters.append(ORDR.DocNum == doc_num)
+            filters.append(header_model.DocNum == doc_num)
         
         if doc_status:
-            filters.append(ORDR.DocStatus == doc_status)
+            filters.append(header_model.DocStatus == doc_status)
         
         if from_date:
-            filters.append(ORDR.DocDate >= from_date)
+            filters.append(header_model.DocDate >= from_date)
         
         if to_date:
-            filters.append(ORDR.DocDate <= to_date)
+            filters.append(header_model.DocDate <= to_date)
         
         if card_code:
-            filters.append(ORDR.CardCode == card_code)
+            filters.append(header_model.CardCode == card_code)
         
         query = query.where(and_(*filters))
-        query = query.order_by(ORDR.DocEntry.desc())
+        query = query.order_by(header_model.DocEntry.desc())
         query = query.limit(limit)
         
         result = await external_apps_db.execute(query)
@@ -212,7 +327,8 @@ class ExternalAppsOSRService:
         doc_entry: int
     ) -> Optional[OSRHeaderResponse]:
 
-        query = select(ORDR).where(ORDR.DocEntry == doc_entry)
+        header_model, line_model = _osr_models(external_apps_db)
+        query = select(header_model).where(header_model.DocEntry == doc_entry)
         result = await external_apps_db.execute(query)
         record = result.scalar_one_or_none()
         
@@ -239,7 +355,8 @@ class ExternalAppsOSRService:
         doc_entry: int
     ) -> List[RDR1LineResponse]:
  
-        query = select(RDR1).where(RDR1.DocEntry == doc_entry).order_by(RDR1.LineNum)
+        header_model, line_model = _osr_models(external_apps_db)
+        query = select(line_model).where(line_model.DocEntry == doc_entry).order_by(line_model.LineNum)
         result = await external_apps_db.execute(query)
         records = result.scalars().all()
 
@@ -270,7 +387,8 @@ class ExternalAppsOSRService:
         doc_num: int
     ) -> Optional[OSRFullResponse]:
 
-        query = select(ORDR).where(ORDR.DocNum == doc_num)
+        header_model, line_model = _osr_models(external_apps_db)
+        query = select(header_model).where(header_model.DocNum == doc_num)
         result = await external_apps_db.execute(query)
         record = result.scalar_one_or_none()
 
@@ -321,16 +439,48 @@ class ExternalAppsOSRService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise
 
+    @staticmethod
+    async def get_osr_ordr_rdr1_batch(
+        external_apps_db: AsyncSession,
+        doc_entries: List[int],
+        doc_nums: List[int]
+    ) -> OSRBatchORDRRDR1Response:
+        """Several OSR documents in ORDR/RDR1 format with two queries, validated in bulk"""
+        header_model, line_model = _osr_models(external_apps_db)
+        headers, lines, missing_doc_entries, missing_doc_nums = await _load_documents(
+            external_apps_db, header_model, line_model, doc_entries, doc_nums
+        )
+
+        ordr = _OSR_HEADERS.validate_python(headers)
+        rdr1 = _RDR1_LINES.validate_python([line for header in headers for line in lines[header["DocEntry"]]])
+        rdr1_by_doc: Dict[int, List[RDR1LineResponse]] = {header["DocEntry"]: [] for header in headers}
+        for line in rdr1:
+            rdr1_by_doc[line.DocEntry].append(line)
+
+        return OSRBatchORDRRDR1Response.model_construct(
+            data=[
+                OSRFullORDRRDR1Response.model_construct(ORDR=header, RDR1=rdr1_by_doc[header.DocEntry])
+                for header in ordr
+            ],
+            missing_doc_entries=missing_doc_entries,
+            missing_doc_nums=missing_doc_nums
+        )
+
 
 class ExternalAppsDataMapper:
     
     @staticmethod
-    def map_owtr_to_iwtr_create(owtr: IWTRHeaderResponse, updated_by: str = "system") -> dict:
+    def map_owtr_to_iwtr_create(
+        owtr: IWTRHeaderResponse,
+        updated_by: str = "system",
+        area_ids: Optional[Dict[str, int]] = None
+    ) -> dict:
+        """area_ids: warehouse_codes.mapping() - SAP warehouse code -> area_id"""
 
         return {
             "ma_yc_cknb": f"IWTR-{owtr.DocNum or owtr.DocEntry}",
-            "tu_kho": None,  # Will be mapped from ToWhsCode to area_id
-            "den_kho": None,  # Will be mapped from ToWhsCode to area_id
+            "tu_kho": resolve_whs_code(area_ids, owtr.Filler),
+            "den_kho": resolve_whs_code(area_ids, owtr.ToWhsCode),
             "don_vi_linh": owtr.U_Pur_NVGiao or "",
             "don_vi_nhan": owtr.U_Pur_NVNhan or "",
             "ly_do_xuat_nhap": owtr.U_Category or "",
@@ -345,12 +495,18 @@ class ExternalAppsDataMapper:
         }
     
     @staticmethod
-    def map_ordr_to_osr_create(ordr: OSRHeaderResponse, updated_by: str = "system") -> dict:
+    def map_ordr_to_osr_create(
+        ordr: OSRHeaderResponse,
+        updated_by: str = "system",
+        area_ids: Optional[Dict[str, int]] = None,
+        whs_code: Optional[str] = None
+    ) -> dict:
+        """area_ids: warehouse_codes.mapping(); whs_code: kho xuất (RDR1.WhsCode), ORDR không có cột kho"""
 
         return {
             "ma_yc_xk": f"OSR-{ordr.DocNum or ordr.DocEntry}",
-            "kho_xuat": None,  # Will be mapped from warehouse code to area_id
-            "xuat_toi": None,
+            "kho_xuat": resolve_whs_code(area_ids, whs_code),
+            "xuat_toi": resolve_whs_code(area_ids, ordr.U_GRPO),
             "don_vi_linh": ordr.U_Pur_NVGiao or "",
             "don_vi_nhan": ordr.U_Pur_NVNhan or ordr.CardName or "",
             "ly_do_xuat_nhap": ordr.U_Category or "Xuất hàng theo đơn bán",
@@ -364,6 +520,269 @@ class ExternalAppsDataMapper:
             "updated_by": updated_by
         }
 
+    @staticmethod
+    def map_lines_to_products(lines: List[dict], updated_by: str = "system") -> List[dict]:
+        """WTR1/RDR1 lines of one document -> products rows, one per ItemCode (quantities summed)"""
+        products: Dict[str, dict] = {}
+        for line in lines:
+            product_code = line.get("ItemCode")
+            if not product_code:
+                continue
+            product = products.setdefault(product_code, {
+                "product_code": product_code,
+                "product_name": line.get("Dscription"),
+                "total_quantity": Decimal(0),
+                "dvt": line.get("UomCode"),
+                "quantity_scanned": 0,
+                "updated_by": updated_by
+            })
+            product["total_quantity"] += Decimal(str(line.get("Quantity") or 0))
+        for product in products.values():
+            product["total_quantity"] = int(round(product["total_quantity"]))
+        return list(products.values())
+
+    @staticmethod
+    def map_wtr1_to_products_in_iwtr(
+        lines: List[dict],
+        updated_by: str = "system",
+        area_ids: Optional[Dict[str, int]] = None
+    ) -> List[dict]:
+        """map_lines_to_products plus the from/to area of each product (first line of the item)"""
+        products = ExternalAppsDataMapper.map_lines_to_products(lines, updated_by)
+        first_lines = {}
+        for line in lines:
+            first_lines.setdefault(line.get("ItemCode"), line)
+        for product in products:
+            line = first_lines[product["product_code"]]
+            product["tu_kho"] = resolve_whs_code(area_ids, line.get("FromWhsCod"))
+            product["den_kho"] = resolve_whs_code(area_ids, line.get("WhsCode"))
+        return products
+
+
+# Cột của phiếu lấy từ SAP; trạng thái và người quét do WMS quản lý nên import không ghi đè
+SAP_OWNED_REQUEST_COLUMNS = [
+    "don_vi_linh",
+    "don_vi_nhan",
+    "ly_do_xuat_nhap",
+    "ngay_chung_tu",
+    "so_phieu_xuat",
+    "so_chung_tu",
+    "series_pgh",
+    "note"
+]
+
+
+class SapDocumentImportService:
+    """
+    Bulk import of open SAP documents (OWTR -> IWTR, ORDR -> OSR) in a DocDate window
+    (default: the last SAP_IMPORT_WINDOW_DAYS days).
+
+    Requests are upserted with INSERT ... ON CONFLICT (ma_yc_cknb / ma_yc_xk) so a run can
+    be repeated; only the SAP-owned columns are refreshed and soft-deleted requests are left
+    alone. Products of a request are rebuilt from the SAP lines unless scanning has started
+    on it (quantity_scanned > 0 or scanned inventories), in which case they are kept.
+    """
+
+    @staticmethod
+    async def import_open_iwtr(
+        db: AsyncSession,
+        external_apps_db: AsyncSession,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        updated_by: str = "system"
+    ) -> ExternalAppsSyncResponse:
+        header_model, line_model = _iwtr_models(external_apps_db)
+        return await SapDocumentImportService._import_documents(
+            db,
+            external_apps_db,
+            header_model,
+            line_model,
+            from_date,
+            to_date,
+            map_header=lambda header, lines, area_ids: ExternalAppsDataMapper.map_owtr_to_iwtr_create(
+                header, updated_by, area_ids
+            ),
+            map_products=lambda lines, area_ids: ExternalAppsDataMapper.map_wtr1_to_products_in_iwtr(
+                lines, updated_by, area_ids
+            ),
+            warehouse_columns=["tu_kho", "den_kho"],
+            header_adapter=_IWTR_HEADERS,
+            request_table=InternalWarehouseTransferRequest.__table__,
+            code_column="ma_yc_cknb",
+            product_table=ProductsInIWTR.__table__,
+            parent_column="internal_warehouse_transfer_requests_id",
+            scanned_table=InventoriesInIWTR.__table__,
+            scanned_column="product_in_iwtr_id",
+            updated_by=updated_by
+        )
+
+    @staticmethod
+    async def import_open_osr(
+        db: AsyncSession,
+        external_apps_db: AsyncSession,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        updated_by: str = "system"
+    ) -> ExternalAppsSyncResponse:
+        header_model, line_model = _osr_models(external_apps_db)
+        return await SapDocumentImportService._import_documents(
+            db,
+            external_apps_db,
+            header_model,
+            line_model,
+            from_date,
+            to_date,
+            map_header=lambda header, lines, area_ids: ExternalAppsDataMapper.map_ordr_to_osr_create(
+                header, updated_by, area_ids, next((line["WhsCode"] for line in lines if line.get("WhsCode")), None)
+            ),
+            map_products=lambda lines, area_ids: ExternalAppsDataMapper.map_lines_to_products(lines, updated_by),
+            warehouse_columns=["kho_xuat", "xuat_toi"],
+            header_adapter=_OSR_HEADERS,
+            request_table=OutboundShipmentRequestOnOrder.__table__,
+            code_column="ma_yc_xk",
+            product_table=ProductsInOSR.__table__,
+            parent_column="outbound_shipment_request_on_order_id",
+            scanned_table=InventoriesInOSR.__table__,
+            scanned_column="product_in_osr_id",
+            updated_by=updated_by
+        )
+
+    @staticmethod
+    async def _import_documents(
+        db: AsyncSession,
+        external_apps_db: AsyncSession,
+        header_model,
+        line_model,
+        from_date: Optional[datetime],
+        to_date: Optional[datetime],
+        map_header: Callable,
+        map_products: Callable,
+        warehouse_columns: List[str],
+        header_adapter: TypeAdapter,
+        request_table: Table,
+        code_column: str,
+        product_table: Table,
+        parent_column: str,
+        scanned_table: Table,
+        scanned_column: str,
+        updated_by: str
+    ) -> ExternalAppsSyncResponse:
+        # 1. Open documents of the window (default: last SAP_IMPORT_WINDOW_DAYS) and their lines
+        to_date = to_date or datetime.now()
+        from_date = from_date or to_date - timedelta(days=settings.SAP_IMPORT_WINDOW_DAYS)
+        result = await external_apps_db.execute(
+            select(header_model.__table__)
+            .where(
+                header_model.DocStatus == 'O',
+                header_model.CANCELED == 'N',
+                header_model.DocDate >= from_date,
+                header_model.DocDate <= to_date
+            )
+            .order_by(header_model.DocEntry)
+        )
+        headers = header_adapter.validate_python([dict(row) for row in result.mappings()])
+        if not headers:
+            return ExternalAppsSyncResponse(success=True, message="Không có chứng từ mở trong khoảng thời gian")
+
+        lines_by_doc: Dict[int, List[dict]] = {header.DocEntry: [] for header in headers}
+        for chunk in _chunks(list(lines_by_doc), SAP_IN_CHUNK_SIZE):
+            result = await external_apps_db.execute(
+                select(line_model.__table__)
+                .where(line_model.DocEntry.in_(chunk))
+                .order_by(line_model.DocEntry, line_model.LineNum)
+            )
+            for row in result.mappings():
+                lines_by_doc[row["DocEntry"]].append(dict(row))
+
+        # SAP warehouse codes -> areas from the in-process resolver, no query per document
+        async with db.begin():
+            area_ids = await warehouse_codes.mapping(db)
+
+        note_length = request_table.c.note.type.length
+        requests = []
+        for header in headers:
+            request = map_header(header, lines_by_doc[header.DocEntry], area_ids)
+            if request["note"] and len(request["note"]) > note_length:
+                request["note"] = request["note"][:note_length]
+            requests.append(request)
+        doc_entry_by_code = {request[code_column]: header.DocEntry for request, header in zip(requests, headers)}
+
+        async with db.begin():
+            # 2. Upsert the requests (batched multi-row INSERT ... ON CONFLICT)
+            upsert = pg_insert(request_table)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[request_table.c[code_column]],
+                set_={
+                    **{column: upsert.excluded[column] for column in SAP_OWNED_REQUEST_COLUMNS},
+                    # kho đã chỉnh tay trên WMS được giữ nguyên, chỉ điền khi còn trống
+                    **{
+                        column: func.coalesce(request_table.c[column], upsert.excluded[column])
+                        for column in warehouse_columns
+                    },
+                    "updated_by": upsert.excluded.updated_by,
+                    "updated_date": func.now()
+                },
+                where=request_table.c.deleted_at.is_(None)
+            ).returning(
+                request_table.c.id,
+                request_table.c[code_column],
+                literal_column("xmax = 0").label("inserted")
+            )
+            result = await db.execute(upsert, requests)
+            upserted = result.all()
+            request_ids = [row.id for row in upserted]
+            created = sum(1 for row in upserted if row.inserted)
+
+            # 3. Requests already being scanned keep their products
+            locked = set()
+            if request_ids:
+                parent = product_table.c[parent_column]
+                scanned = await db.execute(
+                    select(parent)
+                    .where(
+                        parent.in_(request_ids),
+                        or_(
+                            product_table.c.quantity_scanned > 0,
+                            product_table.c.id.in_(select(scanned_table.c[scanned_column]))
+                        )
+                    )
+                    .distinct()
+                )
+                locked = set(scanned.scalars().all())
+
+            # 4. Rebuild the products of the other requests from the SAP lines
+            rebuild_ids = [request_id for request_id in request_ids if request_id not in locked]
+            products = []
+            for row in upserted:
+                if row.id in locked:
+                    continue
+                doc_lines = lines_by_doc[doc_entry_by_code[row._mapping[code_column]]]
+                for product in map_products(doc_lines, area_ids):
+                    products.append({parent_column: row.id, **product})
+
+            if rebuild_ids:
+                await db.execute(
+                    delete(product_table)
+                    .where(product_table.c[parent_column].in_(rebuild_ids))
+                    .execution_options(synchronize_session=False)
+                )
+            if products:
+                await db.execute(pg_insert(product_table), products)
+
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+
+        skipped = len(requests) - len(upserted)
+        return ExternalAppsSyncResponse(
+            success=True,
+            message=f"Đã import {len(upserted)} chứng từ ({len(products)} dòng sản phẩm), "
+                    f"giữ nguyên sản phẩm của {len(locked)} phiếu đang quét",
+            records_fetched=len(headers),
+            records_created=created,
+            records_updated=len(upserted) - created,
+            records_failed=skipped,
+            errors=[f"{skipped} phiếu đã bị xoá trên WMS nên không được cập nhật"] if skipped else None
+        )
+
 
 class InventoryUpdateService:
     
@@ -379,7 +798,7 @@ class InventoryUpdateService:
         from datetime import datetime
         
         # Find inventory by identifier
-        query = select(Inventory).where(Inventory.identifier == inventory_identifier)
+        query = select(Inventory).where(Inventory.identifier == inventory_identifier).with_for_update()
         result = await db.execute(query)
         inventory = result.scalar_one_or_none()
         
@@ -387,12 +806,17 @@ class InventoryUpdateService:
             raise ValueError(f"Inventory with identifier '{inventory_identifier}' not found")
         
         # Update quantity
+        await StockLedger.record(db, [movement(
+            inventory, ADJUST, inventory.available_quantity, available_quantity,
+            inventory.location_id, inventory.location_id, created_by=updated_by
+        )])
         inventory.available_quantity = available_quantity
         inventory.updated_by = updated_by
         inventory.updated_date = datetime.now()
         
         await db.commit()
         await db.refresh(inventory)
+        await cache.invalidate(INVENTORY_DASHBOARD)
         
         return {
             "id": inventory.id,
@@ -435,7 +859,7 @@ class InventoryUpdateService:
             raise ValueError(f"Location with ID {location_id} not found")
         
         # Find inventory by identifier
-        query = select(Inventory).where(Inventory.identifier == inventory_identifier)
+        query = select(Inventory).where(Inventory.identifier == inventory_identifier).with_for_update()
         result = await db.execute(query)
         inventory = result.scalar_one_or_none()
         
@@ -443,6 +867,10 @@ class InventoryUpdateService:
             raise ValueError(f"Inventory with identifier '{inventory_identifier}' not found")
         
         # Update location
+        await StockLedger.record(db, [movement(
+            inventory, MOVE, inventory.available_quantity, inventory.available_quantity,
+            inventory.location_id, location_id, created_by=updated_by
+        )])
         inventory.last_location_id = inventory.location_id
         inventory.location_id = location_id
         inventory.updated_by = updated_by
@@ -450,6 +878,7 @@ class InventoryUpdateService:
         
         await db.commit()
         await db.refresh(inventory)
+        await cache.invalidate(INVENTORY_DASHBOARD)
         
         return {
             "id": inventory.id,
@@ -0,0 +1,304 @@
+"""
+Dashboard tồn kho theo nhóm (area, po, client, sap_code): bảng tổng hợp inventory_group_summaries
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, delete, insert, func, distinct, cast, literal, literal_column, text, and_, or_, String, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine, AsyncSessionLocal
+from app.core.exceptions import ValidationException
+from app.core.cache import INVENTORY_DASHBOARD
+from app.core.search import text_search_filter, code_search_filter
+from app.modules.inventory.models import Area, Location, Inventory, InventoryGroupSummary
+
+logger = logging.getLogger(__name__)
+
+# group_by -> (group_key, value column, display name column) of the base query
+GROUP_DIMENSIONS = {
+    "area": ("area_code", "area_code", "area_name"),
+    "po": ("po", "po", "po"),
+    "client": ("client_id", "client_id", "client_id"),
+    "sap_code": ("sap_code", "sap_code", "name"),
+}
+DEFAULT_GROUP_BY = "area"
+
+GROUP_SORTS = (
+    "total_available_quantity",
+    "total_initial_quantity",
+    "item_count",
+    "total_containers",
+    "group_value",
+    "last_updated",
+    "last_received",
+)
+
+# Column order of inventory_group_summaries filled by INSERT ... SELECT
+SUMMARY_COLUMNS = [
+    "group_by",
+    "group_value",
+    "group_name",
+    "total_available_quantity",
+    "total_initial_quantity",
+    "item_count",
+    "total_unique_products",
+    "total_clients",
+    "total_pos",
+    "total_locations",
+    "total_pallets",
+    "total_containers",
+    "last_updated",
+    "last_received",
+    "refreshed_at",
+]
+
+# pg_advisory_lock key, so only one worker refreshes at a time
+REFRESH_LOCK_KEY = 72_022_001
+
+
+def dashboard_base_query():
+    """
+    One row per box with the columns every grouping and filter needs; client_id / PO
+    are stamped on the box (app.modules.inventory.import_origin)
+    """
+    return select(
+        Inventory.id,
+        Inventory.name,
+        Inventory.sap_code,
+        func.coalesce(Inventory.po, Inventory.po_number).label("po"),
+        Inventory.client_id,
+        Inventory.serial_pallet,
+        Inventory.identifier,
+        Inventory.available_quantity,
+        Inventory.initial_quantity,
+        Inventory.location_id,
+        Area.code.label("area_code"),
+        Area.name.label("area_name"),
+        Inventory.updated_date,
+        Inventory.received_date
+    ).select_from(
+        Inventory
+    ).join(
+        Location, Inventory.location_id == Location.id
+    ).join(
+        Area, Location.area_id == Area.id
+    )
+
+
+def dashboard_filters(
+    name: Optional[str] = None,
+    client_id: Optional[str] = None,
+    serial_pallet: Optional[str] = None,
+    identifier: Optional[str] = None,
+    po: Optional[str] = None,
+    location_id: Optional[int] = None,
+    area_id: Optional[int] = None,
+    status: Optional[str] = None,
+    updated_by: Optional[str] = None,
+    code_match: Optional[str] = None
+) -> list:
+    filters = []
+    if name:
+        filters.append(text_search_filter(Inventory.name, name))
+    if client_id:
+        filters.append(Inventory.client_id == str(client_id))
+    if serial_pallet:
+        filters.append(code_search_filter(Inventory.serial_pallet, serial_pallet, code_match))
+    if identifier:
+        filters.append(code_search_filter(Inventory.identifier, identifier, code_match))
+    if po:
+        filters.append(or_(
+            code_search_filter(Inventory.po, po, code_match),
+            code_search_filter(Inventory.po_number, po, code_match)
+        ))
+    if location_id:
+        filters.append(Inventory.location_id == location_id)
+    if area_id:
+        filters.append(Area.id == area_id)
+    if status:
+        if status.lower() == "available":
+            filters.append(Inventory.available_quantity > 0)
+        elif status.lower() == "unavailable":
+            filters.append(Inventory.available_quantity == 0)
+        else:
+            filters.append(Inventory.calculated_status.ilike(f"%{status}%"))
+    if updated_by:
+        filters.append(text_search_filter(Inventory.updated_by, updated_by))
+    return filters
+
+
+class InventoryGroupSummaryService:
+    """
+    Groups of the inventory dashboard.
+
+    Unfiltered requests read inventory_group_summaries, which `refresh` recomputes for every
+    dimension in one transaction (readers keep the previous snapshot until it commits) every
+    GROUP_SUMMARY_REFRESH_SECONDS. Requests with row filters, or made before the first
+    refresh, aggregate the live tables with the same query. Either way groups are sorted
+    and paginated in SQL.
+    """
+
+    @staticmethod
+    def grouped_query(group_by: str, filters: list):
+        _, value_name, display_name = GROUP_DIMENSIONS[group_by]
+        base = dashboard_base_query()
+        if filters:
+            base = base.where(and_(*filters))
+        boxes = base.subquery()
+
+        group_value = func.coalesce(cast(boxes.c[value_name], String), literal_column("''"))
+        return select(
+            literal(group_by, String).label("group_by"),
+            group_value.label("group_value"),
+            func.max(boxes.c[display_name]).label("group_name"),
+            func.sum(boxes.c.available_quantity).label("total_available_quantity"),
+            func.sum(boxes.c.initial_quantity).label("total_initial_quantity"),
+            func.count(boxes.c.id).label("item_count"),
+            func.count(distinct(boxes.c.sap_code)).label("total_unique_products"),
+            func.count(distinct(boxes.c.client_id)).label("total_clients"),
+            func.count(distinct(boxes.c.po)).label("total_pos"),
+            func.count(distinct(boxes.c.location_id)).label("total_locations"),
+            func.count(distinct(boxes.c.serial_pallet)).label("total_pallets"),
+            func.count(distinct(boxes.c.identifier)).label("total_containers"),
+            func.max(boxes.c.updated_date).label("last_updated"),
+            func.max(boxes.c.received_date).label("last_received")
+        ).group_by(
+            group_value
+        ).having(
+            func.sum(boxes.c.available_quantity) > 0  # Chỉ lấy nhóm có tồn kho > 0
+        )
+
+    @staticmethod
+    async def refresh(db: AsyncSession) -> dict:
+        refreshed_at = datetime.now()
+        counts = {}
+        async with db.begin():
+            for group_by in GROUP_DIMENSIONS:
+                await db.execute(delete(InventoryGroupSummary).where(InventoryGroupSummary.group_by == group_by))
+                grouped = InventoryGroupSummaryService.grouped_query(group_by, []).add_columns(
+                    literal(refreshed_at, DateTime).label("refreshed_at")
+                )
+                result = await db.execute(insert(InventoryGroupSummary).from_select(SUMMARY_COLUMNS, grouped))
+                counts[group_by] = result.rowcount
+        logger.info(f"Refreshed inventory group summaries: {counts}")
+        return counts
+
+    @staticmethod
+    async def refresh_locked() -> Optional[dict]:
+        """Run refresh unless another worker holds the refresh lock (returns None then)"""
+        async with engine.connect() as conn:
+            locked = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": REFRESH_LOCK_KEY})
+            if not locked:
+                return None
+            try:
+                async with AsyncSessionLocal() as db:
+                    return await InventoryGroupSummaryService.refresh(db)
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REFRESH_LOCK_KEY})
+
+    @staticmethod
+    async def groups_query(
+        db: AsyncSession,
+        group_by: Optional[str],
+        filters: list,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None
+    ):
+        """
+        Sorted groups as a query, from the summary table when it applies, otherwise live.
+        Returns (group_by, query, refreshed_at of the summary or None).
+        """
+        group_by = group_by or DEFAULT_GROUP_BY
+        if group_by not in GROUP_DIMENSIONS:
+            raise ValidationException(f"group_by phải là một trong: {', '.join(GROUP_DIMENSIONS)}")
+        sort_by = sort_by or "total_available_quantity"
+        if sort_by not in GROUP_SORTS:
+            raise ValidationException(f"sort_by phải là một trong: {', '.join(GROUP_SORTS)}")
+        descending = (sort_order or "desc").lower() != "asc"
+
+        refreshed_at = None
+        if not filters and settings.GROUP_SUMMARY_ENABLED:
+            refreshed_at = await db.scalar(
+                select(func.max(InventoryGroupSummary.refreshed_at)).where(InventoryGroupSummary.group_by == group_by)
+            )
+        if refreshed_at is not None:
+            groups = select(InventoryGroupSummary).where(InventoryGroupSummary.group_by == group_by).subquery()
+        else:
+            groups = InventoryGroupSummaryService.grouped_query(group_by, filters).subquery()
+
+        sort_column = groups.c[sort_by]
+        sort_column = sort_column.desc().nulls_last() if descending else sort_column.asc().nulls_first()
+        return group_by, select(groups).order_by(sort_column, groups.c.group_value), refreshed_at
+
+    @staticmethod
+    async def get_groups(
+        db: AsyncSession,
+        group_by: Optional[str],
+        filters: list,
+        page: int = 1,
+        size: int = 20,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        count_mode: Optional[str] = None
+    ) -> dict:
+        from app.core.pagination import count_total
+
+        page = max(page, 1)
+        size = min(max(size, 1), 1000)
+        group_by, query, refreshed_at = await InventoryGroupSummaryService.groups_query(
+            db, group_by, filters, sort_by, sort_order
+        )
+
+        total_items, count_mode = await count_total(db, query.order_by(None), count_mode, INVENTORY_DASHBOARD)
+        result = await db.execute(query.offset((page - 1) * size).limit(size))
+
+        group_key = GROUP_DIMENSIONS[group_by][0]
+        data = []
+        for row in result.all():
+            group_value = row.group_value or "Unknown"
+            data.append({
+                "group_key": group_key,
+                "group_value": group_value,
+                "group_name": row.group_name or group_value,
+                "total_available_quantity": row.total_available_quantity or 0,
+                "total_initial_quantity": row.total_initial_quantity or 0,
+                "item_count": row.item_count or 0,
+                "total_unique_products": row.total_unique_products or 0,  # Số mã SAP duy nhất
+                "total_clients": row.total_clients or 0,  # Tổng k.hàng (mã khách hàng duy nhất)
+                "total_pos": row.total_pos or 0,  # Số PO (PO duy nhất)
+                "total_pallets": row.total_pallets or 0,  # Số pallet (serial_pallet duy nhất)
+                "total_containers": row.total_containers or 0,  # Số thùng (identifier duy nhất)
+                "total_locations": row.total_locations or 0,  # Số vị trí (location_id duy nhất)
+                "last_updated": row.last_updated.isoformat() if row.last_updated else None,
+                "last_received": row.last_received.isoformat() if row.last_received else None,
+            })
+
+        total_pages = (total_items + size - 1) // size if total_items > 0 else 1
+
+        return {
+            "data": data,
+            "meta": {
+                "page": page,
+                "size": size,
+                "total_items": total_items,
+                "total_pages": total_pages,
+                "count_mode": count_mode,
+                "refreshed_at": refreshed_at.isoformat() if refreshed_at else None
+            }
+        }
+
+
+async def run_group_summary_scheduler() -> None:
+    """Background loop started with the application when GROUP_SUMMARY_ENABLED is set"""
+    while True:
+        try:
+            await InventoryGroupSummaryService.refresh_locked()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Inventory group summary refresh failed: {str(e)}", exc_info=True)
+        await asyncio.sleep(settings.GROUP_SUMMARY_REFRESH_SECONDS)
@@ -0,0 +1,133 @@
+"""
+Khách hàng / PO của yêu cầu nhập kho, ghi thẳng lên inventories (client_id, po_number)
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.inventory.models import (
+    Inventory,
+    ContainerInventory,
+    ImportPalletInfo,
+    WarehouseImportRequirement
+)
+
+logger = logging.getLogger(__name__)
+
+# asyncpg accepts at most 32767 bind parameters per statement
+ORIGIN_PARAM_LIMIT = 30000
+
+ORIGIN_FIELDS = ("client_id", "po_number")
+
+
+def import_origin_query():
+    """
+    (inventory_identifier, client_id, po_number) of every scanned box, through
+    container_inventories -> import_pallet_info -> warehouse_import_requirements.
+    The pallet's PO wins over the requirement's.
+    """
+    return select(
+        ContainerInventory.inventory_identifier,
+        WarehouseImportRequirement.client_id,
+        func.coalesce(ImportPalletInfo.po_number, WarehouseImportRequirement.po_number).label("po_number")
+    ).join(
+        ImportPalletInfo, ImportPalletInfo.id == ContainerInventory.import_pallet_id
+    ).join(
+        WarehouseImportRequirement, WarehouseImportRequirement.id == ImportPalletInfo.warehouse_import_requirement_id
+    )
+
+
+class ImportOrigin:
+    """
+    The inventory dashboards used to reach client_id / PO through three outer joins on
+    inventories.identifier. They are stamped on the box instead: `stamp` when
+    /inventories_wh creates stock, `stamp_boxes` when a box's container row is confirmed
+    after that, and `backfill` (run by the import origin migration) for older boxes, so
+    the dashboards filter and group on inventories alone.
+    """
+
+    @staticmethod
+    async def lookup(db: AsyncSession, identifiers: List[str]) -> Dict[str, Tuple]:
+        """identifier -> (client_id, po_number); the latest container row of a box wins"""
+        origins = {}
+        identifiers = [identifier for identifier in set(identifiers) if identifier]
+        for start in range(0, len(identifiers), ORIGIN_PARAM_LIMIT):
+            chunk = identifiers[start:start + ORIGIN_PARAM_LIMIT]
+            result = await db.execute(
+                import_origin_query()
+                .where(ContainerInventory.inventory_identifier.in_(chunk))
+                .order_by(ContainerInventory.id)
+            )
+            for identifier, client_id, po_number in result.all():
+                origins[identifier] = (client_id, po_number)
+        return origins
+
+    @staticmethod
+    async def stamp(db: AsyncSession, inventories_data: List[dict]) -> None:
+        """Fill client_id / po_number of new inventory rows that do not carry them yet"""
+        pending = [
+            data for data in inventories_data
+            if not any(data.get(field) for field in ORIGIN_FIELDS)
+        ]
+        if not pending:
+            return
+        origins = await ImportOrigin.lookup(db, [data.get("identifier") for data in pending])
+        for data in pending:
+            origin = origins.get(data.get("identifier"))
+            if origin is not None:
+                data["client_id"], data["po_number"] = origin
+
+    @staticmethod
+    def _stamp_statement(*conditions):
+        """
+        UPDATE of the boxes matching `conditions` that have neither client_id nor po_number,
+        from their latest container row
+        """
+        unstamped = (*conditions, Inventory.client_id.is_(None), Inventory.po_number.is_(None))
+        origins = (
+            import_origin_query()
+            .where(ContainerInventory.inventory_identifier.in_(
+                select(Inventory.identifier).where(*unstamped).correlate(None)
+            ))
+            .distinct(ContainerInventory.inventory_identifier)
+            .order_by(ContainerInventory.inventory_identifier, ContainerInventory.id.desc())
+            .subquery()
+        )
+        return (
+            update(Inventory)
+            .where(Inventory.identifier == origins.c.inventory_identifier, *unstamped)
+            .values(client_id=origins.c.client_id, po_number=origins.c.po_number)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def stamp_boxes(db: AsyncSession, identifiers: List[str]) -> int:
+        """Stamp existing boxes (in the caller's transaction), e.g. once their container row is confirmed"""
+        identifiers = [identifier for identifier in set(identifiers) if identifier]
+        stamped = 0
+        for start in range(0, len(identifiers), ORIGIN_PARAM_LIMIT):
+            chunk = identifiers[start:start + ORIGIN_PARAM_LIMIT]
+            result = await db.execute(ImportOrigin._stamp_statement(Inventory.identifier.in_(chunk)))
+            stamped += result.rowcount
+        return stamped
+
+    @staticmethod
+    async def backfill(db: AsyncSession, batch_size: int = 5000) -> int:
+        """
+        Stamp every box that has neither client_id nor po_number yet and has a container
+        row. Runs in id ranges of `batch_size`, one short transaction each.
+        """
+        max_id = await db.scalar(select(func.max(Inventory.id))) or 0
+        await db.commit()
+
+        stamped = 0
+        for low in range(0, max_id + 1, batch_size):
+            async with db.begin():
+                result = await db.execute(
+                    ImportOrigin._stamp_statement(Inventory.id >= low, Inventory.id < low + batch_size)
+                )
+                stamped += result.rowcount
+        logger.info(f"Stamped import origin on {stamped} inventories")
+        return stamped
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, BigInteger, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
-from app.core.database import Base
+from app.core.database import Base, MIGRATION_OWNED
 
 
 class Area(Base):
@@ -19,6 +19,18 @@ class Area(Base):
     updated_date = Column(DateTime, default=func.now())
 
 
+class AreaWarehouseCode(Base):
+    """Mã kho SAP (ToWhsCode / WhsCode) ứng với kho WMS"""
+    __tablename__ = "area_warehouse_codes"
+    __table_args__ = {"info": dict(MIGRATION_OWNED)}
+
+    id = Column(Integer, primary_key=True)
+    whs_code = Column(String(8), unique=True, nullable=False)
+    area_id = Column(Integer, ForeignKey("areas.id"), nullable=False, index=True)
+    updated_by = Column(String(15), nullable=True)
+    updated_date = Column(DateTime, default=func.now())
+
+
 class Location(Base):
     __tablename__ = "locations"
 
@@ -72,6 +84,66 @@ class Inventory(Base):
     vendor = Column(String(50), nullable=True)
     msd_level = Column(String(50), nullable=True)
     comments = Column(String(255), nullable=True)
+    # Khách hàng / PO của yêu cầu nhập kho (app.modules.inventory.import_origin)
+    client_id = Column(String(255), nullable=True, index=True)
+    po_number = Column(String(255), nullable=True, index=True)
+
+
+class InventoryMovement(Base):
+    """Sổ biến động tồn kho, chỉ ghi thêm: nhập (receipt), chuyển vị trí (move), xuất (pick), điều chỉnh (adjust)"""
+    __tablename__ = "inventory_movements"
+    __table_args__ = {"info": dict(MIGRATION_OWNED)}
+
+    id = Column(BigInteger, primary_key=True)
+    inventory_id = Column(BigInteger, nullable=False, index=True)
+    identifier = Column(String(20), nullable=True)
+    movement_type = Column(String(10), nullable=False)
+    sap_code = Column(String(20), nullable=True)
+    quantity_delta = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=False)
+    from_location_id = Column(Integer, nullable=True)
+    to_location_id = Column(Integer, nullable=True)
+    reference = Column(String(50), nullable=True)
+    created_by = Column(String(50), nullable=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+
+
+class StockRollup(Base):
+    """Tồn kho cộng dồn theo (mã SAP, vị trí, kho), cập nhật cùng giao dịch với inventory_movements"""
+    __tablename__ = "stock_rollups"
+    __table_args__ = {"info": dict(MIGRATION_OWNED)}
+
+    # '' khi thùng chưa có mã SAP
+    sap_code = Column(String(20), primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    area_id = Column(Integer, primary_key=True, index=True)
+    available_quantity = Column(BigInteger, nullable=False, default=0)
+    # số thùng còn hàng (available_quantity > 0)
+    box_count = Column(Integer, nullable=False, default=0)
+    updated_date = Column(DateTime, default=func.now())
+
+
+class InventoryGroupSummary(Base):
+    """Tổng hợp tồn kho theo nhóm (area, po, client, sap_code) cho dashboard, làm mới định kỳ"""
+    __tablename__ = "inventory_group_summaries"
+    __table_args__ = {"info": dict(MIGRATION_OWNED)}
+
+    group_by = Column(String(10), primary_key=True)
+    # '' khi giá trị nhóm trống
+    group_value = Column(String(255), primary_key=True)
+    group_name = Column(String(255), nullable=True)
+    total_available_quantity = Column(BigInteger, nullable=False)
+    total_initial_quantity = Column(BigInteger, nullable=False)
+    item_count = Column(Integer, nullable=False)
+    total_unique_products = Column(Integer, nullable=False)
+    total_clients = Column(Integer, nullable=False)
+    total_pos = Column(Integer, nullable=False)
+    total_locations = Column(Integer, nullable=False)
+    total_pallets = Column(Integer, nullable=False)
+    total_containers = Column(Integer, nullable=False)
+    last_updated = Column(DateTime, nullable=True)
+    last_received = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, nullable=False)
 
 
 class WarehouseImportRequirement(Base):
@@ -165,11 +237,28 @@ class ContainerInventory(Base):
     confirmed = Column(Boolean, default=False)
     list_serial_items = Column(Text, nullable=True)
 
+class ScannerSyncEvent(Base):
+    """Sự kiện quét đã áp dụng từ máy quét cầm tay, theo (device_id, sequence)"""
+    __tablename__ = "scanner_sync_events"
+    __table_args__ = (
+        UniqueConstraint("device_id", "sequence", name="uq_scanner_sync_events_device_sequence"),
+        {"info": dict(MIGRATION_OWNED)},
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    device_id = Column(String(64), nullable=False)
+    sequence = Column(BigInteger, nullable=False)
+    event_type = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False)
+    reason = Column(String(255), nullable=True)
+    applied_at = Column(DateTime, default=func.now())
+
+
 class InternalWarehouseTransferRequest(Base):
     __tablename__ = "internal_warehouse_transfer_requests"
 
     id = Column(Integer, primary_key=True)
-    ma_yc_cknb = Column(String(50), nullable=False)
+    ma_yc_cknb = Column(String(50), unique=True, nullable=False)
     tu_kho = Column(Integer, nullable=True)
     den_kho = Column(Integer, nullable=True)
     don_vi_linh = Column(String(255), nullable=True)
@@ -12,6 +12,7 @@ from app.modules.inventory.schemas import (
 )
 from app.modules.inventory.service import InventoryService
 from app.modules.inventory.dashboard_resolver import InventoryDashboardResponse, FullInventoryResponse, FullInventoryItem
+from app.modules.locations.resolvers import LocationType
 
 
 @strawberry.experimental.pydantic.type(model=InventoryItem, all_fields=True)
@@ -20,7 +21,11 @@ class InventoryItemType:
 
 @strawberry.experimental.pydantic.type(model=InventoryResponse, all_fields=True)
 class InventoryType:
-    pass
+
+    @strawberry.field
+    async def location(self, info: Info) -> Optional[LocationType]:
+        """Location of the inventory (batched per request)"""
+        return await info.context.loaders.location_by_id.load(self.location_id)
 
 @strawberry.experimental.pydantic.input(model=InventoryItemCreate, all_fields=True)
 class InventoryItemCreateInput:
@@ -37,18 +42,16 @@ class InventoryQuery:
     @strawberry.field
     async def inventory_items(self, info: Info) -> List[InventoryItemType]:
         """Get all inventory items"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.inventory.schemas import InventoryItem as InventoryItemSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             items = await InventoryService.get_inventories(db)
             return [InventoryItemSchema.from_orm(item) for item in items]
 
     @strawberry.field
     async def inventory_item(self, info: Info, id: int) -> InventoryItemType:
         """Get inventory item by ID"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.inventory.schemas import InventoryItem as InventoryItemSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             item = await InventoryService.get_inventory_item_by_id(db, id)
             return InventoryItemSchema.from_orm(item)
 
@@ -65,11 +68,13 @@ class InventoryQuery:
         lot: Optional[str] = None,
         vendor: Optional[str] = None,
         location_id: Optional[int] = None,
+        code_match: Optional[str] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None,
     ) -> FullInventoryResponse:
-        from app.core.database import AsyncSessionLocal
         from app.modules.inventory.dashboard_resolver import PaginationMeta
 
-        async with AsyncSessionLocal() as db:
+        async with info.context.session(read=True) as db:
             result = await InventoryService.get_inventories_paginated(
                 db=db,
                 page=page,
@@ -80,7 +85,10 @@ class InventoryQuery:
                 po=po,
                 lot=lot,
                 vendor=vendor,
-                location_id=location_id
+                location_id=location_id,
+                code_match=code_match,
+                after=after,
+                count_mode=count_mode
             )
 
             data = []
@@ -115,7 +123,9 @@ class InventoryQuery:
                 page=result["meta"]["page"],
                 size=result["meta"]["size"],
                 total_items=result["meta"]["total_items"],
-                total_pages=result["meta"]["total_pages"]
+                total_pages=result["meta"]["total_pages"],
+                next_cursor=result["meta"]["next_cursor"],
+                count_mode=result["meta"]["count_mode"]
             )
 
             return FullInventoryResponse(data=data, meta=meta)
@@ -123,9 +133,8 @@ class InventoryQuery:
     @strawberry.field
     async def inventory(self, info: Info, id: int) -> InventoryType:
         """Get inventory by ID with full details"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.inventory.schemas import InventoryResponse as InventorySchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             inv = await InventoryService.get_inventory_by_id(db, id)
             return InventorySchema.from_orm(inv)
 
@@ -137,24 +146,21 @@ class InventoryMutation:
     @strawberry.mutation
     async def create_inventory_item(self, info: Info, input: InventoryItemCreateInput) -> InventoryItemType:
         """Create new inventory item"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.inventory.schemas import InventoryItem as InventoryItemSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             item = await InventoryService.create_inventory_item(db, input)
             return InventoryItemSchema.from_orm(item)
 
     @strawberry.mutation
     async def update_inventory_item(self, info: Info, id: int, input: InventoryItemUpdateInput) -> InventoryItemType:
         """Update existing inventory item"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.inventory.schemas import InventoryItem as InventoryItemSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             item = await InventoryService.update_inventory_item(db, id, input)
             return InventoryItemSchema.from_orm(item)
 
     @strawberry.mutation
     async def delete_inventory_item(self, info: Info, id: int) -> bool:
         """Delete inventory item"""
-        from app.core.database import AsyncSessionLocal
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             return await InventoryService.delete_inventory_item(db, id)
\ No newline at end of file
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, BigInteger, Index
+
+from app.core.database import Base, MIGRATION_OWNED
+from app.modules.inventory.external_apps_models import OWTR, WTR1, ORDR, RDR1
+
+
+# Bản sao cục bộ (Postgres) của các bảng chứng từ SAP, cùng cột với bảng gốc
+class SapOWTR(Base):
+    """Bản sao OWTR - Phiếu chuyển kho nội bộ (Header)"""
+    __table__ = OWTR.__table__.to_metadata(Base.metadata, name="sap_owtr")
+
+
+class SapWTR1(Base):
+    """Bản sao WTR1 - Chi tiết phiếu chuyển kho nội bộ (Detail)"""
+    __table__ = WTR1.__table__.to_metadata(Base.metadata, name="sap_wtr1")
+
+
+class SapORDR(Base):
+    """Bản sao ORDR - Đơn hàng bán (Header)"""
+    __table__ = ORDR.__table__.to_metadata(Base.metadata, name="sap_ordr")
+
+
+class SapRDR1(Base):
+    """Bản sao RDR1 - Chi tiết đơn hàng bán (Detail)"""
+    __table__ = RDR1.__table__.to_metadata(Base.metadata, name="sap_rdr1")
+
+
+for _mirror in (SapOWTR, SapWTR1, SapORDR, SapRDR1):
+    _mirror.__table__.info.update(MIGRATION_OWNED)
+
+for _header in (SapOWTR, SapORDR):
+    Index(f"ix_{_header.__table__.name}_doc_num", _header.__table__.c.DocNum)
+    Index(f"ix_{_header.__table__.name}_status_date", _header.__table__.c.DocStatus, _header.__table__.c.DocDate)
+
+
+class SapSyncState(Base):
+    """Trạng thái đồng bộ của từng loại chứng từ SAP (OWTR, ORDR)"""
+    __tablename__ = "sap_sync_state"
+    __table_args__ = {"info": dict(MIGRATION_OWNED)}
+
+    document = Column(String(10), primary_key=True)
+    last_doc_entry = Column(Integer, nullable=True)  # DocEntry lớn nhất đã đồng bộ
+    last_update_date = Column(DateTime, nullable=True)  # UpdateDate lớn nhất đã đồng bộ
+    last_synced_at = Column(DateTime, nullable=True)  # Lần đồng bộ thành công gần nhất
+    last_run_at = Column(DateTime, nullable=True)
+    last_run_rows = Column(Integer, nullable=True)  # Số dòng (header + line) của lần chạy gần nhất
+    last_run_ms = Column(Integer, nullable=True)
+    total_rows_synced = Column(BigInteger, default=0)
+    last_error = Column(Text, nullable=True)
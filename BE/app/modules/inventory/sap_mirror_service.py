@@ -0,0 +1,215 @@
+"""
+Đồng bộ bản sao cục bộ (Postgres) của chứng từ SAP: OWTR/WTR1 và ORDR/RDR1
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import select, delete, or_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine, AsyncSessionLocal, ExternalAppsAsyncSessionLocal
+from app.modules.inventory.external_apps_models import OWTR, WTR1, ORDR, RDR1
+from app.modules.inventory.sap_mirror_models import SapOWTR, SapWTR1, SapORDR, SapRDR1, SapSyncState
+
+logger = logging.getLogger(__name__)
+
+# document -> (SAP header, SAP lines, mirror header, mirror lines)
+MIRRORED_DOCUMENTS = {
+    "OWTR": (OWTR, WTR1, SapOWTR, SapWTR1),
+    "ORDR": (ORDR, RDR1, SapORDR, SapRDR1),
+}
+
+# MSSQL accepts at most 2100 parameters per statement
+SAP_IN_CHUNK_SIZE = 1000
+
+# pg_advisory_lock key, so only one worker runs the sync at a time
+SYNC_LOCK_KEY = 72_014_001
+
+
+def _chunks(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SapMirrorSyncService:
+
+    @staticmethod
+    async def sync_document(db: AsyncSession, external_apps_db: AsyncSession, document: str) -> dict:
+        """
+        Pull the delta of one SAP document type into its mirror tables.
+
+        First run: open documents and documents updated within SAP_MIRROR_RETENTION_DAYS.
+        Next runs: documents with a DocEntry above the last one synced, or updated since the
+        last UpdateDate seen (SAP stores the date only, so the current day is pulled again;
+        the upsert makes that harmless). Lines of every pulled document are replaced.
+        Closed documents older than the retention window are dropped from the mirror.
+        """
+        header_model, line_model, mirror_header, mirror_line = MIRRORED_DOCUMENTS[document]
+        started_at = time.perf_counter()
+        run_at = datetime.now()
+
+        async with db.begin():
+            state = await db.get(SapSyncState, document)
+            if state is None:
+                state = SapSyncState(document=document, total_rows_synced=0)
+                db.add(state)
+            last_doc_entry = state.last_doc_entry
+            last_update_date = state.last_update_date
+
+        if last_doc_entry is None:
+            since = run_at - timedelta(days=settings.SAP_MIRROR_RETENTION_DAYS)
+            delta = or_(header_model.DocStatus == 'O', header_model.UpdateDate >= since)
+        else:
+            delta = header_model.DocEntry > last_doc_entry
+            if last_update_date is not None:
+                delta = or_(delta, header_model.UpdateDate >= last_update_date)
+
+        header_result = await external_apps_db.execute(select(header_model.__table__).where(delta))
+        headers = [dict(row) for row in header_result.mappings()]
+        doc_entries = [header["DocEntry"] for header in headers]
+
+        lines = []
+        for chunk in _chunks(doc_entries, SAP_IN_CHUNK_SIZE):
+            line_result = await external_apps_db.execute(
+                select(line_model.__table__).where(line_model.DocEntry.in_(chunk))
+            )
+            lines.extend(dict(row) for row in line_result.mappings())
+
+        prune_before = run_at - timedelta(days=settings.SAP_MIRROR_RETENTION_DAYS)
+        async with db.begin():
+            if headers:
+                upsert = pg_insert(mirror_header.__table__)
+                upsert = upsert.on_conflict_do_update(
+                    index_elements=[mirror_header.__table__.c.DocEntry],
+                    set_={
+                        column.name: upsert.excluded[column.name]
+                        for column in mirror_header.__table__.c
+                        if not column.primary_key
+                    }
+                )
+                await db.execute(upsert, headers)
+
+                for chunk in _chunks(doc_entries, SAP_IN_CHUNK_SIZE):
+                    await db.execute(
+                        delete(mirror_line)
+                        .where(mirror_line.DocEntry.in_(chunk))
+                        .execution_options(synchronize_session=False)
+                    )
+                if lines:
+                    await db.execute(pg_insert(mirror_line.__table__), lines)
+
+            stale = select(mirror_header.DocEntry).where(
+                mirror_header.DocStatus != 'O',
+                mirror_header.UpdateDate < prune_before
+            )
+            await db.execute(
+                delete(mirror_line).where(mirror_line.DocEntry.in_(stale)).execution_options(synchronize_session=False)
+            )
+            await db.execute(
+                delete(mirror_header).where(mirror_header.DocEntry.in_(stale)).execution_options(synchronize_session=False)
+            )
+
+            rows_synced = len(headers) + len(lines)
+            state = await db.get(SapSyncState, document)
+            if doc_entries:
+                state.last_doc_entry = max(doc_entries + [last_doc_entry or 0])
+            update_dates = [header["UpdateDate"] for header in headers if header.get("UpdateDate")]
+            if update_dates:
+                state.last_update_date = max(update_dates + ([last_update_date] if last_update_date else []))
+            state.last_synced_at = run_at
+            state.last_run_at = run_at
+            state.last_run_rows = rows_synced
+            state.last_run_ms = int((time.perf_counter() - started_at) * 1000)
+            state.total_rows_synced = (state.total_rows_synced or 0) + rows_synced
+            state.last_error = None
+
+        logger.info(f"SAP mirror {document}: {len(headers)} documents, {len(lines)} lines in {state.last_run_ms} ms")
+        return {
+            "document": document,
+            "documents": len(headers),
+            "lines": len(lines),
+            "rows_synced": rows_synced,
+            "elapsed_ms": state.last_run_ms
+        }
+
+    @staticmethod
+    async def _record_failure(db: AsyncSession, document: str, error: Exception) -> None:
+        await db.rollback()
+        async with db.begin():
+            state = await db.get(SapSyncState, document)
+            if state is None:
+                state = SapSyncState(document=document, total_rows_synced=0)
+                db.add(state)
+            state.last_run_at = datetime.now()
+            state.last_run_rows = 0
+            state.last_error = str(error)[:2000]
+
+    @staticmethod
+    async def sync_all() -> List[dict]:
+        """Sync every mirrored document type; a failing type does not stop the others"""
+        results = []
+        async with AsyncSessionLocal() as db, ExternalAppsAsyncSessionLocal() as external_apps_db:
+            for document in MIRRORED_DOCUMENTS:
+                try:
+                    results.append(await SapMirrorSyncService.sync_document(db, external_apps_db, document))
+                except Exception as e:
+                    logger.error(f"SAP mirror sync of {document} failed: {str(e)}", exc_info=True)
+                    await external_apps_db.rollback()
+                    await SapMirrorSyncService._record_failure(db, document, e)
+                    results.append({"document": document, "error": str(e)})
+        return results
+
+    @staticmethod
+    async def sync_all_locked() -> Optional[List[dict]]:
+        """Run sync_all unless another worker holds the sync lock (returns None then)"""
+        async with engine.connect() as conn:
+            locked = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": SYNC_LOCK_KEY})
+            if not locked:
+                return None
+            try:
+                return await SapMirrorSyncService.sync_all()
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SYNC_LOCK_KEY})
+
+    @staticmethod
+    async def get_sync_status(db: AsyncSession) -> List[dict]:
+        """Sync lag and volume per document type"""
+        result = await db.execute(select(SapSyncState))
+        states = {state.document: state for state in result.scalars().all()}
+        now = datetime.now()
+
+        status = []
+        for document, (_, _, mirror_header, _) in MIRRORED_DOCUMENTS.items():
+            state = states.get(document)
+            mirrored = (await db.execute(select(func.count()).select_from(mirror_header))).scalar() or 0
+            last_synced_at = state.last_synced_at if state else None
+            status.append({
+                "document": document,
+                "mirrored_documents": mirrored,
+                "last_synced_at": last_synced_at.isoformat() if last_synced_at else None,
+                "lag_seconds": round((now - last_synced_at).total_seconds(), 1) if last_synced_at else None,
+                "last_run_at": state.last_run_at.isoformat() if state and state.last_run_at else None,
+                "last_run_rows": state.last_run_rows if state else None,
+                "last_run_ms": state.last_run_ms if state else None,
+                "total_rows_synced": state.total_rows_synced if state else 0,
+                "last_doc_entry": state.last_doc_entry if state else None,
+                "last_error": state.last_error if state else None
+            })
+        return status
+
+
+async def run_sap_mirror_scheduler() -> None:
+    """Background loop started with the application when SAP_MIRROR_ENABLED is set"""
+    while True:
+        try:
+            await SapMirrorSyncService.sync_all_locked()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"SAP mirror sync run failed: {str(e)}", exc_info=True)
+        await asyncio.sleep(settings.SAP_MIRROR_SYNC_SECONDS)
@@ -0,0 +1,291 @@
+"""
+Ghi nhận quét hàng theo lô cho phiếu chuyển kho nội bộ (IWTR) và phiếu xuất theo đơn bán (OSR)
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, insert, values, column, tuple_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache, INVENTORY_DASHBOARD, DASHBOARD_STATS, TRANSACTIONS_DASHBOARD
+from app.core.exceptions import ValidationException
+from app.core.progress import publish_progress, progress_topic, IWTR, OSR
+from app.modules.inventory.stock_ledger import StockLedger, movement, PICK
+from app.modules.inventory.models import (
+    Inventory,
+    InternalWarehouseTransferRequest,
+    ProductsInIWTR,
+    InventoriesInIWTR,
+    OutboundShipmentRequestOnOrder,
+    ProductsInOSR,
+    InventoriesInOSR
+)
+
+# asyncpg accepts at most 32767 bind parameters per statement
+SCAN_PARAM_LIMIT = 30000
+
+
+class ScanTarget(NamedTuple):
+    label: str
+    request_model: type
+    product_model: type
+    product_request_column: str
+    scan_model: type
+    scan_product_column: str
+    progress_kind: str
+
+
+IWTR_SCANS = ScanTarget(
+    "IWTR",
+    InternalWarehouseTransferRequest,
+    ProductsInIWTR,
+    "internal_warehouse_transfer_requests_id",
+    InventoriesInIWTR,
+    "product_in_iwtr_id",
+    IWTR
+)
+
+OSR_SCANS = ScanTarget(
+    "OSR",
+    OutboundShipmentRequestOnOrder,
+    ProductsInOSR,
+    "outbound_shipment_request_on_order_id",
+    InventoriesInOSR,
+    "product_in_osr_id",
+    OSR
+)
+
+
+def _chunks(rows: list, columns: int):
+    size = max(1, SCAN_PARAM_LIMIT // columns)
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _scan_dict(target: ScanTarget, row) -> dict:
+    return {
+        "id": row.id,
+        target.scan_product_column: getattr(row, target.scan_product_column),
+        "inventory_identifier": row.inventory_identifier,
+        "serial_pallet": row.serial_pallet,
+        "scan_by": row.scan_by,
+        "quantity_dispatched": row.quantity_dispatched,
+        "scan_time": row.scan_time,
+        "confirmed": row.confirmed
+    }
+
+
+class ScanIngestionService:
+    """
+    Ingest a burst of scans for one IWTR/OSR request in a single transaction.
+
+    1. the request's products are locked (SELECT ... FOR UPDATE), serialising concurrent
+       scans of the same request so the duplicate check below cannot race;
+    2. scans already recorded for (product, inventory_identifier) - in the batch or in the
+       table - are skipped as duplicates;
+    3. stock is decremented with one guarded UPDATE ... FROM (VALUES ...)
+       (available_quantity >= scanned quantity) and written to the stock ledger as picks;
+       boxes that are unknown or short are rejected;
+    4. accepted scans are inserted with one multi-row INSERT;
+    5. products.quantity_scanned is incremented with one grouped UPDATE ... FROM (VALUES ...);
+    6. the counters and new identifiers are published to the request's progress stream.
+
+    Returns the inserted rows, duplicates, rejections and the request progress.
+    """
+
+    @staticmethod
+    async def ingest(db: AsyncSession, target: ScanTarget, req_id: int, scan_details: List[dict]) -> dict:
+        async with db.begin():
+            result = await ScanIngestionService.ingest_in_transaction(db, target, req_id, scan_details)
+
+        if result["details"]:
+            await cache.invalidate(INVENTORY_DASHBOARD, DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return result
+
+    @staticmethod
+    async def ingest_in_transaction(db: AsyncSession, target: ScanTarget, req_id: int, scan_details: List[dict]) -> dict:
+        """Same as `ingest` for callers that own the transaction and the cache invalidation"""
+        product_column = target.scan_product_column
+        scan_table = target.scan_model.__table__
+
+        request = await db.get(target.request_model, req_id)
+        if not request:
+            raise HTTPException(status_code=404, detail=f"{target.label} with ID {req_id} not found")
+
+        product_model = target.product_model
+        result = await db.execute(
+            select(product_model)
+            .where(getattr(product_model, target.product_request_column) == req_id)
+            .order_by(product_model.id)
+            .with_for_update()
+        )
+        products = {product.id: product for product in result.scalars().all()}
+
+        foreign = sorted({detail.get(product_column) for detail in scan_details} - products.keys())
+        if foreign:
+            raise ValidationException(
+                f"Sản phẩm {', '.join(map(str, foreign))} không thuộc {target.label} {req_id}"
+            )
+
+        # Duplicates inside the batch (first scan wins), then against recorded scans
+        batch: Dict[tuple, dict] = {}
+        duplicates = []
+        for detail in scan_details:
+            key = (detail.get(product_column), detail.get("inventory_identifier"))
+            if key in batch:
+                duplicates.append(detail)
+            else:
+                batch[key] = detail
+
+        for chunk in _chunks(list(batch), 2):
+            result = await db.execute(
+                select(getattr(target.scan_model, product_column), target.scan_model.inventory_identifier)
+                .where(tuple_(
+                    getattr(target.scan_model, product_column), target.scan_model.inventory_identifier
+                ).in_(chunk))
+                .distinct()
+            )
+            for key in result.all():
+                duplicates.append(batch.pop(tuple(key)))
+
+        # Guarded stock decrement, one row per box
+        needed: Dict[str, int] = defaultdict(int)
+        scanned_by: Dict[str, str] = {}
+        for detail in batch.values():
+            needed[detail["inventory_identifier"]] += detail.get("quantity_dispatched") or 0
+            scanned_by.setdefault(detail["inventory_identifier"], detail.get("scan_by"))
+
+        remaining_stock: Dict[str, int] = {}
+        picks = []
+        for chunk in _chunks(list(needed.items()), 2):
+            source = values(
+                column("identifier", Inventory.__table__.c.identifier.type),
+                column("quantity", Inventory.__table__.c.available_quantity.type),
+                name="scanned"
+            ).data(chunk)
+            result = await db.execute(
+                update(Inventory)
+                .where(
+                    Inventory.identifier == source.c.identifier,
+                    Inventory.available_quantity >= source.c.quantity
+                )
+                .values(
+                    available_quantity=Inventory.available_quantity - source.c.quantity,
+                    updated_date=func.now()
+                )
+                .returning(
+                    Inventory.id, Inventory.identifier, Inventory.sap_code,
+                    Inventory.location_id, Inventory.available_quantity
+                )
+                .execution_options(synchronize_session=False)
+            )
+            for box in result.all():
+                remaining_stock[box.identifier] = box.available_quantity
+                picks.append(movement(
+                    box, PICK, box.available_quantity + needed[box.identifier], box.available_quantity,
+                    box.location_id, box.location_id, f"{target.label}:{req_id}", scanned_by[box.identifier]
+                ))
+        await StockLedger.record(db, picks)
+
+        rejected = []
+        short = [identifier for identifier in needed if identifier not in remaining_stock]
+        if short:
+            result = await db.execute(
+                select(Inventory.identifier, Inventory.available_quantity).where(Inventory.identifier.in_(short))
+            )
+            available = dict(result.all())
+            for key, detail in list(batch.items()):
+                identifier = detail["inventory_identifier"]
+                if identifier in remaining_stock:
+                    continue
+                rejected.append({
+                    **detail,
+                    "reason": "insufficient_stock" if identifier in available else "inventory_not_found",
+                    "available_quantity": available.get(identifier)
+                })
+                del batch[key]
+
+        # Accepted scans, one multi-row INSERT
+        created = []
+        if batch:
+            rows = [
+                {
+                    product_column: detail.get(product_column),
+                    "inventory_identifier": detail.get("inventory_identifier"),
+                    "serial_pallet": detail.get("serial_pallet"),
+                    "scan_by": detail.get("scan_by"),
+                    "quantity_dispatched": detail.get("quantity_dispatched"),
+                    "scan_time": detail.get("scan_time") or datetime.now(),
+                    "confirmed": detail.get("confirmed", False)
+                }
+                for detail in batch.values()
+            ]
+            for chunk in _chunks(rows, len(rows[0])):
+                result = await db.execute(insert(scan_table).values(chunk).returning(*scan_table.c))
+                created.extend(_scan_dict(target, row) for row in result.all())
+
+        # Product counters, one grouped UPDATE ... FROM
+        increments: Dict[int, int] = defaultdict(int)
+        for detail in batch.values():
+            increments[detail.get(product_column)] += detail.get("quantity_dispatched") or 0
+
+        scanned = {product_id: product.quantity_scanned or 0 for product_id, product in products.items()}
+        for chunk in _chunks(list(increments.items()), 2):
+            source = values(
+                column("id", product_model.__table__.c.id.type),
+                column("quantity", product_model.__table__.c.quantity_scanned.type),
+                name="scanned"
+            ).data(chunk)
+            result = await db.execute(
+                update(product_model)
+                .where(product_model.id == source.c.id)
+                .values(
+                    quantity_scanned=func.coalesce(product_model.quantity_scanned, 0) + source.c.quantity,
+                    updated_date=func.now()
+                )
+                .returning(product_model.id, product_model.quantity_scanned)
+                .execution_options(synchronize_session=False)
+            )
+            scanned.update(result.all())
+
+        if created:
+            await publish_progress(db, progress_topic(target.progress_kind, req_id), {
+                "type": "scan",
+                "products": [{"id": product_id, "quantity_scanned": scanned[product_id]} for product_id in increments],
+                "identifiers": [row["inventory_identifier"] for row in created]
+            })
+
+        return {
+            "success": not rejected,
+            "details": created,
+            "duplicates": duplicates,
+            "rejected": rejected,
+            "progress": ScanIngestionService._progress(products, scanned)
+        }
+
+    @staticmethod
+    def _progress(products: dict, scanned: Dict[int, int]) -> dict:
+        items = []
+        for product_id, product in products.items():
+            total = product.total_quantity or 0
+            done = scanned.get(product_id, 0)
+            items.append({
+                "id": product_id,
+                "product_code": product.product_code,
+                "total_quantity": total,
+                "quantity_scanned": done,
+                "remaining_quantity": max(total - done, 0),
+                "completed": total > 0 and done >= total
+            })
+        total_quantity = sum(item["total_quantity"] for item in items)
+        quantity_scanned = sum(item["quantity_scanned"] for item in items)
+        return {
+            "total_products": len(items),
+            "completed_products": sum(1 for item in items if item["completed"]),
+            "total_quantity": total_quantity,
+            "quantity_scanned": quantity_scanned,
+            "percent": round(quantity_scanned * 100 / total_quantity, 1) if total_quantity else 0.0,
+            "products": items
+        }
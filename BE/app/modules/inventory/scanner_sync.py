@@ -0,0 +1,303 @@
+"""
+Đồng bộ lô sự kiện quét ngoại tuyến từ máy quét cầm tay
+"""
+import logging
+from collections import defaultdict
+from itertools import groupby
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, values, column, func, text, cast
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache, INVENTORY_DASHBOARD, DASHBOARD_STATS, TRANSACTIONS_DASHBOARD
+from app.modules.inventory.models import ContainerInventory, Inventory, Location, ScannerSyncEvent
+from app.modules.inventory.scan_engine import ScanIngestionService, ScanTarget, IWTR_SCANS, OSR_SCANS, SCAN_PARAM_LIMIT
+from app.modules.inventory.service import WarehouseImportService
+from app.modules.inventory.stock_ledger import StockLedger, movement, MOVE
+
+logger = logging.getLogger(__name__)
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+IMPORT_CONFIRM_FIELDS = ("confirmed", "quantity_imported", "location_id", "scan_by")
+SCAN_FIELDS = ("inventory_identifier", "serial_pallet", "quantity_dispatched", "scan_time", "scan_by")
+
+# Events that change stock or scan progress shown on the dashboards
+DASHBOARD_EVENTS = {"iwtr_scan", "osr_scan", "location_move"}
+
+
+def _chunks(rows: list, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _result(sequence: int, status: str, reason: Optional[str] = None) -> dict:
+    return {"sequence": sequence, "status": status, "reason": reason, "replayed": False}
+
+
+class ScannerSyncService:
+    """
+    Apply a batch of events recorded offline by one scanner, in sequence order and in one
+    transaction.
+
+    Batches of the same device are serialised with a transaction-level advisory lock.
+    Sequences already recorded in scanner_sync_events are not applied again; their stored
+    result is returned with `replayed` set, so a scanner can resend a whole batch after a
+    lost response. Consecutive events of the same type are applied together through the
+    bulk paths (`_bulk_update_rows`, `ScanIngestionService`, UPDATE ... FROM (VALUES ...)).
+    An event that cannot be applied (unknown box, short stock, ...) is reported as rejected
+    and recorded, it does not fail the batch.
+    """
+
+    @staticmethod
+    async def sync(db: AsyncSession, device_id: str, events: List[dict]) -> dict:
+        events = sorted(events, key=lambda event: event["sequence"])
+        results: Dict[int, dict] = {}
+
+        async with db.begin():
+            await db.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                {"key": f"scanner-sync:{device_id}"}
+            )
+
+            replayed: Dict[int, dict] = {}
+            for chunk in _chunks([event["sequence"] for event in events], SCAN_PARAM_LIMIT):
+                result = await db.execute(
+                    select(ScannerSyncEvent.sequence, ScannerSyncEvent.status, ScannerSyncEvent.reason)
+                    .where(ScannerSyncEvent.device_id == device_id, ScannerSyncEvent.sequence.in_(chunk))
+                )
+                for sequence, status, reason in result.all():
+                    replayed[sequence] = {"sequence": sequence, "status": status, "reason": reason, "replayed": True}
+
+            pending = [event for event in events if event["sequence"] not in replayed]
+            for event_type, run in groupby(pending, key=lambda event: event["type"]):
+                run = list(run)
+                if event_type == "import_confirm":
+                    results.update(await ScannerSyncService._apply_import_confirms(db, run))
+                elif event_type == "iwtr_scan":
+                    results.update(await ScannerSyncService._apply_scans(db, IWTR_SCANS, run))
+                elif event_type == "osr_scan":
+                    results.update(await ScannerSyncService._apply_scans(db, OSR_SCANS, run))
+                elif event_type == "location_move":
+                    results.update(await ScannerSyncService._apply_location_moves(db, run))
+
+            rows = [
+                {
+                    "device_id": device_id,
+                    "sequence": event["sequence"],
+                    "event_type": event["type"],
+                    "status": results[event["sequence"]]["status"],
+                    "reason": (results[event["sequence"]]["reason"] or "")[:255] or None
+                }
+                for event in pending
+            ]
+            for chunk in _chunks(rows, SCAN_PARAM_LIMIT // len(ScannerSyncEvent.__table__.c)):
+                await db.execute(
+                    pg_insert(ScannerSyncEvent)
+                    .values(chunk)
+                    .on_conflict_do_nothing(constraint="uq_scanner_sync_events_device_sequence")
+                )
+
+            last_sequence = await db.scalar(
+                select(func.max(ScannerSyncEvent.sequence)).where(ScannerSyncEvent.device_id == device_id)
+            )
+
+        if any(
+            event["type"] in DASHBOARD_EVENTS and results[event["sequence"]]["status"] == APPLIED
+            for event in pending
+        ):
+            await cache.invalidate(INVENTORY_DASHBOARD, DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+
+        results.update(replayed)
+        ordered = [results[event["sequence"]] for event in events]
+        logger.info(
+            f"Scanner {device_id}: {len(pending)} events applied, {len(replayed)} replayed, last sequence {last_sequence}"
+        )
+        return {
+            "device_id": device_id,
+            "last_sequence": last_sequence,
+            "applied": sum(1 for item in ordered if item["status"] == APPLIED and not item["replayed"]),
+            "duplicates": sum(1 for item in ordered if item["status"] == DUPLICATE and not item["replayed"]),
+            "rejected": sum(1 for item in ordered if item["status"] == REJECTED and not item["replayed"]),
+            "replayed": len(replayed),
+            "results": ordered
+        }
+
+    @staticmethod
+    async def get_device_status(db: AsyncSession, device_id: str) -> dict:
+        """Last sequence applied for a device, so it knows where to resume"""
+        result = await db.execute(
+            select(func.max(ScannerSyncEvent.sequence), func.count(), func.max(ScannerSyncEvent.applied_at))
+            .where(ScannerSyncEvent.device_id == device_id)
+        )
+        last_sequence, total_events, last_synced_at = result.one()
+        return {
+            "device_id": device_id,
+            "last_sequence": last_sequence,
+            "total_events": total_events,
+            "last_synced_at": last_synced_at.isoformat() if last_synced_at else None
+        }
+
+    @staticmethod
+    async def _apply_import_confirms(db: AsyncSession, run: List[dict]) -> Dict[int, dict]:
+        ids = list({event["container_inventory_id"] for event in run})
+        existing = set()
+        for chunk in _chunks(ids, SCAN_PARAM_LIMIT):
+            result = await db.execute(select(ContainerInventory.id).where(ContainerInventory.id.in_(chunk)))
+            existing.update(result.scalars().all())
+
+        results = {}
+        updates = []
+        for event in run:
+            if event["container_inventory_id"] not in existing:
+                results[event["sequence"]] = _result(event["sequence"], REJECTED, "container_inventory_not_found")
+                continue
+            updates.append({
+                "id": event["container_inventory_id"],
+                **{field: event[field] for field in IMPORT_CONFIRM_FIELDS if event.get(field) is not None}
+            })
+            results[event["sequence"]] = _result(event["sequence"], APPLIED)
+
+        if updates:
+            updated = await WarehouseImportService._bulk_update_rows(
+                db,
+                ContainerInventory,
+                ["id"],
+                updates,
+                {field: field for field in IMPORT_CONFIRM_FIELDS},
+                "ContainerInventory"
+            )
+            await WarehouseImportService._publish_box_progress(db, updated)
+            await WarehouseImportService._stamp_confirmed_boxes(db, updated)
+        return results
+
+    @staticmethod
+    async def _apply_scans(db: AsyncSession, target: ScanTarget, run: List[dict]) -> Dict[int, dict]:
+        product_column = target.scan_product_column
+        product_model = target.product_model
+        request_column = getattr(product_model, target.product_request_column)
+
+        result = await db.execute(
+            select(product_model.id, request_column)
+            .where(request_column.in_({event["request_id"] for event in run}))
+        )
+        product_requests = dict(result.all())
+
+        results = {}
+        by_request: Dict[int, List[dict]] = defaultdict(list)
+        for event in run:
+            if product_requests.get(event[product_column]) != event["request_id"]:
+                results[event["sequence"]] = _result(event["sequence"], REJECTED, "product_not_in_request")
+            else:
+                by_request[event["request_id"]].append(event)
+
+        for req_id, scans in by_request.items():
+            details = [
+                {product_column: event[product_column], **{field: event.get(field) for field in SCAN_FIELDS}}
+                for event in scans
+            ]
+            try:
+                outcome = await ScanIngestionService.ingest_in_transaction(db, target, req_id, details)
+            except HTTPException as e:
+                for event in scans:
+                    results[event["sequence"]] = _result(event["sequence"], REJECTED, str(e.detail))
+                continue
+
+            duplicates = {id(detail) for detail in outcome["duplicates"]}
+            rejected = {
+                (detail[product_column], detail["inventory_identifier"]): detail["reason"]
+                for detail in outcome["rejected"]
+            }
+            for event, detail in zip(scans, details):
+                key = (detail[product_column], detail["inventory_identifier"])
+                if id(detail) in duplicates:
+                    results[event["sequence"]] = _result(event["sequence"], DUPLICATE)
+                elif key in rejected:
+                    results[event["sequence"]] = _result(event["sequence"], REJECTED, rejected[key])
+                else:
+                    results[event["sequence"]] = _result(event["sequence"], APPLIED)
+        return results
+
+    @staticmethod
+    async def _apply_location_moves(db: AsyncSession, run: List[dict]) -> Dict[int, dict]:
+        identifiers = list({event["inventory_identifier"] for event in run})
+        location_ids = list({event["location_id"] for event in run})
+
+        known_inventories = {}
+        for chunk in _chunks(identifiers, SCAN_PARAM_LIMIT):
+            result = await db.execute(
+                select(
+                    Inventory.id, Inventory.identifier, Inventory.sap_code,
+                    Inventory.location_id, Inventory.available_quantity
+                )
+                .where(Inventory.identifier.in_(chunk))
+                .order_by(Inventory.id)
+                .with_for_update()
+            )
+            known_inventories.update((box.identifier, box) for box in result.all())
+        result = await db.execute(select(Location.id).where(Location.id.in_(location_ids)))
+        known_locations = set(result.scalars().all())
+
+        results = {}
+        moves: Dict[str, List[dict]] = defaultdict(list)
+        for event in run:
+            if event["inventory_identifier"] not in known_inventories:
+                results[event["sequence"]] = _result(event["sequence"], REJECTED, "inventory_not_found")
+            elif event["location_id"] not in known_locations:
+                results[event["sequence"]] = _result(event["sequence"], REJECTED, "location_not_found")
+            else:
+                moves[event["inventory_identifier"]].append(event)
+                results[event["sequence"]] = _result(event["sequence"], APPLIED)
+
+        # A box moved several times in the run ends at its last location; the one before
+        # it becomes last_location_id, otherwise the current location does
+        rows = [
+            (
+                identifier,
+                box_moves[-1]["location_id"],
+                box_moves[-2]["location_id"] if len(box_moves) > 1 else None,
+                box_moves[-1].get("updated_by") or "system"
+            )
+            for identifier, box_moves in moves.items()
+        ]
+        inventories = Inventory.__table__.c
+        for chunk in _chunks(rows, SCAN_PARAM_LIMIT // 4):
+            source = values(
+                column("identifier", inventories.identifier.type),
+                column("location_id", inventories.location_id.type),
+                column("previous_location_id", inventories.last_location_id.type),
+                column("updated_by", inventories.updated_by.type),
+                name="moved"
+            ).data(chunk)
+            await db.execute(
+                update(Inventory)
+                .where(Inventory.identifier == source.c.identifier)
+                .values(
+                    last_location_id=func.coalesce(
+                        cast(source.c.previous_location_id, inventories.last_location_id.type),
+                        Inventory.location_id
+                    ),
+                    location_id=source.c.location_id,
+                    updated_by=source.c.updated_by,
+                    updated_date=func.now()
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        # Every move is a ledger entry, chained from the box's location before the run
+        ledger = []
+        for identifier, box_moves in moves.items():
+            box = known_inventories[identifier]
+            current_location_id = box.location_id
+            for event in box_moves:
+                ledger.append(movement(
+                    box, MOVE, box.available_quantity, box.available_quantity,
+                    current_location_id, event["location_id"], created_by=event.get("updated_by") or "system"
+                ))
+                current_location_id = event["location_id"]
+        await StockLedger.record(db, ledger)
+        return results
@@ -97,11 +97,31 @@ class AreaUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class AreaWarehouseCodeResponse(BaseModel):
+    """SAP warehouse code mapped to an area"""
+    id: int
+    whs_code: str
+    area_id: int
+    updated_by: Optional[str] = None
+    updated_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AreaWarehouseCodesUpdate(BaseModel):
+    """Full list of SAP warehouse codes (ToWhsCode / WhsCode) of an area"""
+    whs_codes: List[str]
+    updated_by: Optional[str] = None
+
+
 class AreaListMeta(BaseModel):
     """Metadata for paginated area list"""
     page: int
     size: int
     total_items: int
+    next_cursor: Optional[str] = None
+    count_mode: Optional[str] = None
 
 
 class AreaListResponse(BaseModel):
@@ -144,6 +164,8 @@ class LocationListMeta(BaseModel):
     page: int
     size: int
     total_items: int
+    next_cursor: Optional[str] = None
+    count_mode: Optional[str] = None
 
 
 class LocationListResponse(BaseModel):
@@ -681,9 +703,19 @@ class WMSImportRequest(BaseModel):
     general_info: WMSGeneralInfo
 
 
+class ImportRequirementBatchSearchRequest(BaseModel):
+    """Box ('B...') and pallet ('P...') codes scanned in one burst"""
+    codes: list[str]
+
+
 class WMSImportResponse(BaseModel):
      """Response schema for WMS warehouse import"""
      success: bool
+     warehouse_import_requirement_id: Optional[int] = None
+     total_pallets: Optional[int] = None
+     total_boxes: Optional[int] = None
+     elapsed_ms: Optional[float] = None
+     rows_per_second: Optional[float] = None
 
 
 class WarehouseNoteInfoApprovalCreate(BaseModel):
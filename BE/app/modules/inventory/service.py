@@ -1,3 +1,4 @@
+import logging
 from fastapi import  HTTPException, APIRouter
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,6 +7,7 @@ from sqlalchemy import select, func
 from datetime import datetime
 from app.modules.inventory.models import (
      Area,
+     AreaWarehouseCode,
      Location,
      Inventory,
      WarehouseImportRequirement,
@@ -20,7 +22,29 @@ from app.modules.inventory.models import (
      InventoriesInOSR,
      WarehouseNoteInfoApproval
 )
-from app.core.exceptions import NotFoundException, HTTPException
+from app.core.exceptions import NotFoundException, HTTPException, WarehouseException, ValidationException
+from app.core.config import settings
+from app.core.search import text_search_filter, code_search_filter
+from app.core.progress import publish_progress, progress_topic, IWTR, OSR, IMPORT
+from app.modules.inventory.stock_ledger import StockLedger, movement, RECEIPT
+from app.modules.inventory.import_origin import ImportOrigin
+from app.core.cache import (
+    cache,
+    cached,
+    MISSING,
+    AREAS,
+    LOCATIONS,
+    DASHBOARD_STATS,
+    INVENTORY_DASHBOARD,
+    TRANSACTIONS_DASHBOARD,
+    IMPORT_SEARCH,
+    CONTAINER_INVENTORIES
+)
+
+logger = logging.getLogger(__name__)
+
+# asyncpg accepts at most 32767 bind parameters per statement
+BULK_UPDATE_PARAM_LIMIT = 30000
 
 
 class InventoryService:
@@ -87,12 +111,21 @@ class InventoryService:
     async def bulk_create_inventories_async(db: AsyncSession, inventories_data: List[dict]) -> List[Inventory]:
         """Bulk create inventories from list of data dictionaries (async version)"""
         async with db.begin():
+            await ImportOrigin.stamp(db, inventories_data)
             inventories = [Inventory(**data) for data in inventories_data]
             db.add_all(inventories)
             await db.flush()
             for inventory in inventories:
                 await db.refresh(inventory)
-            return inventories
+            await StockLedger.record(db, [
+                movement(
+                    inventory, RECEIPT, 0, inventory.available_quantity, None, inventory.location_id,
+                    created_by=inventory.updated_by
+                )
+                for inventory in inventories
+            ])
+        await cache.invalidate(INVENTORY_DASHBOARD, DASHBOARD_STATS)
+        return inventories
 
     @staticmethod
     def delete_inventory(db: Session, inventory_id: int) -> bool:
@@ -103,10 +136,7 @@ class InventoryService:
             return True
 
     @staticmethod
-    async def get_inventory_dashboard(
-        db: AsyncSession,
-        page: int = 1,
-        size: int = 20,
+    def inventory_dashboard_query(
         name: Optional[str] = None,
         client_id: Optional[str] = None,
         serial_pallet: Optional[str] = None,
@@ -115,20 +145,21 @@ class InventoryService:
         location_id: Optional[int] = None,
         area_id: Optional[int] = None,
         status: Optional[str] = None,
-        updated_by: Optional[str] = None
-    ) -> dict:
-        """Get inventory dashboard with pagination and filters"""
-        from sqlalchemy import and_, or_, func, text
-        from sqlalchemy.orm import joinedload
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None
+    ):
+        """Filtered rows of the inventory dashboard, before ordering and paging (shared with the export)"""
+        from sqlalchemy import and_
+        from app.modules.inventory.group_summary import dashboard_filters
 
-        # Base query with joins
+        # client_id / PO are stamped on the box (app.modules.inventory.import_origin)
         query = select(
             Inventory.id,
             Inventory.name,
-            WarehouseImportRequirement.client_id,
+            Inventory.client_id,
             Inventory.serial_pallet,
             Inventory.identifier,
-            Inventory.po,
+            func.coalesce(Inventory.po, Inventory.po_number).label("po"),
             Inventory.available_quantity,
             Inventory.initial_quantity,
             Inventory.location_id,
@@ -144,57 +175,86 @@ class InventoryService:
             Location, Inventory.location_id == Location.id
         ).join(
             Area, Location.area_id == Area.id
-        ).outerjoin(
-            ContainerInventory, ContainerInventory.inventory_identifier == Inventory.identifier
-        ).outerjoin(
-            WarehouseImportContainer, WarehouseImportContainer.id == ContainerInventory.import_container_id
-        ).outerjoin(
-            WarehouseImportRequirement, WarehouseImportRequirement.id == WarehouseImportContainer.warehouse_import_requirement_id
         )
 
         # Apply filters
-        filters = []
-
-        if name:
-            filters.append(Inventory.name.ilike(f"%{name}%"))
-        if client_id:
-            filters.append(WarehouseImportRequirement.client_id == client_id)
-        if serial_pallet:
-            filters.append(Inventory.serial_pallet.ilike(f"%{serial_pallet}%"))
-        if identifier:
-            filters.append(Inventory.identifier.ilike(f"%{identifier}%"))
-        if po:
-            filters.append(Inventory.po.ilike(f"%{po}%"))
-        if location_id:
-            filters.append(Inventory.location_id == location_id)
-        if area_id:
-            filters.append(Area.id == area_id)
-        if status:
-            if status.lower() == "available":
-                filters.append(Inventory.available_quantity > 0)
-            elif status.lower() == "unavailable":
-                filters.append(Inventory.available_quantity == 0)
-            else:
-                filters.append(Inventory.calculated_status.ilike(f"%{status}%"))
-        if updated_by:
-            filters.append(Inventory.updated_by.ilike(f"%{updated_by}%"))
+        filters = dashboard_filters(
+            name=name,
+            client_id=client_id,
+            serial_pallet=serial_pallet,
+            identifier=identifier,
+            po=po,
+            location_id=location_id,
+            area_id=area_id,
+            status=status,
+            updated_by=updated_by,
+            code_match=code_match
+        )
 
         if filters:
             query = query.where(and_(*filters))
 
+        return query
+
+    @staticmethod
+    @cached(INVENTORY_DASHBOARD, ttl=settings.DASHBOARD_CACHE_SECONDS)
+    async def get_inventory_dashboard(
+        db: AsyncSession,
+        page: int = 1,
+        size: int = 20,
+        name: Optional[str] = None,
+        client_id: Optional[str] = None,
+        serial_pallet: Optional[str] = None,
+        identifier: Optional[str] = None,
+        po: Optional[str] = None,
+        location_id: Optional[int] = None,
+        area_id: Optional[int] = None,
+        status: Optional[str] = None,
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
+    ) -> dict:
+        """
+        Get inventory dashboard with pagination and filters
+
+        Pass `after` (the `next_cursor` of the previous page) for keyset pagination
+        on (updated_date, id) instead of OFFSET. `count_mode` picks how total_items
+        is computed (exact / estimated / cached, see app.core.pagination).
+        `code_match` (contains / prefix / exact, see app.core.search) sets how
+        serial_pallet, identifier and po match; the default is a substring match.
+        """
+        from app.core.pagination import count_total, keyset_after, split_page
+        from sqlalchemy import or_, text
+        from sqlalchemy.orm import joinedload
+
+        query = InventoryService.inventory_dashboard_query(
+            name=name,
+            client_id=client_id,
+            serial_pallet=serial_pallet,
+            identifier=identifier,
+            po=po,
+            location_id=location_id,
+            area_id=area_id,
+            status=status,
+            updated_by=updated_by,
+            code_match=code_match
+        )
+
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        count_result = await db.execute(count_query)
-        total_items = count_result.scalar() or 0
+        total_items, count_mode = await count_total(db, query, count_mode, INVENTORY_DASHBOARD)
 
         # Apply pagination
-        query = query.order_by(Inventory.updated_date.desc())
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size)
+        query = query.order_by(Inventory.updated_date.desc().nulls_first(), Inventory.id.desc())
+        if after:
+            query = query.where(keyset_after(Inventory.updated_date, Inventory.id, after))
+        else:
+            query = query.offset((page - 1) * size)
+        query = query.limit(size + 1)
 
         # Execute query
         result = await db.execute(query)
-        rows = result.all()
+        rows, next_cursor = split_page(result.all(), size, lambda row: [row.updated_date, row.id])
 
         # Convert to dict format
         data = []
@@ -225,11 +285,14 @@ class InventoryService:
                 "page": page,
                 "size": size,
                 "total_items": total_items,
-                "total_pages": total_pages
+                "total_pages": total_pages,
+                "next_cursor": next_cursor,
+                "count_mode": count_mode
             }
         }
 
     @staticmethod
+    @cached(INVENTORY_DASHBOARD, ttl=settings.DASHBOARD_CACHE_SECONDS)
     async def get_inventory_dashboard_grouped(
         db: AsyncSession,
         group_by: str = None,
@@ -243,168 +306,40 @@ class InventoryService:
         location_id: Optional[int] = None,
         area_id: Optional[int] = None,
         status: Optional[str] = None,
-        updated_by: Optional[str] = None
+        updated_by: Optional[str] = None,
+        code_match: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None
     ) -> dict:
-        from sqlalchemy import and_, or_, func, text, distinct
-
-        base_query = select(
-            Inventory.id,
-            Inventory.name,
-            WarehouseImportRequirement.po_number.label("po_number"),
-            WarehouseImportRequirement.client_id,
-            Inventory.serial_pallet,
-            Inventory.identifier,
-            Inventory.po,
-            Inventory.available_quantity,
-            Inventory.initial_quantity,
-            Inventory.location_id,
-            Area.code.label("area_code"),
-            Area.name.label("area_name"),
-            Inventory.calculated_status.label("status"),
-            Inventory.updated_by,
-            Inventory.received_date,
-            Inventory.updated_date
-        ).select_from(
-            Inventory
-        ).join(
-            Location, Inventory.location_id == Location.id
-        ).join(
-            Area, Location.area_id == Area.id
-        ).outerjoin(
-            ContainerInventory, ContainerInventory.inventory_identifier == Inventory.identifier
-        ).outerjoin(
-            WarehouseImportContainer, WarehouseImportContainer.id == ContainerInventory.import_container_id
-        ).outerjoin(
-            WarehouseImportRequirement, WarehouseImportRequirement.id == WarehouseImportContainer.warehouse_import_requirement_id
+        """
+        Inventory groups by area / po / client / sap_code, sorted and paginated.
+        Without row filters the groups come from inventory_group_summaries (see group_summary).
+        """
+        from app.modules.inventory.group_summary import InventoryGroupSummaryService, dashboard_filters
+
+        filters = dashboard_filters(
+            name=name,
+            client_id=client_id,
+            serial_pallet=serial_pallet,
+            identifier=identifier,
+            po=po,
+            location_id=location_id,
+            area_id=area_id,
+            status=status,
+            updated_by=updated_by,
+            code_match=code_match
+        )
+        return await InventoryGroupSummaryService.get_groups(
+            db,
+            group_by,
+            filters,
+            page=page,
+            size=size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            count_mode=count_mode
         )
-
-        # Apply filters
-        filters = []
-
-        if name:
-            filters.append(Inventory.name.ilike(f"%{name}%"))
-        if client_id:
-            filters.append(WarehouseImportRequirement.client_id == client_id)
-        if serial_pallet:
-            filters.append(Inventory.serial_pallet.ilike(f"%{serial_pallet}%"))
-        if identifier:
-            filters.append(Inventory.identifier.ilike(f"%{identifier}%"))
-        if po:
-            filters.append(Inventory.po.ilike(f"%{po}%"))
-        if location_id:
-            filters.append(Inventory.location_id == location_id)
-        if area_id:
-            filters.append(Area.id == area_id)
-        if status:
-            if status.lower() == "available":
-                filters.append(Inventory.available_quantity > 0)
-            elif status.lower() == "unavailable":
-                filters.append(Inventory.available_quantity == 0)
-            else:
-                filters.append(Inventory.calculated_status.ilike(f"%{status}%"))
-        if updated_by:
-            filters.append(Inventory.updated_by.ilike(f"%{updated_by}%"))
-
-        if filters:
-            base_query = base_query.where(and_(*filters))
-
-        if group_by == "area":
-            group_column = Area.code
-            group_name_column = Area.name
-            group_key = "area_code"
-        elif group_by == "po":
-            group_column = Inventory.po
-            group_name_column = Inventory.po
-            group_key = "po"
-        elif group_by == "client":
-            group_column = WarehouseImportRequirement.client_id
-            group_name_column = WarehouseImportRequirement.client_id
-            group_key = "client_id"
-        elif group_by == "sap_code":
-            group_column = Inventory.sap_code
-            group_name_column = Inventory.name  # Use name as display name for sap_code groups
-            group_key = "sap_code"
-        else:
-            # Default to area
-            group_column = Area.code
-            group_name_column = Area.name
-            group_key = "area_code"
-
-        base_subquery = base_query.subquery()
-            
-        # Khai báo các cột thống kê mới
-        total_clients = func.count(distinct(base_subquery.c.client_id)).label("total_clients")
-        total_pos = func.count(distinct(base_subquery.c.po)).label("total_pos")
-        total_locations = func.count(distinct(base_subquery.c.location_id)).label("total_locations")
-        total_pallets = func.count(distinct(base_subquery.c.serial_pallet)).label("total_pallets")
-        total_containers = func.count(distinct(base_subquery.c.identifier)).label("total_containers") # coi identifier là thùng/mã duy nhất
-        
-        # Lấy thông tin ngày cập nhật/nhập mới nhất/lớn nhất trong nhóm
-        last_updated = func.max(base_subquery.c.updated_date).label("last_updated")
-        last_received = func.max(base_subquery.c.received_date).label("last_received")
-
-        grouped_query = select(
-                group_column.label("group_value"),
-                func.sum(base_subquery.c.available_quantity).label("total_available_quantity"),
-                func.sum(base_subquery.c.initial_quantity).label("total_initial_quantity"),
-                func.count(base_subquery.c.id).label("item_count"), # Số dòng tồn kho chi tiết
-                
-                # Thống kê mới
-                total_clients,
-                total_pos,
-                total_locations,
-                total_pallets,
-                total_containers,
-                last_updated,
-                last_received,
-                
-            ).select_from(
-                base_subquery
-            ).group_by(
-                group_column
-            ).having(
-                func.sum(base_subquery.c.available_quantity) > 0 # Chỉ lấy nhóm có tồn kho > 0
-            )
-
-        count_query = select(func.count()).select_from(grouped_query.subquery())
-        count_result = await db.execute(count_query)
-        total_items = count_result.scalar() or 0
-
-        grouped_query = grouped_query.order_by(func.sum(base_subquery.c.available_quantity).desc())
-
-        result = await db.execute(grouped_query)
-        rows = result.all()
-
-        data = []
-        for row in rows:
-            data.append({
-                "group_key": group_key,
-                "group_value": str(row.group_value) if row.group_value is not None else "Unknown",
-                "total_available_quantity": row.total_available_quantity or 0,
-                "total_initial_quantity": row.total_initial_quantity or 0,
-                "item_count": row.item_count or 0,
-                
-                # Thêm các trường thống kê mới
-                "total_clients": row.total_clients or 0, # Tổng k.hàng (mã khách hàng duy nhất)
-                "total_pos": row.total_pos or 0, # Số PO (PO duy nhất)
-                "total_pallets": row.total_pallets or 0, # Số pallet (serial_pallet duy nhất)
-                "total_containers": row.total_containers or 0, # Số thùng (identifier duy nhất)
-                "total_locations": row.total_locations or 0, # Số vị trí (location_id duy nhất)
-                "last_updated": row.last_updated.isoformat() if row.last_updated else None, # Ngày cập nhật
-                "last_received": row.last_received.isoformat() if row.last_received else None, # Ngày nhập gần nhất
-            })
-
-        total_pages = (total_items + size - 1) // size if total_items > 0 else 1
-
-        return {
-            "data": data,
-            "meta": {
-                "page": page,
-                "size": size,
-                "total_items": total_items,
-                "total_pages": total_pages
-            }
-        }
     @staticmethod
     async def get_inventories_paginated(
         db: AsyncSession,
@@ -418,27 +353,35 @@ class InventoryService:
         vendor: Optional[str] = None,
         location_id: Optional[int] = None,
         available_quantity_gt: Optional[int] = None,
-        available_quantity_lt: Optional[int] = None
+        available_quantity_lt: Optional[int] = None,
+        code_match: Optional[str] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
     ) -> dict:
-        """Get inventories with pagination and filtering"""
-        from sqlalchemy import and_, or_, func
+        """
+        Get inventories with pagination and filtering (keyset pagination when `after` is given,
+        total_items computed according to `count_mode`, identifier / sap_code / po / lot
+        matched according to `code_match`)
+        """
+        from app.core.pagination import count_total, keyset_after, split_page
+        from sqlalchemy import and_, or_
 
         query = select(Inventory)
 
         # Apply filters
         filters = []
         if name:
-            filters.append(Inventory.name.ilike(f"%{name}%"))
+            filters.append(text_search_filter(Inventory.name, name))
         if identifier:
-            filters.append(Inventory.identifier.ilike(f"%{identifier}%"))
+            filters.append(code_search_filter(Inventory.identifier, identifier, code_match))
         if sap_code:
-            filters.append(Inventory.sap_code.ilike(f"%{sap_code}%"))
+            filters.append(code_search_filter(Inventory.sap_code, sap_code, code_match))
         if po:
-            filters.append(Inventory.po.ilike(f"%{po}%"))
+            filters.append(code_search_filter(Inventory.po, po, code_match))
         if lot:
-            filters.append(Inventory.lot.ilike(f"%{lot}%"))
+            filters.append(code_search_filter(Inventory.lot, lot, code_match))
         if vendor:
-            filters.append(Inventory.vendor.ilike(f"%{vendor}%"))
+            filters.append(text_search_filter(Inventory.vendor, vendor))
         if location_id:
             filters.append(Inventory.location_id == location_id)
         if available_quantity_gt is not None:
@@ -450,18 +393,19 @@ class InventoryService:
             query = query.where(and_(*filters))
 
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        count_result = await db.execute(count_query)
-        total_items = count_result.scalar() or 0
+        total_items, count_mode = await count_total(db, query, count_mode, INVENTORY_DASHBOARD)
 
         # Apply pagination
-        query = query.order_by(Inventory.updated_date.desc())
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size)
+        query = query.order_by(Inventory.updated_date.desc().nulls_first(), Inventory.id.desc())
+        if after:
+            query = query.where(keyset_after(Inventory.updated_date, Inventory.id, after))
+        else:
+            query = query.offset((page - 1) * size)
+        query = query.limit(size + 1)
 
         # Execute query
         result = await db.execute(query)
-        inventories = result.scalars().all()
+        inventories, next_cursor = split_page(result.scalars().all(), size, lambda inv: [inv.updated_date, inv.id])
 
         # Convert to dict format
         data = []
@@ -500,7 +444,9 @@ class InventoryService:
                 "page": page,
                 "size": size,
                 "total_items": total_items,
-                "total_pages": total_pages
+                "total_pages": total_pages,
+                "next_cursor": next_cursor,
+                "count_mode": count_mode
             }
         }
 
@@ -555,6 +501,7 @@ class AreaService:
         return [{"id": area.id, "code": area.code, "name": area.name, "thu_kho": area.thu_kho, "description": area.description, "address": area.address, "is_active": area.is_active} for area in rows]
 
     @staticmethod
+    @cached(AREAS)
     async def get_areas_paginated(
         db: AsyncSession,
         page: int = 1,
@@ -564,17 +511,20 @@ class AreaService:
         thu_kho: Optional[str] = None,
         description: Optional[str] = None,
         address: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
     ) -> dict:
         from sqlalchemy import and_
+        from app.core.pagination import count_total, keyset_after, split_page
     
 
         query = select(Area)
         
         # Apply filters
         filters = []
-        if is_active:
-            filters.append(Area.is_activeilike(f"%{is_active}%"))
+        if is_active is not None:
+            filters.append(Area.is_active == is_active)
         if code:
             filters.append(Area.code.ilike(f"%{code}%"))
         if name:
@@ -590,18 +540,17 @@ class AreaService:
             query = query.where(and_(*filters))
         
         # Get total count
-        count_query = select(func.count()).select_from(Area)
-        if filters:
-            count_query = count_query.where(and_(*filters))
-        count_result = await db.execute(count_query)
-        total_items = count_result.scalar() or 0
+        total_items, count_mode = await count_total(db, query, count_mode, AREAS)
         
-        query = query.order_by(Area.updated_date.desc())
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size)
+        query = query.order_by(Area.updated_date.desc().nulls_first(), Area.id.desc())
+        if after:
+            query = query.where(keyset_after(Area.updated_date, Area.id, after))
+        else:
+            query = query.offset((page - 1) * size)
+        query = query.limit(size + 1)
         
         result = await db.execute(query)
-        areas = result.scalars().all()
+        areas, next_cursor = split_page(result.scalars().all(), size, lambda area: [area.updated_date, area.id])
         
         data = [
             {
@@ -621,7 +570,9 @@ class AreaService:
             "meta": {
                 "page": page,
                 "size": size,
-                "total_items": total_items
+                "total_items": total_items,
+                "next_cursor": next_cursor,
+                "count_mode": count_mode
             }
         }
 
@@ -648,6 +599,7 @@ class AreaService:
         area.is_active = is_active
         await db.commit()
         await db.refresh(area)
+        await cache.invalidate(AREAS, INVENTORY_DASHBOARD)
         return area
 
     @staticmethod
@@ -659,7 +611,8 @@ class AreaService:
                     setattr(area, key, value)
             await db.flush()
             await db.refresh(area)
-            return area
+        await cache.invalidate(AREAS, INVENTORY_DASHBOARD)
+        return area
 
     # @staticmethod
     # def update_location_status(db: Session, location_id: int, is_active: bool) -> Location:
@@ -677,7 +630,65 @@ class AreaService:
             await db.flush()
             for area in areas:
                 await db.refresh(area)
-            return areas
+        await cache.invalidate(AREAS, DASHBOARD_STATS)
+        return areas
+
+    @staticmethod
+    async def get_warehouse_codes(db: AsyncSession, area_id: Optional[int] = None) -> List[AreaWarehouseCode]:
+        query = select(AreaWarehouseCode).order_by(AreaWarehouseCode.area_id, AreaWarehouseCode.whs_code)
+        if area_id is not None:
+            await AreaService.get_area_by_id(db, area_id)
+            query = query.where(AreaWarehouseCode.area_id == area_id)
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    @staticmethod
+    async def set_area_warehouse_codes(
+        db: AsyncSession,
+        area_id: int,
+        whs_codes: List[str],
+        updated_by: Optional[str] = None
+    ) -> List[AreaWarehouseCode]:
+        """Thay toàn bộ mã kho SAP của một kho; mã đã gán cho kho khác thì báo lỗi 409"""
+        from app.modules.inventory.warehouse_codes import warehouse_codes, normalize_whs_code
+
+        codes = list(dict.fromkeys(filter(None, (normalize_whs_code(code) for code in whs_codes))))
+        async with db.begin():
+            await AreaService.get_area_by_id(db, area_id)
+
+            if codes:
+                result = await db.execute(
+                    select(AreaWarehouseCode.whs_code, AreaWarehouseCode.area_id).where(
+                        AreaWarehouseCode.whs_code.in_(codes),
+                        AreaWarehouseCode.area_id != area_id
+                    )
+                )
+                taken = result.all()
+                if taken:
+                    raise WarehouseException(
+                        f"Mã kho SAP đã gán cho kho khác: {', '.join(f'{code} (kho {owner})' for code, owner in taken)}",
+                        status_code=409
+                    )
+
+            result = await db.execute(select(AreaWarehouseCode).where(AreaWarehouseCode.area_id == area_id))
+            existing = {row.whs_code: row for row in result.scalars().all()}
+            for whs_code, row in existing.items():
+                if whs_code not in codes:
+                    await db.delete(row)
+            db.add_all([
+                AreaWarehouseCode(whs_code=code, area_id=area_id, updated_by=updated_by)
+                for code in codes if code not in existing
+            ])
+            await db.flush()
+
+            result = await db.execute(
+                select(AreaWarehouseCode)
+                .where(AreaWarehouseCode.area_id == area_id)
+                .order_by(AreaWarehouseCode.whs_code)
+            )
+            mapped = result.scalars().all()
+        await warehouse_codes.invalidate()
+        return mapped
 class LocationService:
 
     @staticmethod
@@ -702,6 +713,7 @@ class LocationService:
         return location
 
     @staticmethod
+    @cached(LOCATIONS)
     async def get_minimal_locations(db: AsyncSession) -> List[dict]:
         result = await db.execute(select(Location.id, Location.code, Location.name))
         return [{"id": loc.id, "code": loc.code} for loc in result]
@@ -745,7 +757,6 @@ class LocationService:
                 db.add(location)
                 await db.flush()
                 await db.refresh(location)
-                return location
         except Exception as e:
             # Ensure we always provide a meaningful error message
             if isinstance(e, HTTPException):
@@ -753,6 +764,8 @@ class LocationService:
             else:
                 error_msg = str(e) if str(e).strip() else f"Database error while creating location"
                 raise HTTPException(status_code=400, detail=error_msg)
+        await cache.invalidate(LOCATIONS, DASHBOARD_STATS)
+        return location
 
     @staticmethod
     async def update_location(db: AsyncSession, location_id: int, location_data: dict) -> Location:
@@ -767,7 +780,8 @@ class LocationService:
             
             await db.flush()
             await db.refresh(location)
-            return location
+        await cache.invalidate(LOCATIONS, INVENTORY_DASHBOARD)
+        return location
 
     @staticmethod
     def update_location_status(db: Session, location_id: int, is_active: bool) -> Location:
@@ -783,6 +797,7 @@ class LocationService:
         location.is_active = is_active
         await db.commit()
         await db.refresh(location)
+        await cache.invalidate(LOCATIONS)
         return location
 
     
@@ -812,7 +827,8 @@ class LocationService:
                 await db.delete(sub_loc)
 
             await db.commit()
-            return deleted_count
+        await cache.invalidate(LOCATIONS, DASHBOARD_STATS)
+        return deleted_count
 
     @staticmethod
     def bulk_create_locations(db: Session, locations_data: List[dict]) -> List[Location]:
@@ -834,10 +850,13 @@ class LocationService:
         address: Optional[str] = None,
         description: Optional[str] = None,
         is_active: Optional[bool] = None,
-        parent_location_id: Optional[int] = None
+        parent_location_id: Optional[int] = None,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
     ) -> dict:
 
         from sqlalchemy import and_
+        from app.core.pagination import count_total, keyset_after, split_page
 
         query = select(Location)
 
@@ -866,16 +885,17 @@ class LocationService:
             query = query.where(and_(*filters))
 
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        count_result = await db.execute(count_query)
-        total_items = count_result.scalar() or 0
+        total_items, count_mode = await count_total(db, query, count_mode, LOCATIONS)
 
-        query = query.order_by(Location.updated_date.desc())
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size)
+        query = query.order_by(Location.updated_date.desc().nulls_first(), Location.id.desc())
+        if after:
+            query = query.where(keyset_after(Location.updated_date, Location.id, after))
+        else:
+            query = query.offset((page - 1) * size)
+        query = query.limit(size + 1)
 
         result = await db.execute(query)
-        locations = result.scalars().all()
+        locations, next_cursor = split_page(result.scalars().all(), size, lambda loc: [loc.updated_date, loc.id])
 
         data = [
             {
@@ -908,7 +928,9 @@ class LocationService:
             "meta": {
                 "page": page,
                 "size": size,
-                "total_items": total_items
+                "total_items": total_items,
+                "next_cursor": next_cursor,
+                "count_mode": count_mode
             }
         }
 
@@ -987,10 +1009,11 @@ class WarehouseImportService:
             for container in containers:
                 await db.refresh(container)
             
-            return {
-                'import_requirement': warehouse_import,
-                'containers': containers
-            }
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return {
+            'import_requirement': warehouse_import,
+            'containers': containers
+        }
 
     @staticmethod
     async def get_import_requirements(db: AsyncSession) -> List[dict]:
@@ -1029,130 +1052,157 @@ class WarehouseImportService:
         ]
 
     @staticmethod
-    async def search_warehouse_import_requirement_by_query(db: AsyncSession, search_query: str) -> dict:
+    def _import_requirement_to_dict(warehouse_import_req: WarehouseImportRequirement) -> dict:
+        return {
+            "id": warehouse_import_req.id,
+            "po_number": warehouse_import_req.po_number,
+            "client_id": warehouse_import_req.client_id,
+            "inventory_code": warehouse_import_req.inventory_code,
+            "inventory_name": warehouse_import_req.inventory_name,
+            "number_of_pallet": warehouse_import_req.number_of_pallet,
+            "number_of_box": warehouse_import_req.number_of_box,
+            "box_scan_progress": warehouse_import_req.box_scan_progress,
+            "quantity": warehouse_import_req.quantity,
+            "wo_code": warehouse_import_req.wo_code,
+            "lot_number": warehouse_import_req.lot_number,
+            "production_date": warehouse_import_req.production_date,
+            "branch": warehouse_import_req.branch,
+            "production_team": warehouse_import_req.production_team,
+            "production_decision_number": warehouse_import_req.production_decision_number,
+            "item_no_sku": warehouse_import_req.item_no_sku,
+            "status": warehouse_import_req.status,
+            "approver": warehouse_import_req.approver,
+            "note": warehouse_import_req.note,
+            "destination_warehouse": warehouse_import_req.destination_warehouse,
+            "pallet_note_creation_session_id": warehouse_import_req.pallet_note_creation_session_id,
+            "created_by": warehouse_import_req.created_by,
+            "updated_by": warehouse_import_req.updated_by,
+            "updated_date": warehouse_import_req.updated_date,
+            "deleted_at": warehouse_import_req.deleted_at,
+            "deleted_by": warehouse_import_req.deleted_by,
+        }
 
-        from sqlalchemy import select
-        
-        if not search_query:
-            raise HTTPException(status_code=400)
-        
-        warehouse_import_requirements = []
+    @staticmethod
+    async def _lookup_import_requirements_by_codes(db: AsyncSession, codes: List[str]) -> dict:
+        """
+        Resolve box codes ('B...') and pallet codes ('P...') to their import requirements.
 
-        if search_query.startswith('B'):
+        One outer-joined query per code kind. Returns {code: list}, where a code that
+        matches no box/pallet is absent and a box/pallet without requirement maps to [].
+        """
+        box_codes = [code for code in codes if code.startswith('B')]
+        pallet_codes = [code for code in codes if code.startswith('P')]
+        found = {}
 
+        if box_codes:
             result = await db.execute(
-                select(ContainerInventory).where(
-                    ContainerInventory.inventory_identifier == search_query
+                select(ContainerInventory.inventory_identifier, WarehouseImportRequirement)
+                .select_from(ContainerInventory)
+                .outerjoin(ImportPalletInfo, ImportPalletInfo.id == ContainerInventory.import_pallet_id)
+                .outerjoin(
+                    WarehouseImportRequirement,
+                    WarehouseImportRequirement.id == ImportPalletInfo.warehouse_import_requirement_id
                 )
+                .where(ContainerInventory.inventory_identifier.in_(box_codes))
+                .order_by(ContainerInventory.id)
             )
-            container_inventories = result.scalars().all()
-            
-            if not container_inventories:
-                raise HTTPException(status_code=404, detail=f"No container inventory found with inventory_identifier: {search_query}")
+            for code, warehouse_import_req in result.all():
+                requirements = found.setdefault(code, [])
+                if warehouse_import_req is not None:
+                    requirements.append(WarehouseImportService._import_requirement_to_dict(warehouse_import_req))
 
-            for container_inventory in container_inventories:
-                result = await db.execute(
-                    select(ImportPalletInfo).where(
-                        ImportPalletInfo.id == container_inventory.import_pallet_id
-                    )
-                )
-                import_pallet = result.scalar_one_or_none()
-                
-                if import_pallet:
-                    result = await db.execute(
-                        select(WarehouseImportRequirement).where(
-                            WarehouseImportRequirement.id == import_pallet.warehouse_import_requirement_id
-                        )
-                    )
-                    warehouse_import_req = result.scalar_one_or_none()
-                    
-                    if warehouse_import_req:
-                        warehouse_import_requirements.append({
-                            "id": warehouse_import_req.id,
-                            "po_number": warehouse_import_req.po_number,
-                            "client_id": warehouse_import_req.client_id,
-                            "inventory_code": warehouse_import_req.inventory_code,
-                            "inventory_name": warehouse_import_req.inventory_name,
-                            "number_of_pallet": warehouse_import_req.number_of_pallet,
-                            "number_of_box": warehouse_import_req.number_of_box,
-                            "box_scan_progress": warehouse_import_req.box_scan_progress,
-                            "quantity": warehouse_import_req.quantity,
-                            "wo_code": warehouse_import_req.wo_code,
-                            "lot_number": warehouse_import_req.lot_number,
-                            "production_date": warehouse_import_req.production_date,
-                            "branch": warehouse_import_req.branch,
-                            "production_team": warehouse_import_req.production_team,
-                            "production_decision_number": warehouse_import_req.production_decision_number,
-                            "item_no_sku": warehouse_import_req.item_no_sku,
-                            "status": warehouse_import_req.status,
-                            "approver": warehouse_import_req.approver,
-                            "note": warehouse_import_req.note,
-                            "destination_warehouse": warehouse_import_req.destination_warehouse,
-                            "pallet_note_creation_session_id": warehouse_import_req.pallet_note_creation_session_id,
-                            "created_by": warehouse_import_req.created_by,
-                            "updated_by": warehouse_import_req.updated_by,
-                            "updated_date": warehouse_import_req.updated_date,
-                            "deleted_at": warehouse_import_req.deleted_at,
-                            "deleted_by": warehouse_import_req.deleted_by,
-                        })
-        
-        elif search_query.startswith('P'):
+        if pallet_codes:
             result = await db.execute(
-                select(ImportPalletInfo).where(
-                    ImportPalletInfo.serial_pallet == search_query
+                select(ImportPalletInfo.serial_pallet, WarehouseImportRequirement)
+                .select_from(ImportPalletInfo)
+                .outerjoin(
+                    WarehouseImportRequirement,
+                    WarehouseImportRequirement.id == ImportPalletInfo.warehouse_import_requirement_id
                 )
+                .where(ImportPalletInfo.serial_pallet.in_(pallet_codes))
+                .order_by(ImportPalletInfo.id)
             )
-            import_pallets = result.scalars().all()
-            
-            if not import_pallets:
-                raise HTTPException(status_code=404, detail=f"No import pallet found with serial_pallet: {search_query}")
-            
-            for import_pallet in import_pallets:
-                result = await db.execute(
-                    select(WarehouseImportRequirement).where(
-                        WarehouseImportRequirement.id == import_pallet.warehouse_import_requirement_id
-                    )
-                )
-                warehouse_import_req = result.scalar_one_or_none()
-                
-                if warehouse_import_req:
-                    warehouse_import_requirements.append({
-                        "id": warehouse_import_req.id,
-                        "po_number": warehouse_import_req.po_number,
-                        "client_id": warehouse_import_req.client_id,
-                        "inventory_code": warehouse_import_req.inventory_code,
-                        "inventory_name": warehouse_import_req.inventory_name,
-                        "number_of_pallet": warehouse_import_req.number_of_pallet,
-                        "number_of_box": warehouse_import_req.number_of_box,
-                        "box_scan_progress": warehouse_import_req.box_scan_progress,
-                        "quantity": warehouse_import_req.quantity,
-                        "wo_code": warehouse_import_req.wo_code,
-                        "lot_number": warehouse_import_req.lot_number,
-                        "production_date": warehouse_import_req.production_date,
-                        "branch": warehouse_import_req.branch,
-                        "production_team": warehouse_import_req.production_team,
-                        "production_decision_number": warehouse_import_req.production_decision_number,
-                        "item_no_sku": warehouse_import_req.item_no_sku,
-                        "status": warehouse_import_req.status,
-                        "approver": warehouse_import_req.approver,
-                        "note": warehouse_import_req.note,
-                        "destination_warehouse": warehouse_import_req.destination_warehouse,
-                        "pallet_note_creation_session_id": warehouse_import_req.pallet_note_creation_session_id,
-                        "created_by": warehouse_import_req.created_by,
-                        "updated_by": warehouse_import_req.updated_by,
-                        "updated_date": warehouse_import_req.updated_date,
-                        "deleted_at": warehouse_import_req.deleted_at,
-                        "deleted_by": warehouse_import_req.deleted_by,
-                    })
-        else:
+            for code, warehouse_import_req in result.all():
+                requirements = found.setdefault(code, [])
+                if warehouse_import_req is not None:
+                    requirements.append(WarehouseImportService._import_requirement_to_dict(warehouse_import_req))
+
+        return found
+
+    @staticmethod
+    async def search_warehouse_import_requirements_by_codes(db: AsyncSession, codes: List[str]) -> dict:
+        """
+        Look up a batch of scanned box/pallet codes in one call.
+
+        Results are served from a per-barcode cache (SCAN_LOOKUP_CACHE_SECONDS) when
+        possible; the remaining codes are resolved with _lookup_import_requirements_by_codes.
+        Each code gets a status: found, not_found, no_requirement or invalid.
+        """
+        codes = list(dict.fromkeys(code for code in codes if code))
+        valid_codes = [code for code in codes if code.startswith(('B', 'P'))]
+
+        keys = {code: cache.make_key(IMPORT_SEARCH, code) for code in valid_codes}
+        cached_values = await cache.get_many([keys[code] for code in valid_codes])
+        requirements_by_code = {
+            code: value for code, value in zip(valid_codes, cached_values) if value is not MISSING
+        }
+
+        misses = [code for code in valid_codes if code not in requirements_by_code]
+        if misses:
+            found = await WarehouseImportService._lookup_import_requirements_by_codes(db, misses)
+            requirements_by_code.update(found)
+            # Only codes that resolved to a requirement are cached, so new imports show up at once
+            await cache.set_many(
+                {keys[code]: value for code, value in found.items() if value},
+                ttl=settings.SCAN_LOOKUP_CACHE_SECONDS
+            )
+
+        results = []
+        for code in codes:
+            requirements = requirements_by_code.get(code)
+            if code not in keys:
+                status = "invalid"
+            elif requirements is None:
+                status = "not_found"
+            elif not requirements:
+                status = "no_requirement"
+            else:
+                status = "found"
+            results.append({
+                "code": code,
+                "status": status,
+                "warehouse_import_requirements": requirements or [],
+                "count": len(requirements or [])
+            })
+
+        return {
+            "results": results,
+            "count": len(results)
+        }
+
+    @staticmethod
+    async def search_warehouse_import_requirement_by_query(db: AsyncSession, search_query: str) -> dict:
+
+        if not search_query:
+            raise HTTPException(status_code=400)
+
+        if not search_query.startswith(('B', 'P')):
             raise HTTPException(status_code=400, detail="Mã thùng phải bắt đầu bằng 'B', mã pallet bắt đầu bằng 'P'")
-        
-        if not warehouse_import_requirements:
+
+        result = await WarehouseImportService.search_warehouse_import_requirements_by_codes(db, [search_query])
+        lookup = result["results"][0]
+
+        if lookup["status"] == "not_found":
+            if search_query.startswith('B'):
+                raise HTTPException(status_code=404, detail=f"No container inventory found with inventory_identifier: {search_query}")
+            raise HTTPException(status_code=404, detail=f"No import pallet found with serial_pallet: {search_query}")
+
+        if lookup["status"] == "no_requirement":
             raise HTTPException(status_code=404, detail=f"Mã thùng/pallet chưa được tạo đơn nhập kho: {search_query}")
-        
+
         return {
-            "warehouse_import_requirements": warehouse_import_requirements,
-            "count": len(warehouse_import_requirements)
+            "warehouse_import_requirements": lookup["warehouse_import_requirements"],
+            "count": lookup["count"]
         }
 
     @staticmethod
@@ -1164,58 +1214,8 @@ class WarehouseImportService:
         return req
 
     @staticmethod
-    async def get_wms_import_requirement_by_id(db: AsyncSession, req_id: int) -> dict:
-        req = await WarehouseImportService.get_import_requirement_by_id(db, req_id)
-
-        from app.modules.inventory.models import ImportPalletInfo, ContainerInventory
-        pallets_result = await db.execute(
-            select(ImportPalletInfo).where(ImportPalletInfo.warehouse_import_requirement_id == req_id)
-        )
-        pallets = pallets_result.scalars().all()
-
-        list_pallet = []
-        for pallet in pallets:
-            boxes_result = await db.execute(
-                select(ContainerInventory).where(ContainerInventory.import_pallet_id == pallet.id)
-            )
-            boxes = boxes_result.scalars().all()
-
-            list_box = [
-                {
-                    "id": box.id,
-                    "box_code": box.inventory_identifier,
-                    "quantity": box.quantity_imported,
-                    "note": box.comments,
-                    "import_pallet_id": box.import_pallet_id,
-                    "confirmed": box.confirmed,
-                    "scan_by": box.scan_by,
-                    "time_checked": box.time_checked,
-                    "list_serial_items": box.list_serial_items
-                }
-                for box in boxes
-            ]
-
-            pallet_info = {
-                "id": pallet.id,
-                "serial_pallet": pallet.serial_pallet,
-                "quantity_per_box": pallet.quantity_per_box,
-                "num_box_per_pallet": pallet.num_box_per_pallet,
-                "total_quantity": pallet.total_quantity,
-                "po_number": pallet.po_number,
-                "customer_name": pallet.customer_name,
-                "production_decision_number": pallet.qdsx_no,
-                "item_no_sku": pallet.item_no_sku,
-                "date_code": pallet.date_code,
-                "production_date": pallet.production_date,
-                "note": pallet.note,
-                "scan_status": pallet.scan_status,
-                "confirmed": pallet.confirmed,
-                "list_box": list_box
-            }
-            list_pallet.append(pallet_info)
-
-        # Construct general_info
-        general_info = {
+    def _wms_general_info(req: WarehouseImportRequirement) -> dict:
+        return {
             "id": req.id,
             "client_id": req.client_id,
             "inventory_code": req.inventory_code,
@@ -1231,13 +1231,138 @@ class WarehouseImportService:
             "quantity": req.quantity,
             "destination_warehouse": req.destination_warehouse,
             "pallet_note_creation_id": req.pallet_note_creation_session_id,
-            "list_pallet": list_pallet
         }
 
+    @staticmethod
+    async def _iter_wms_pallets(db: AsyncSession, req_id: int):
+        """
+        Yield the pallets of a requirement with their list_box, one dict per pallet.
+
+        Pallets and boxes come from a single LEFT JOIN streamed in (pallet, box) order,
+        selecting plain columns so no ORM object is built per box.
+        """
+        query = (
+            select(
+                ImportPalletInfo.id,
+                ImportPalletInfo.serial_pallet,
+                ImportPalletInfo.quantity_per_box,
+                ImportPalletInfo.num_box_per_pallet,
+                ImportPalletInfo.total_quantity,
+                ImportPalletInfo.po_number,
+                ImportPalletInfo.customer_name,
+                ImportPalletInfo.qdsx_no,
+                ImportPalletInfo.item_no_sku,
+                ImportPalletInfo.date_code,
+                ImportPalletInfo.production_date,
+                ImportPalletInfo.note,
+                ImportPalletInfo.scan_status,
+                ImportPalletInfo.confirmed,
+                ContainerInventory.id.label("box_id"),
+                ContainerInventory.inventory_identifier,
+                ContainerInventory.quantity_imported,
+                ContainerInventory.comments,
+                ContainerInventory.confirmed.label("box_confirmed"),
+                ContainerInventory.scan_by,
+                ContainerInventory.time_checked,
+                ContainerInventory.list_serial_items,
+            )
+            .select_from(ImportPalletInfo)
+            .outerjoin(ContainerInventory, ContainerInventory.import_pallet_id == ImportPalletInfo.id)
+            .where(ImportPalletInfo.warehouse_import_requirement_id == req_id)
+            .order_by(ImportPalletInfo.id, ContainerInventory.id)
+        )
+
+        pallet_info = None
+        result = await db.stream(query)
+        async for row in result:
+            if pallet_info is None or pallet_info["id"] != row.id:
+                if pallet_info is not None:
+                    yield pallet_info
+                pallet_info = {
+                    "id": row.id,
+                    "serial_pallet": row.serial_pallet,
+                    "quantity_per_box": row.quantity_per_box,
+                    "num_box_per_pallet": row.num_box_per_pallet,
+                    "total_quantity": row.total_quantity,
+                    "po_number": row.po_number,
+                    "customer_name": row.customer_name,
+                    "production_decision_number": row.qdsx_no,
+                    "item_no_sku": row.item_no_sku,
+                    "date_code": row.date_code,
+                    "production_date": row.production_date,
+                    "note": row.note,
+                    "scan_status": row.scan_status,
+                    "confirmed": row.confirmed,
+                    "list_box": []
+                }
+            if row.box_id is not None:
+                pallet_info["list_box"].append({
+                    "id": row.box_id,
+                    "box_code": row.inventory_identifier,
+                    "quantity": row.quantity_imported,
+                    "note": row.comments,
+                    "import_pallet_id": row.id,
+                    "confirmed": row.box_confirmed,
+                    "scan_by": row.scan_by,
+                    "time_checked": row.time_checked,
+                    "list_serial_items": row.list_serial_items
+                })
+        if pallet_info is not None:
+            yield pallet_info
+
+    @staticmethod
+    async def get_wms_import_requirement_by_id(db: AsyncSession, req_id: int) -> dict:
+        req = await WarehouseImportService.get_import_requirement_by_id(db, req_id)
+
+        # Construct general_info
+        general_info = WarehouseImportService._wms_general_info(req)
+        general_info["list_pallet"] = [
+            pallet async for pallet in WarehouseImportService._iter_wms_pallets(db, req_id)
+        ]
+
         return {
             "general_info": general_info
         }
 
+    @staticmethod
+    async def stream_wms_import_requirement_by_id(db: AsyncSession, req_id: int):
+        """
+        Same document as get_wms_import_requirement_by_id, serialised pallet by pallet.
+
+        The requirement and the first pallet are loaded before returning, so a missing
+        requirement (NotFoundException) or a failing query still reaches the caller
+        before the response starts; the returned async iterator yields JSON text. A
+        later error is logged and aborts the stream without the closing brackets.
+        """
+        import json
+        from fastapi.encoders import jsonable_encoder
+
+        req = await WarehouseImportService.get_import_requirement_by_id(db, req_id)
+        general_info = WarehouseImportService._wms_general_info(req)
+        pallets = WarehouseImportService._iter_wms_pallets(db, req_id)
+        try:
+            first_pallet = await pallets.__anext__()
+        except StopAsyncIteration:
+            first_pallet = None
+
+        def dumps(value) -> str:
+            return json.dumps(value, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":"))
+
+        async def chunks():
+            # general_info without its closing brace, then list_pallet as the last key
+            yield '{"general_info":' + dumps(general_info)[:-1] + ',"list_pallet":['
+            if first_pallet is not None:
+                yield dumps(first_pallet)
+                try:
+                    async for pallet in pallets:
+                        yield "," + dumps(pallet)
+                except Exception:
+                    logger.exception(f"Streaming import requirement {req_id} failed after the response started")
+                    raise
+            yield "]}}"
+
+        return chunks()
+
     @staticmethod
     def create_import_requirement_from_sap(db: Session, sap_data: dict) -> WarehouseImportRequirement:
         with db.begin():
@@ -1271,8 +1396,10 @@ class WarehouseImportService:
         req.status = WarehouseImportService._convert_to_boolean(status)
         if updated_by:
             req.updated_by = updated_by
+        await publish_progress(db, progress_topic(IMPORT, req_id), {"type": "status", "status": req.status})
         await db.commit()
         await db.refresh(req)
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD, IMPORT_SEARCH)
         return req
 
     @staticmethod
@@ -1339,15 +1466,20 @@ class WarehouseImportService:
             
             await db.flush()
             await db.refresh(req)
-            return req
+            if 'status' in update_data:
+                await publish_progress(db, progress_topic(IMPORT, req_id), {"type": "status", "status": req.status})
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD, IMPORT_SEARCH)
+        return req
 
     @staticmethod
     async def confirm_import_requirement_location(db: AsyncSession, req_id: int, location_id: int) -> WarehouseImportRequirement:
         req = await WarehouseImportService.get_import_requirement_by_id(db, req_id)
         # Logic to confirm location
         req.status = True
+        await publish_progress(db, progress_topic(IMPORT, req_id), {"type": "status", "status": True})
         await db.commit()
         await db.refresh(req)
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD, IMPORT_SEARCH)
         return req
 
     @staticmethod
@@ -1382,45 +1514,146 @@ class WarehouseImportService:
     
 
 
+    @staticmethod
+    async def _bulk_update_rows(
+        db: AsyncSession,
+        model,
+        key_columns: List[str],
+        updates: List[dict],
+        field_map: dict,
+        resource: str
+    ) -> list:
+        """
+        Apply partial updates to many rows with a fixed number of statements.
+
+        `key_columns` identify a row and `field_map` maps payload keys to column names.
+        Existence is checked with one IN pre-fetch so every missing key is reported,
+        writes go through UPDATE ... FROM (VALUES ...) grouped by the set of fields
+        present, and the updated rows come back through RETURNING. Must run inside
+        a transaction.
+        """
+        from sqlalchemy import update, values, column, tuple_, cast
+
+        # Later entries for the same key win, as if the payload were applied in order
+        merged = {}
+        for update_data in updates:
+            key = tuple(update_data.get(k) for k in key_columns)
+            fields = merged.setdefault(key, {})
+            for payload_key, column_name in field_map.items():
+                if payload_key in update_data:
+                    fields[column_name] = update_data.get(payload_key)
+        if not merged:
+            return []
+
+        keys = list(merged)
+        key_attrs = [getattr(model, k) for k in key_columns]
+        key_expr = key_attrs[0] if len(key_attrs) == 1 else tuple_(*key_attrs)
+
+        def key_params(chunk):
+            return [k[0] for k in chunk] if len(key_attrs) == 1 else chunk
+
+        existing = set()
+        for start in range(0, len(keys), BULK_UPDATE_PARAM_LIMIT // len(key_columns)):
+            chunk = keys[start:start + BULK_UPDATE_PARAM_LIMIT // len(key_columns)]
+            result = await db.execute(select(*key_attrs).where(key_expr.in_(key_params(chunk))))
+            existing.update(tuple(row) for row in result.all())
+
+        missing = [k for k in keys if k not in existing]
+        if missing:
+            raise NotFoundException(resource, "; ".join(
+                ", ".join(f"{name}={value}" for name, value in zip(key_columns, k)) for k in missing
+            ))
+
+        groups = {}
+        for key, fields in merged.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(key)
+
+        rows_by_key = {}
+        for field_names, group_keys in groups.items():
+            if not field_names:
+                continue
+            column_names = key_columns + list(field_names)
+            batch_size = max(1, BULK_UPDATE_PARAM_LIMIT // len(column_names))
+            for start in range(0, len(group_keys), batch_size):
+                chunk = group_keys[start:start + batch_size]
+                source = values(
+                    *[column(name, model.__table__.c[name].type) for name in column_names],
+                    name="source"
+                ).data([key + tuple(merged[key][f] for f in field_names) for key in chunk])
+                stmt = (
+                    update(model)
+                    .where(*[getattr(model, k) == source.c[k] for k in key_columns])
+                    # The cast keeps an all-NULL VALUES column (typed text) assignable
+                    .values({f: cast(source.c[f], model.__table__.c[f].type) for f in field_names})
+                    .returning(model)
+                    .execution_options(synchronize_session=False, populate_existing=True)
+                )
+                result = await db.execute(stmt)
+                for row in result.scalars().all():
+                    rows_by_key[tuple(getattr(row, k) for k in key_columns)] = row
+
+        # Entries that carried no field to update are still returned, as before
+        untouched = [k for k in keys if k not in rows_by_key]
+        if untouched:
+            result = await db.execute(select(model).where(key_expr.in_(key_params(untouched))))
+            for row in result.scalars().all():
+                rows_by_key[tuple(getattr(row, k) for k in key_columns)] = row
+
+        return [rows_by_key[key] for key in keys]
+
+    @staticmethod
+    async def _stamp_confirmed_boxes(db: AsyncSession, container_inventories: list) -> None:
+        """Stamp the import origin on boxes whose container row is confirmed after /inventories_wh"""
+        await ImportOrigin.stamp_boxes(
+            db, [ci.inventory_identifier for ci in container_inventories if ci.confirmed]
+        )
+
+    @staticmethod
+    async def _publish_box_progress(db: AsyncSession, container_inventories: list) -> None:
+        """Publish updated boxes to the progress stream of their import requirement"""
+        if not container_inventories or not settings.PROGRESS_PUSH_ENABLED:
+            return
+        pallet_ids = {ci.import_pallet_id for ci in container_inventories}
+        result = await db.execute(
+            select(ImportPalletInfo.id, ImportPalletInfo.warehouse_import_requirement_id)
+            .where(ImportPalletInfo.id.in_(pallet_ids))
+        )
+        requirement_ids = dict(result.all())
+
+        boxes_by_requirement = {}
+        for ci in container_inventories:
+            boxes_by_requirement.setdefault(requirement_ids.get(ci.import_pallet_id), []).append({
+                "id": ci.id,
+                "inventory_identifier": ci.inventory_identifier,
+                "confirmed": ci.confirmed,
+                "quantity_imported": ci.quantity_imported,
+                "location_id": ci.location_id
+            })
+        for req_id, boxes in boxes_by_requirement.items():
+            if req_id is not None:
+                await publish_progress(db, progress_topic(IMPORT, req_id), {"type": "boxes", "boxes": boxes})
+
     @staticmethod
     async def update_container_inventory_by_identifier(
         db: AsyncSession,
         updates: List[dict]
     ) -> List[ContainerInventory]:
-
-        from sqlalchemy import select
-
-        updated_inventories = []
-
+        """Update container inventories by (import_container_id, inventory_identifier)"""
         async with db.begin():
-            for update_data in updates:
-                import_container_id = update_data.get('import_container_id')
-                inventory_identifier = update_data.get('inventory_identifier')
-                # Find the container inventory
-                result = await db.execute(
-                    select(ContainerInventory).where(
-                        ContainerInventory.import_container_id == import_container_id,
-                        ContainerInventory.inventory_identifier == inventory_identifier
-                    )
-                )
-                container_inventory = result.scalar_one_or_none()
-
-                if not container_inventory:
-                    raise NotFoundException("ContainerInventory", f"import_container_id={import_container_id}, inventory_identifier={inventory_identifier}")
-
-                # Only update fields that are provided in the request
-                if 'quantity_imported' in update_data:
-                    container_inventory.quantity_imported = update_data.get('quantity_imported')
-                if 'confirmed' in update_data:
-                    container_inventory.confirmed = update_data.get('confirmed')
-                if 'location_id' in update_data:
-                    container_inventory.location_id = update_data.get('location_id')
-
-                updated_inventories.append(container_inventory)
-
-            await db.flush()
-            for inventory in updated_inventories:
-                await db.refresh(inventory)
+            updated_inventories = await WarehouseImportService._bulk_update_rows(
+                db,
+                ContainerInventory,
+                ["import_container_id", "inventory_identifier"],
+                updates,
+                {
+                    'quantity_imported': 'quantity_imported',
+                    'confirmed': 'confirmed',
+                    'location_id': 'location_id',
+                },
+                "ContainerInventory"
+            )
+            await WarehouseImportService._publish_box_progress(db, updated_inventories)
+            await WarehouseImportService._stamp_confirmed_boxes(db, updated_inventories)
 
         return updated_inventories
 
@@ -1430,59 +1663,32 @@ class WarehouseImportService:
         updates: List[dict]
     ) -> List[ContainerInventory]:
         """Update container inventory by ID - supports partial updates"""
-        from sqlalchemy import select
-
-        updated_inventories = []
-
         async with db.begin():
-            for update_data in updates:
-                container_id = update_data.get('id')
-                # Find the container inventory by ID
-                result = await db.execute(
-                    select(ContainerInventory).where(
-                        ContainerInventory.id == container_id
-                    )
-                )
-                container_inventory = result.scalar_one_or_none()
-
-                if not container_inventory:
-                    raise NotFoundException("ContainerInventory", f"id={container_id}")
-
-                # Only update fields that are provided in the request
-                if 'manufacturing_date' in update_data:
-                    container_inventory.manufacturing_date = update_data.get('manufacturing_date')
-                if 'expiration_date' in update_data:
-                    container_inventory.expiration_date = update_data.get('expiration_date')
-                if 'sap_code' in update_data:
-                    container_inventory.sap_code = update_data.get('sap_code')
-                if 'po' in update_data:
-                    container_inventory.po = update_data.get('po')
-                if 'lot' in update_data:
-                    container_inventory.lot = update_data.get('lot')
-                if 'vendor' in update_data:
-                    container_inventory.vendor = update_data.get('vendor')
-                if 'msd_level' in update_data:
-                    container_inventory.msd_level = update_data.get('msd_level')
-                if 'comments' in update_data:
-                    container_inventory.comments = update_data.get('comments')
-                if 'name' in update_data:
-                    container_inventory.name = update_data.get('name')
-                if 'location_id' in update_data:
-                    container_inventory.location_id = update_data.get('location_id')
-                if 'serial_pallet' in update_data:
-                    container_inventory.serial_pallet = update_data.get('serial_pallet')
-                if 'quantity_imported' in update_data:
-                    container_inventory.quantity_imported = update_data.get('quantity_imported')
-                if 'scan_by' in update_data:
-                    container_inventory.scan_by = update_data.get('scan_by')
-                if 'confirmed' in update_data:
-                    container_inventory.confirmed = update_data.get('confirmed')
-
-                updated_inventories.append(container_inventory)
-
-            await db.flush()
-            for inventory in updated_inventories:
-                await db.refresh(inventory)
+            updated_inventories = await WarehouseImportService._bulk_update_rows(
+                db,
+                ContainerInventory,
+                ["id"],
+                updates,
+                {
+                    'manufacturing_date': 'manufacturing_date',
+                    'expiration_date': 'expiration_date',
+                    'sap_code': 'sap_code',
+                    'po': 'po',
+                    'lot': 'lot',
+                    'vendor': 'vendor',
+                    'msd_level': 'msd_level',
+                    'comments': 'comments',
+                    'name': 'name',
+                    'location_id': 'location_id',
+                    'serial_pallet': 'serial_pallet',
+                    'quantity_imported': 'quantity_imported',
+                    'scan_by': 'scan_by',
+                    'confirmed': 'confirmed',
+                },
+                "ContainerInventory"
+            )
+            await WarehouseImportService._publish_box_progress(db, updated_inventories)
+            await WarehouseImportService._stamp_confirmed_boxes(db, updated_inventories)
 
         return updated_inventories
 
@@ -1492,32 +1698,20 @@ class WarehouseImportService:
         updates: List[dict]
     ) -> List[ContainerInventory]:
         """Update container inventory confirmed status by ID - simplified version"""
-        from sqlalchemy import select
-
-        updated_inventories = []
+        # Only the confirmed field is updated
+        updates = [{'id': u.get('id'), 'confirmed': u.get('confirmed')} for u in updates]
 
         async with db.begin():
-            for update_data in updates:
-                container_id = update_data.get('id')
-                confirmed = update_data.get('confirmed')
-                # Find the container inventory by ID
-                result = await db.execute(
-                    select(ContainerInventory).where(
-                        ContainerInventory.id == container_id
-                    )
-                )
-                container_inventory = result.scalar_one_or_none()
-
-                if not container_inventory:
-                    raise NotFoundException("ContainerInventory", f"id={container_id}")
-
-                # Only update the confirmed field
-                container_inventory.confirmed = confirmed
-                updated_inventories.append(container_inventory)
-
-            await db.flush()
-            for inventory in updated_inventories:
-                await db.refresh(inventory)
+            updated_inventories = await WarehouseImportService._bulk_update_rows(
+                db,
+                ContainerInventory,
+                ["id"],
+                updates,
+                {'confirmed': 'confirmed'},
+                "ContainerInventory"
+            )
+            await WarehouseImportService._publish_box_progress(db, updated_inventories)
+            await WarehouseImportService._stamp_confirmed_boxes(db, updated_inventories)
 
         return updated_inventories
 
@@ -1527,56 +1721,31 @@ class WarehouseImportService:
         updates: List[dict]
     ) -> List[ImportPalletInfo]:
         """Update import pallet info by ID"""
-        from sqlalchemy import select
-
-        updated_pallets = []
-
         async with db.begin():
-            for update_data in updates:
-                pallet_id = update_data.get('id')
-                # Find the import pallet info
-                result = await db.execute(
-                    select(ImportPalletInfo).where(
-                        ImportPalletInfo.id == pallet_id
-                    )
-                )
-                pallet_info = result.scalar_one_or_none()
-
-                if not pallet_info:
-                    raise NotFoundException("ImportPalletInfo", f"id={pallet_id}")
-
-                # Update fields if provided
-                if 'serial_pallet' in update_data:
-                    pallet_info.serial_pallet = update_data.get('serial_pallet')
-                if 'quantity_per_box' in update_data:
-                    pallet_info.quantity_per_box = update_data.get('quantity_per_box')
-                if 'num_box_per_pallet' in update_data:
-                    pallet_info.num_box_per_pallet = update_data.get('num_box_per_pallet')
-                if 'total_quantity' in update_data:
-                    pallet_info.total_quantity = update_data.get('total_quantity')
-                if 'po_number' in update_data:
-                    pallet_info.po_number = update_data.get('po_number')
-                if 'customer_name' in update_data:
-                    pallet_info.customer_name = update_data.get('customer_name')
-                if 'production_decision_number' in update_data:
-                    pallet_info.qdsx_no = update_data.get('production_decision_number')
-                if 'item_no_sku' in update_data:
-                    pallet_info.item_no_sku = update_data.get('item_no_sku')
-                if 'date_code' in update_data:
-                    pallet_info.date_code = update_data.get('date_code')
-                if 'note' in update_data:
-                    pallet_info.note = update_data.get('note')
-                if 'scan_status' in update_data:
-                    pallet_info.scan_status = update_data.get('scan_status')
-                if 'confirmed' in update_data:
-                    pallet_info.confirmed = update_data.get('confirmed')
-
-                updated_pallets.append(pallet_info)
-
-            await db.flush()
-            for pallet in updated_pallets:
-                await db.refresh(pallet)
+            updated_pallets = await WarehouseImportService._bulk_update_rows(
+                db,
+                ImportPalletInfo,
+                ["id"],
+                updates,
+                {
+                    'serial_pallet': 'serial_pallet',
+                    'quantity_per_box': 'quantity_per_box',
+                    'num_box_per_pallet': 'num_box_per_pallet',
+                    'total_quantity': 'total_quantity',
+                    'po_number': 'po_number',
+                    'customer_name': 'customer_name',
+                    'production_decision_number': 'qdsx_no',
+                    'item_no_sku': 'item_no_sku',
+                    'date_code': 'date_code',
+                    'note': 'note',
+                    'scan_status': 'scan_status',
+                    'confirmed': 'confirmed',
+                },
+                "ImportPalletInfo"
+            )
 
+        if any('serial_pallet' in u for u in updates):
+            await cache.invalidate(IMPORT_SEARCH)
         return updated_pallets
 
     @staticmethod
@@ -1584,108 +1753,131 @@ class WarehouseImportService:
         """
         Create warehouse import requirement with nested pallet and box data
         Inserts into: warehouse_import_requirements -> import_pallet_info -> container_inventories
+
+        Pallets go in with one multi-row INSERT ... RETURNING id and boxes with one
+        executemany. Rows are prepared (dates parsed) before the transaction opens.
         """
         from app.modules.inventory.models import ImportPalletInfo, ContainerInventory
+        from sqlalchemy import insert
         from datetime import datetime
-        
+        import time
+
+        started_at = time.perf_counter()
+
+        # Step 1: Extract general_info and list_pallet
+        general_info = import_data.get('general_info', {})
+        list_pallet = general_info.pop('list_pallet', [])
+
+        # Step 2: Prepare warehouse_import_requirements record
+        warehouse_import_data = {
+            'po_number': general_info.get('po_number'),
+            'client_id': general_info.get('client_id'),
+            'inventory_code': general_info.get('inventory_code'),
+            'inventory_name': general_info.get('inventory_name'),
+            'wo_code': general_info.get('wo_code'),
+            'sap_wo': general_info.get('wo_code'), 
+            'lot_number': general_info.get('lot_number'),
+            'production_date': general_info.get('production_date'),
+            'branch': general_info.get('branch'),
+            'production_team': general_info.get('production_team'),
+            'number_of_pallet': general_info.get('number_of_pallet'),
+            'number_of_box': general_info.get('number_of_box'),
+            'quantity': general_info.get('quantity'),
+            'status': False,
+            'note': general_info.get('note'),
+            'destination_warehouse': general_info.get('destination_warehouse'),
+            'pallet_note_creation_session_id': general_info.get('pallet_note_creation_id'),
+            'item_no_sku': general_info.get('item_no_sku'),
+            'created_by': general_info.get('created_by'),
+            'updated_by': general_info.get('created_by')
+        }
+
+        # Step 3: Prepare import_pallet_info and container_inventories rows
+        location_id = general_info.get('destination_warehouse') if general_info.get('destination_warehouse') else 1
+        pallet_rows = []
+        boxes_by_pallet = []
+        for pallet_data in list_pallet:
+            list_box = pallet_data.pop('list_box', [])
+
+            pallet_rows.append({
+                'serial_pallet': pallet_data.get('serial_pallet'),
+                'quantity_per_box': pallet_data.get('quantity_per_box'),
+                'num_box_per_pallet': pallet_data.get('num_box_per_pallet'),
+                'total_quantity': pallet_data.get('total_quantity'),
+                'po_number': pallet_data.get('po_number'),
+                'customer_name': pallet_data.get('customer_name'),
+                'qdsx_no': pallet_data.get('production_decision_number'),
+                'item_no_sku': pallet_data.get('item_no_sku'),
+                'date_code': pallet_data.get('date_code'),
+                'note': pallet_data.get('note'),
+                'scan_status': False,
+                'created_by': general_info.get('created_by')
+            })
+
+            prod_date_str = pallet_data.get('production_date')
+            if prod_date_str:
+                manufacturing_date = datetime.strptime(prod_date_str, '%d/%m/%Y')
+            else:
+                manufacturing_date = None
+
+            boxes_by_pallet.append([
+                {
+                    'po': pallet_data.get('po_number'),
+                    'lot': general_info.get('lot_number'),
+                    'sap_code': general_info.get('inventory_code'),
+                    'name': general_info.get('inventory_name'),
+                    'inventory_identifier': box_data.get('box_code'),
+                    'serial_pallet': pallet_data.get('serial_pallet'),
+                    'quantity_imported': box_data.get('quantity'),
+                    'comments': box_data.get('note'),
+                    'list_serial_items': box_data.get('list_serial_items'),
+                    'location_id': location_id,
+                    'msd_level': "1",
+                    'vendor': "RD",
+                    'manufacturing_date': manufacturing_date,
+                    'confirmed': False,
+                }
+                for box_data in list_box
+            ])
+
+        total_pallets = len(pallet_rows)
+        total_boxes = sum(len(boxes) for boxes in boxes_by_pallet)
+
         async with db.begin():
-            # Step 1: Extract general_info and list_pallet
-            general_info = import_data.get('general_info', {})
-            list_pallet = general_info.pop('list_pallet', [])
-            
-            # Step 2: Create warehouse_import_requirements record
-            warehouse_import_data = {
-                'po_number': general_info.get('po_number'),
-                'client_id': general_info.get('client_id'),
-                'inventory_code': general_info.get('inventory_code'),
-                'inventory_name': general_info.get('inventory_name'),
-                'wo_code': general_info.get('wo_code'),
-                'sap_wo': general_info.get('wo_code'), 
-                'lot_number': general_info.get('lot_number'),
-                'production_date': general_info.get('production_date'),
-                'branch': general_info.get('branch'),
-                'production_team': general_info.get('production_team'),
-                'number_of_pallet': general_info.get('number_of_pallet'),
-                'number_of_box': general_info.get('number_of_box'),
-                'quantity': general_info.get('quantity'),
-                'status': False,
-                'note': general_info.get('note'),
-                'destination_warehouse': general_info.get('destination_warehouse'),
-                'pallet_note_creation_session_id': general_info.get('pallet_note_creation_id'),
-                'item_no_sku': general_info.get('item_no_sku'),
-                'created_by': general_info.get('created_by'),
-                'updated_by': general_info.get('created_by')
-            }
-            
             warehouse_import = WarehouseImportRequirement(**warehouse_import_data)
             db.add(warehouse_import)
             await db.flush()
-            await db.refresh(warehouse_import)
-            
-            # Step 3: Create import_pallet_info records for each pallet
-            total_pallets = 0
-            total_boxes = 0
-            
-            for pallet_data in list_pallet:
-                list_box = pallet_data.pop('list_box', [])
-                
-                # Create pallet record
-                pallet_info = ImportPalletInfo(
-                    warehouse_import_requirement_id=warehouse_import.id,
-                    serial_pallet=pallet_data.get('serial_pallet'),
-                    quantity_per_box=pallet_data.get('quantity_per_box'),
-                    num_box_per_pallet=pallet_data.get('num_box_per_pallet'),
-                    total_quantity=pallet_data.get('total_quantity'),
-                    po_number=pallet_data.get('po_number'),
-                    customer_name=pallet_data.get('customer_name'),
-                    qdsx_no=pallet_data.get('production_decision_number'),
-                    item_no_sku=pallet_data.get('item_no_sku'),
-                    date_code=pallet_data.get('date_code'),
-                    note=pallet_data.get('note'),
-                    scan_status=False,
-                    created_by=general_info.get('created_by')
+
+            if pallet_rows:
+                for row in pallet_rows:
+                    row['warehouse_import_requirement_id'] = warehouse_import.id
+                result = await db.execute(
+                    insert(ImportPalletInfo).returning(ImportPalletInfo.id, sort_by_parameter_order=True),
+                    pallet_rows
                 )
-                db.add(pallet_info)
-                await db.flush()
-                await db.refresh(pallet_info)
-                total_pallets += 1
-                prod_date_str = pallet_data.get('production_date')
-                if prod_date_str:
-                    manufacturing_date = datetime.strptime(prod_date_str, '%d/%m/%Y')
-                else:
-                    manufacturing_date = None
-
-                # Step 4: Create container_inventories records for each box
-                for box_data in list_box:
-                    container_inventory = ContainerInventory(
-                        import_pallet_id=pallet_info.id,
-                        po=pallet_data.get('po_number'),
-                        lot=general_info.get('lot_number'),
-                        sap_code=general_info.get('inventory_code'),
-                        name=general_info.get('inventory_name'),
-                        inventory_identifier=box_data.get('box_code'),
-                        serial_pallet=pallet_data.get('serial_pallet'),
-                        quantity_imported=box_data.get('quantity'),
-                        comments=box_data.get('note'),
-                        list_serial_items=box_data.get('list_serial_items'),
-                        location_id=general_info.get('destination_warehouse') if general_info.get('destination_warehouse') else 1,
-                        # msd_level=box_data.msd_level if box_data.msd_level else "1",
-                        # vendor=box_data.vendor if box_data.vendor else "RD",
-                        msd_level="1",
-                        vendor="RD",
-                        manufacturing_date=manufacturing_date,
-                        confirmed=False,
-                    )
-                    db.add(container_inventory)
-                    total_boxes += 1
-                
-                await db.flush()
-            
-            return {
-                'warehouse_import_requirement_id': warehouse_import.id,
-                'total_pallets': total_pallets,
-                'total_boxes': total_boxes
-            }
+                pallet_ids = result.scalars().all()
+
+                box_rows = []
+                for pallet_id, boxes in zip(pallet_ids, boxes_by_pallet):
+                    for box in boxes:
+                        box['import_pallet_id'] = pallet_id
+                        box_rows.append(box)
+                if box_rows:
+                    await db.execute(insert(ContainerInventory), box_rows)
+
+            warehouse_import_id = warehouse_import.id
+
+        elapsed = time.perf_counter() - started_at
+        total_rows = 1 + total_pallets + total_boxes
+
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD, CONTAINER_INVENTORIES)
+        return {
+            'warehouse_import_requirement_id': warehouse_import_id,
+            'total_pallets': total_pallets,
+            'total_boxes': total_boxes,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'rows_per_second': round(total_rows / elapsed, 1) if elapsed > 0 else None
+        }
 
 class IWTRService:
 
@@ -1736,7 +1928,8 @@ class IWTRService:
             db.add(req)
             await db.flush()
             await db.refresh(req)
-            return req
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return req
     
     @staticmethod
     def _convert_to_boolean(value) -> bool:
@@ -1764,7 +1957,9 @@ class IWTRService:
             req.status = True
             await db.flush()
             await db.refresh(req)
-            return req
+            await publish_progress(db, progress_topic(IWTR, req_id), {"type": "status", "status": req.status})
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return req
 
     @staticmethod
     async def update_iwtr_request(db: AsyncSession, req_id: int, update_data: dict) -> InternalWarehouseTransferRequest:
@@ -1811,56 +2006,17 @@ class IWTRService:
             
             await db.flush()
             await db.refresh(req)
-            return req
+            if 'status' in update_data:
+                await publish_progress(db, progress_topic(IWTR, req_id), {"type": "status", "status": req.status})
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return req
 
     @staticmethod
     async def scan_iwtr(db: AsyncSession, req_id: int, scan_details: list) -> dict:
+        """Batch scan: dedupe, guarded stock decrement, quantity_scanned update, progress (see scan_engine)"""
+        from app.modules.inventory.scan_engine import ScanIngestionService, IWTR_SCANS
 
-        from datetime import datetime
-
-        async with db.begin():
-            # Verify IWTR exists
-            iwtr = await IWTRService.get_iwtr_request_by_id(db, req_id)
-            if not iwtr:
-                raise HTTPException(status_code=404, detail=f"IWTR with ID {req_id} not found")
-
-            # Create inventories_in_iwtr records
-            created_details = []
-            for detail in scan_details:
-                inventories_in_iwtr = InventoriesInIWTR(
-                    product_in_iwtr_id=detail.get('product_in_iwtr_id'),
-                    inventory_identifier=detail.get('inventory_identifier'),
-                    serial_pallet=detail.get('serial_pallet'),
-                    scan_by=detail.get('scan_by'),
-                    quantity_dispatched=detail.get('quantity_dispatched'),
-                    scan_time=detail.get('scan_time', datetime.now()),
-                    confirmed=detail.get('confirmed', False)
-                )
-                db.add(inventories_in_iwtr)
-                created_details.append(inventories_in_iwtr)
-
-            await db.flush()
-
-            # Refresh all created records to get their IDs
-            for detail in created_details:
-                await db.refresh(detail)
-
-            return {
-                "success": True,
-                "details": [
-                    {
-                        "id": detail.id,
-                        "product_in_iwtr_id": detail.product_in_iwtr_id,
-                        "inventory_identifier": detail.inventory_identifier,
-                        "serial_pallet": detail.serial_pallet,
-                        "scan_by": detail.scan_by,
-                        "quantity_dispatched": detail.quantity_dispatched,
-                        "scan_time": detail.scan_time,
-                        "confirmed": detail.confirmed
-                    }
-                    for detail in created_details
-                ]
-            }
+        return await ScanIngestionService.ingest(db, IWTR_SCANS, req_id, scan_details)
 
     @staticmethod
     async def create_products_in_iwtr(
@@ -1976,10 +2132,11 @@ class IWTRService:
             for item in items:
                 await db.refresh(item)
 
-            return {
-                "iwtr": iwtr,
-                "items": items
-            }
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return {
+            "iwtr": iwtr,
+            "items": items
+        }
         
     @staticmethod
     async def get_scan_details_by_iwtr_request_id(
@@ -2240,7 +2397,8 @@ class OSRService:
             db.add(req)
             await db.flush()
             await db.refresh(req)
-            return req
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return req
     
     @staticmethod
     def _convert_to_boolean(value) -> bool:
@@ -2268,7 +2426,9 @@ class OSRService:
             req.status = True
             await db.flush()
             await db.refresh(req)
-            return req
+            await publish_progress(db, progress_topic(OSR, req_id), {"type": "status", "status": req.status})
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return req
 
     @staticmethod
     async def update_osr_request(db: AsyncSession, req_id: int, update_data: dict) -> OutboundShipmentRequestOnOrder:
@@ -2315,56 +2475,17 @@ class OSRService:
             
             await db.flush()
             await db.refresh(req)
-            return req
+            if 'status' in update_data:
+                await publish_progress(db, progress_topic(OSR, req_id), {"type": "status", "status": req.status})
+        await cache.invalidate(DASHBOARD_STATS, TRANSACTIONS_DASHBOARD)
+        return req
 
     @staticmethod
     async def scan_osr(db: AsyncSession, req_id: int, scan_details: list) -> dict:
+        """Batch scan: dedupe, guarded stock decrement, quantity_scanned update, progress (see scan_engine)"""
+        from app.modules.inventory.scan_engine import ScanIngestionService, OSR_SCANS
 
-        from datetime import datetime
-
-        async with db.begin():
-            # Verify OSR exists
-            osr = await OSRService.get_osr_request_by_id(db, req_id)
-            if not osr:
-                raise HTTPException(status_code=404, detail=f"OSR with ID {req_id} not found")
-
-            # Create inventories_in_osr records
-            created_details = []
-            for detail in scan_details:
-                inventories_in_osr = InventoriesInOSR(
-                    product_in_osr_id=detail.get('product_in_osr_id'),
-                    inventory_identifier=detail.get('inventory_identifier'),
-                    serial_pallet=detail.get('serial_pallet'),
-                    scan_by=detail.get('scan_by'),
-                    quantity_dispatched=detail.get('quantity_dispatched'),
-                    scan_time=detail.get('scan_time', datetime.now()),
-                    confirmed=detail.get('confirmed', False)
-                )
-                db.add(inventories_in_osr)
-                created_details.append(inventories_in_osr)
-
-            await db.flush()
-
-            # Refresh all created records to get their IDs
-            for detail in created_details:
-                await db.refresh(detail)
-
-            return {
-                "success": True,
-                "details": [
-                    {
-                        "id": detail.id,
-                        "product_in_osr_id": detail.product_in_osr_id,
-                        "inventory_identifier": detail.inventory_identifier,
-                        "serial_pallet": detail.serial_pallet,
-                        "scan_by": detail.scan_by,
-                        "quantity_dispatched": detail.quantity_dispatched,
-                        "scan_time": detail.scan_time,
-                        "confirmed": detail.confirmed
-                    }
-                    for detail in created_details
-                ]
-            }
+        return await ScanIngestionService.ingest(db, OSR_SCANS, req_id, scan_details)
 
     @staticmethod
     async def create_products_in_osr(
@@ -2691,17 +2812,28 @@ class ContainerInventoryService:
             db.add(container_inventory)
             await db.flush()
             await db.refresh(container_inventory)
-            return container_inventory
+
+        await cache.invalidate(CONTAINER_INVENTORIES)
+        return container_inventory
 
     @staticmethod
     async def get_container_inventories_by_import_container_id(
         db: AsyncSession,
         import_container_id: int,
         page: int = 1,
-        size: int = 20
+        size: int = 20,
+        after: Optional[str] = None,
+        count_mode: Optional[str] = None
     ) -> dict:
-        """Get container inventories by import_container_id with pagination"""
+        """
+        Get container inventories by import_container_id with pagination
+
+        Pass `after` (the `next_cursor` of the previous page) for keyset pagination
+        on (time_checked, id) instead of OFFSET. `count_mode` picks how total_items
+        is computed.
+        """
         from sqlalchemy import and_
+        from app.core.pagination import count_total, keyset_after, split_page
 
         # Base query
         query = select(ContainerInventory).where(
@@ -2709,20 +2841,21 @@ class ContainerInventoryService:
         )
 
         # Get total count
-        count_query = select(func.count()).select_from(ContainerInventory).where(
-            ContainerInventory.import_container_id == import_container_id
-        )
-        count_result = await db.execute(count_query)
-        total_items = count_result.scalar() or 0
+        total_items, count_mode = await count_total(db, query, count_mode, CONTAINER_INVENTORIES)
 
         # Apply pagination
-        query = query.order_by(ContainerInventory.time_checked.desc())
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size)
+        query = query.order_by(ContainerInventory.time_checked.desc().nulls_first(), ContainerInventory.id.desc())
+        if after:
+            query = query.where(keyset_after(ContainerInventory.time_checked, ContainerInventory.id, after))
+        else:
+            query = query.offset((page - 1) * size)
+        query = query.limit(size + 1)
 
         # Execute query
         result = await db.execute(query)
-        container_inventories = result.scalars().all()
+        container_inventories, next_cursor = split_page(
+            result.scalars().all(), size, lambda ci: [ci.time_checked, ci.id]
+        )
 
         # Convert to dict format
         data = [
@@ -2757,7 +2890,9 @@ class ContainerInventoryService:
                 "page": page,
                 "size": size,
                 "total_items": total_items,
-                "total_pages": total_pages
+                "total_pages": total_pages,
+                "next_cursor": next_cursor,
+                "count_mode": count_mode
             }
         }
 
@@ -2786,7 +2921,10 @@ class ContainerInventoryService:
 
             await db.flush()
             await db.refresh(container_inventory)
-            return container_inventory
+
+        if 'import_container_id' in update_data:
+            await cache.invalidate(CONTAINER_INVENTORIES)
+        return container_inventory
 
     @staticmethod
     async def delete_container_inventory(db: AsyncSession, container_inventory_id: int) -> bool:
@@ -2794,19 +2932,23 @@ class ContainerInventoryService:
         async with db.begin():
             container_inventory = await ContainerInventoryService.get_container_inventory_by_id(db, container_inventory_id)
             await db.delete(container_inventory)
-            return True
+
+        await cache.invalidate(CONTAINER_INVENTORIES)
+        return True
 
 
 class UIService:
 
     @staticmethod
-    def get_ui_areas(db: Session) -> List[dict]:
-        result = db.execute(select(Area.id, Area.code, Area.name,Area.thu_kho, Area.description,Area.address ,Area.is_active))
+    @cached(AREAS)
+    async def get_ui_areas(db: AsyncSession) -> List[dict]:
+        result = await db.execute(select(Area.id, Area.code, Area.name,Area.thu_kho, Area.description,Area.address ,Area.is_active))
         return [{"id": area.id, "code": area.code, "name": area.name,"thu_kho": area.thu_kho,"description": area.description,"address": area.address, "is_active": area.is_active} for area in result]
 
     @staticmethod
-    def get_ui_locations(db: Session) -> List[dict]:
-        result = db.execute(select(Location.id, Location.code, Location.name, Location.is_active))
+    @cached(LOCATIONS)
+    async def get_ui_locations(db: AsyncSession) -> List[dict]:
+        result = await db.execute(select(Location.id, Location.code, Location.name, Location.is_active))
         return [{"id": loc.id, "code": loc.code, "name": loc.name, "is_active": loc.is_active} for loc in result]
 
 
@@ -2814,10 +2956,16 @@ class TransactionDashboardService:
     """Service for unified transaction dashboard across all transaction types"""
 
     @staticmethod
-    async def get_transactions_dashboard(
-        db: AsyncSession,
-        page: int = 1,
-        size: int = 20,
+    def _parse_filter_date(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _build_transactions_union(
         transaction_type: Optional[str] = None,
         request_code: Optional[str] = None,
         industry: Optional[str] = None,
@@ -2828,28 +2976,27 @@ class TransactionDashboardService:
         from_date: Optional[str] = None,
         to_date: Optional[str] = None,
         updated_by: Optional[str] = None
-    ) -> dict:
+    ):
         """
-        Get unified dashboard of all transactions (IMPORT, TRANSFER, EXPORT)
-        
-        Transaction types:
-        - IMPORT: WarehouseImportRequirement (uses wo_code as request_code)
-        - TRANSFER: InternalWarehouseTransferRequest (uses ma_yc_cknb as request_code, doc_entry from SAP)
-        - EXPORT: OutboundShipmentRequestOnOrder (uses ma_yc_xk as request_code, doc_entry from SAP)
+        Build one UNION ALL subquery over the three request tables.
+        Filters are applied inside each branch so Postgres can use per-table indexes.
         """
-        from sqlalchemy import union_all, literal, cast, String, Integer
-        from datetime import datetime
+        from sqlalchemy import union_all, literal, String, Integer
 
-        transactions = []
+        from_dt = TransactionDashboardService._parse_filter_date(from_date)
+        to_dt = TransactionDashboardService._parse_filter_date(to_date)
+        wanted_type = transaction_type.upper() if transaction_type else None
+
+        branches = []
 
         # Build IMPORT query
-        if not transaction_type or transaction_type.upper() == "IMPORT":
+        if not wanted_type or wanted_type == "IMPORT":
             import_query = select(
                 WarehouseImportRequirement.id,
-                literal("IMPORT").label("transaction_type"),
+                literal("IMPORT").cast(String).label("transaction_type"),
                 WarehouseImportRequirement.wo_code.label("request_code"),
                 literal(None).cast(Integer).label("doc_entry"),
-                WarehouseImportRequirement.branch,
+                WarehouseImportRequirement.branch.label("industry"),
                 WarehouseImportRequirement.production_team,
                 literal(None).cast(Integer).label("from_warehouse"),
                 literal(None).cast(Integer).label("to_warehouse"),
@@ -2857,6 +3004,7 @@ class TransactionDashboardService:
                 WarehouseImportRequirement.status,
                 WarehouseImportRequirement.updated_by,
                 WarehouseImportRequirement.updated_date,
+                WarehouseImportRequirement.po_number,
                 WarehouseImportRequirement.client_id,
                 WarehouseImportRequirement.lot_number,
                 literal(None).cast(String).label("don_vi_linh"),
@@ -2875,27 +3023,18 @@ class TransactionDashboardService:
                 import_query = import_query.where(WarehouseImportRequirement.status == status)
             if updated_by:
                 import_query = import_query.where(WarehouseImportRequirement.updated_by.ilike(f"%{updated_by}%"))
-            if from_date:
-                try:
-                    from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                    import_query = import_query.where(WarehouseImportRequirement.updated_date >= from_dt)
-                except:
-                    pass
-            if to_date:
-                try:
-                    to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                    import_query = import_query.where(WarehouseImportRequirement.updated_date <= to_dt)
-                except:
-                    pass
+            if from_dt:
+                import_query = import_query.where(WarehouseImportRequirement.updated_date >= from_dt)
+            if to_dt:
+                import_query = import_query.where(WarehouseImportRequirement.updated_date <= to_dt)
 
-            result = await db.execute(import_query)
-            transactions.extend(result.all())
+            branches.append(import_query)
 
         # Build TRANSFER query
-        if not transaction_type or transaction_type.upper() == "TRANSFER":
+        if not wanted_type or wanted_type == "TRANSFER":
             transfer_query = select(
                 InternalWarehouseTransferRequest.id,
-                literal("TRANSFER").label("transaction_type"),
+                literal("TRANSFER").cast(String).label("transaction_type"),
                 InternalWarehouseTransferRequest.ma_yc_cknb.label("request_code"),
                 literal(None).cast(Integer).label("doc_entry"),
                 literal(None).cast(String).label("industry"),
@@ -2906,6 +3045,7 @@ class TransactionDashboardService:
                 InternalWarehouseTransferRequest.status,
                 InternalWarehouseTransferRequest.updated_by,
                 InternalWarehouseTransferRequest.updated_date,
+                literal(None).cast(String).label("po_number"),
                 literal(None).cast(String).label("client_id"),
                 literal(None).cast(String).label("lot_number"),
                 InternalWarehouseTransferRequest.don_vi_linh,
@@ -2924,27 +3064,18 @@ class TransactionDashboardService:
                 transfer_query = transfer_query.where(InternalWarehouseTransferRequest.status == status)
             if updated_by:
                 transfer_query = transfer_query.where(InternalWarehouseTransferRequest.updated_by.ilike(f"%{updated_by}%"))
-            if from_date:
-                try:
-                    from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                    transfer_query = transfer_query.where(InternalWarehouseTransferRequest.updated_date >= from_dt)
-                except:
-                    pass
-            if to_date:
-                try:
-                    to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                    transfer_query = transfer_query.where(InternalWarehouseTransferRequest.updated_date <= to_dt)
-                except:
-                    pass
+            if from_dt:
+                transfer_query = transfer_query.where(InternalWarehouseTransferRequest.updated_date >= from_dt)
+            if to_dt:
+                transfer_query = transfer_query.where(InternalWarehouseTransferRequest.updated_date <= to_dt)
 
-            result = await db.execute(transfer_query)
-            transactions.extend(result.all())
+            branches.append(transfer_query)
 
         # Build EXPORT query
-        if not transaction_type or transaction_type.upper() == "EXPORT":
+        if not wanted_type or wanted_type == "EXPORT":
             export_query = select(
                 OutboundShipmentRequestOnOrder.id,
-                literal("EXPORT").label("transaction_type"),
+                literal("EXPORT").cast(String).label("transaction_type"),
                 OutboundShipmentRequestOnOrder.ma_yc_xk.label("request_code"),
                 literal(None).cast(Integer).label("doc_entry"),
                 literal(None).cast(String).label("industry"),
@@ -2955,6 +3086,7 @@ class TransactionDashboardService:
                 OutboundShipmentRequestOnOrder.status,
                 OutboundShipmentRequestOnOrder.updated_by,
                 OutboundShipmentRequestOnOrder.updated_date,
+                literal(None).cast(String).label("po_number"),
                 literal(None).cast(String).label("client_id"),
                 literal(None).cast(String).label("lot_number"),
                 OutboundShipmentRequestOnOrder.don_vi_linh,
@@ -2973,35 +3105,126 @@ class TransactionDashboardService:
                 export_query = export_query.where(OutboundShipmentRequestOnOrder.status == status)
             if updated_by:
                 export_query = export_query.where(OutboundShipmentRequestOnOrder.updated_by.ilike(f"%{updated_by}%"))
-            if from_date:
-                try:
-                    from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-                    export_query = export_query.where(OutboundShipmentRequestOnOrder.updated_date >= from_dt)
-                except:
-                    pass
-            if to_date:
-                try:
-                    to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-                    export_query = export_query.where(OutboundShipmentRequestOnOrder.updated_date <= to_dt)
-                except:
-                    pass
+            if from_dt:
+                export_query = export_query.where(OutboundShipmentRequestOnOrder.updated_date >= from_dt)
+            if to_dt:
+                export_query = export_query.where(OutboundShipmentRequestOnOrder.updated_date <= to_dt)
+
+            branches.append(export_query)
+
+        if not branches:
+            return None
+        return union_all(*branches).subquery("transactions")
+
+    @staticmethod
+    def _keyset_condition(transactions, cursor: str):
+        """WHERE clause selecting rows strictly after the cursor in (updated_date, transaction_type, id) DESC order"""
+        from sqlalchemy import and_, or_, tuple_
+        from app.core.pagination import decode_cursor, parse_cursor_datetime
+
+        cursor_date, cursor_type, cursor_id = decode_cursor(cursor, 3)
+        cursor_date = parse_cursor_datetime(cursor_date)
+        if not isinstance(cursor_type, str) or not isinstance(cursor_id, int):
+            raise ValidationException("Invalid pagination cursor")
+
+        # NULL updated_date rows are sorted last
+        if cursor_date is None:
+            return and_(
+                transactions.c.updated_date.is_(None),
+                tuple_(transactions.c.transaction_type, transactions.c.id) < tuple_(cursor_type, cursor_id)
+            )
+        return or_(
+            tuple_(
+                transactions.c.updated_date,
+                transactions.c.transaction_type,
+                transactions.c.id
+            ) < tuple_(cursor_date, cursor_type, cursor_id),
+            transactions.c.updated_date.is_(None)
+        )
+
+    @staticmethod
+    @cached(TRANSACTIONS_DASHBOARD, ttl=settings.DASHBOARD_CACHE_SECONDS)
+    async def get_transactions_dashboard(
+        db: AsyncSession,
+        page: int = 1,
+        size: int = 20,
+        transaction_type: Optional[str] = None,
+        request_code: Optional[str] = None,
+        industry: Optional[str] = None,
+        production_team: Optional[str] = None,
+        from_warehouse: Optional[int] = None,
+        to_warehouse: Optional[int] = None,
+        status: Optional[bool] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        updated_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None
+    ) -> dict:
+        """
+        Get unified dashboard of all transactions (IMPORT, TRANSFER, EXPORT)
+        
+        Transaction types:
+        - IMPORT: WarehouseImportRequirement (uses wo_code as request_code)
+        - TRANSFER: InternalWarehouseTransferRequest (uses ma_yc_cknb as request_code, doc_entry from SAP)
+        - EXPORT: OutboundShipmentRequestOnOrder (uses ma_yc_xk as request_code, doc_entry from SAP)
 
-            result = await db.execute(export_query)
-            transactions.extend(result.all())
+        Sorting and paging run in the database on a single UNION ALL. When `cursor`
+        is given (the `next_cursor` of a previous page), keyset pagination on
+        (updated_date, transaction_type, id) is used instead of OFFSET.
+        `count_mode` picks how total_items is computed.
+        """
+        from app.core.pagination import count_total, encode_cursor
+
+        transactions = TransactionDashboardService._build_transactions_union(
+            transaction_type=transaction_type,
+            request_code=request_code,
+            industry=industry,
+            production_team=production_team,
+            from_warehouse=from_warehouse,
+            to_warehouse=to_warehouse,
+            status=status,
+            from_date=from_date,
+            to_date=to_date,
+            updated_by=updated_by
+        )
 
-        # Sort by created_date descending
-        transactions.sort(key=lambda x: x.created_date if x.created_date else datetime.min, reverse=True)
+        if transactions is None:
+            return {
+                "data": [],
+                "meta": {
+                    "page": page, "size": size, "total_items": 0, "total_pages": 1,
+                    "next_cursor": None, "count_mode": count_mode or settings.COUNT_STRATEGY
+                }
+            }
 
-        # Calculate pagination
-        total_items = len(transactions)
+        total_items, count_mode = await count_total(db, select(transactions), count_mode, TRANSACTIONS_DASHBOARD)
         total_pages = (total_items + size - 1) // size if total_items > 0 else 1
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_transactions = transactions[start_idx:end_idx]
+
+        query = select(transactions).order_by(
+            transactions.c.updated_date.desc().nulls_last(),
+            transactions.c.transaction_type.desc(),
+            transactions.c.id.desc()
+        )
+        if cursor:
+            query = query.where(TransactionDashboardService._keyset_condition(transactions, cursor))
+        else:
+            query = query.offset((page - 1) * size)
+
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(query.limit(size + 1))
+        rows = result.all()
+        has_more = len(rows) > size
+        rows = rows[:size]
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor([last.updated_date, last.transaction_type, last.id])
 
         # Convert to dict format
         data = []
-        for txn in paginated_transactions:
+        for txn in rows:
             data.append({
                 "id": txn.id,
                 "transaction_type": txn.transaction_type,
@@ -3029,6 +3252,67 @@ class TransactionDashboardService:
                 "page": page,
                 "size": size,
                 "total_items": total_items,
-                "total_pages": total_pages
+                "total_pages": total_pages,
+                "next_cursor": next_cursor,
+                "count_mode": count_mode
             }
         }
+
+
+class DashboardStatsService:
+    """Aggregate counters for the landing dashboard, computed in one round trip"""
+
+    @staticmethod
+    def _build_stats_query():
+        """Build a single SELECT whose columns are scalar COUNT subqueries"""
+        total_areas = select(func.count(Area.id)).scalar_subquery()
+        total_locations = select(func.count(Location.id)).scalar_subquery()
+        total_inventory_items = select(func.count(Inventory.id)).scalar_subquery()
+
+        active_import_requirements = select(
+            func.count(WarehouseImportRequirement.id).filter(
+                WarehouseImportRequirement.status.is_(False)
+            )
+        ).scalar_subquery()
+
+        # status = True nghĩa là đã hoàn thành, NULL/False đều là đang chờ xử lý
+        pending_iwtr = select(
+            func.count(InternalWarehouseTransferRequest.id).filter(
+                InternalWarehouseTransferRequest.status.is_not(True)
+            )
+        ).scalar_subquery()
+
+        pending_osr = select(
+            func.count(OutboundShipmentRequestOnOrder.id).filter(
+                OutboundShipmentRequestOnOrder.status.is_not(True)
+            )
+        ).scalar_subquery()
+
+        return select(
+            total_areas.label("total_areas"),
+            total_locations.label("total_locations"),
+            total_inventory_items.label("total_inventory_items"),
+            active_import_requirements.label("active_import_requirements"),
+            pending_iwtr.label("pending_iwtr"),
+            pending_osr.label("pending_osr"),
+        )
+
+    @staticmethod
+    @cached(DASHBOARD_STATS, ttl=settings.DASHBOARD_CACHE_SECONDS)
+    async def get_dashboard_stats(db: AsyncSession) -> dict:
+        """
+        Get all landing dashboard counters with a single query.
+
+        Results are cached for DASHBOARD_CACHE_SECONDS and dropped by the write paths.
+        """
+        result = await db.execute(DashboardStatsService._build_stats_query())
+        row = result.one()
+
+        return {
+            "total_areas": row.total_areas or 0,
+            "total_locations": row.total_locations or 0,
+            "total_inventory_items": row.total_inventory_items or 0,
+            "active_import_requirements": row.active_import_requirements or 0,
+            "pending_iwtr": row.pending_iwtr or 0,
+            "pending_osr": row.pending_osr or 0,
+        }
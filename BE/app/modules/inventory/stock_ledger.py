@@ -0,0 +1,244 @@
+"""
+Sổ biến động tồn kho (inventory_movements) và tồn kho cộng dồn (stock_rollups)
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, insert, delete, func, text, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ValidationException
+from app.modules.inventory.models import Area, Inventory, InventoryMovement, Location, StockRollup
+
+logger = logging.getLogger(__name__)
+
+RECEIPT = "receipt"
+MOVE = "move"
+PICK = "pick"
+ADJUST = "adjust"
+
+# asyncpg accepts at most 32767 bind parameters per statement
+LEDGER_PARAM_LIMIT = 30000
+
+STOCK_GROUPS = {
+    "sap_code": [StockRollup.sap_code],
+    "location": [StockRollup.location_id],
+    "area": [StockRollup.area_id],
+    "sap_code_area": [StockRollup.sap_code, StockRollup.area_id],
+}
+
+
+def _chunks(rows: list, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def movement(
+    inventory,
+    movement_type: str,
+    quantity_before: int,
+    quantity_after: int,
+    from_location_id: Optional[int],
+    to_location_id: Optional[int],
+    reference: Optional[str] = None,
+    created_by: Optional[str] = None
+) -> dict:
+    """
+    One ledger entry for a box. `inventory` is anything with id, identifier and sap_code
+    (ORM object or RETURNING row); quantities are the box's available_quantity before and
+    after the change, locations are None on the side that does not apply (no source on a
+    receipt).
+    """
+    return {
+        "inventory_id": inventory.id,
+        "identifier": inventory.identifier,
+        "sap_code": inventory.sap_code,
+        "movement_type": movement_type,
+        "quantity_before": quantity_before or 0,
+        "quantity_after": quantity_after or 0,
+        "from_location_id": from_location_id,
+        "to_location_id": to_location_id,
+        "reference": reference,
+        "created_by": created_by
+    }
+
+
+class StockLedger:
+    """
+    Every change of Inventory.available_quantity / location_id goes through `record`, in the
+    transaction that makes the change: one multi-row INSERT into inventory_movements and one
+    upsert of the touched stock_rollups rows. A box leaves its source bucket with its old
+    quantity and enters its target bucket with the new one, so receipts, moves, picks and
+    adjustments all reduce to the same two deltas. Rollup rows are written in key order so
+    concurrent writers do not deadlock on them.
+    """
+
+    @staticmethod
+    async def record(db: AsyncSession, movements: List[dict]) -> None:
+        if not movements:
+            return
+
+        location_ids = {
+            location_id
+            for entry in movements
+            for location_id in (entry["from_location_id"], entry["to_location_id"])
+            if location_id is not None
+        }
+        result = await db.execute(select(Location.id, Location.area_id).where(Location.id.in_(location_ids)))
+        area_ids = dict(result.all())
+
+        deltas: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0])
+        for entry in movements:
+            sap_code = entry["sap_code"] or ""
+            if entry["from_location_id"] is not None:
+                delta = deltas[(sap_code, entry["from_location_id"], area_ids[entry["from_location_id"]])]
+                delta[0] -= entry["quantity_before"]
+                delta[1] -= 1 if entry["quantity_before"] > 0 else 0
+            if entry["to_location_id"] is not None:
+                delta = deltas[(sap_code, entry["to_location_id"], area_ids[entry["to_location_id"]])]
+                delta[0] += entry["quantity_after"]
+                delta[1] += 1 if entry["quantity_after"] > 0 else 0
+
+        rows = [
+            {
+                "inventory_id": entry["inventory_id"],
+                "identifier": entry["identifier"],
+                "movement_type": entry["movement_type"],
+                "sap_code": entry["sap_code"],
+                "quantity_delta": entry["quantity_after"] - entry["quantity_before"],
+                "balance_after": entry["quantity_after"],
+                "from_location_id": entry["from_location_id"],
+                "to_location_id": entry["to_location_id"],
+                "reference": entry["reference"],
+                "created_by": entry["created_by"]
+            }
+            for entry in movements
+        ]
+        for chunk in _chunks(rows, LEDGER_PARAM_LIMIT // len(InventoryMovement.__table__.c)):
+            await db.execute(insert(InventoryMovement).values(chunk))
+
+        rollups = [
+            {
+                "sap_code": sap_code,
+                "location_id": location_id,
+                "area_id": area_id,
+                "available_quantity": quantity,
+                "box_count": boxes
+            }
+            for (sap_code, location_id, area_id), (quantity, boxes) in sorted(deltas.items())
+            if quantity or boxes
+        ]
+        for chunk in _chunks(rollups, LEDGER_PARAM_LIMIT // 6):
+            upsert = pg_insert(StockRollup).values(chunk)
+            await db.execute(
+                upsert.on_conflict_do_update(
+                    index_elements=[StockRollup.sap_code, StockRollup.location_id, StockRollup.area_id],
+                    set_={
+                        "available_quantity": StockRollup.available_quantity + upsert.excluded.available_quantity,
+                        "box_count": StockRollup.box_count + upsert.excluded.box_count,
+                        "updated_date": func.now()
+                    }
+                )
+            )
+
+    @staticmethod
+    async def rebuild_rollups(db: AsyncSession) -> int:
+        """
+        Recompute stock_rollups from inventories (first deployment, or after a manual data fix).
+        Writers to inventories wait for the rebuild to finish.
+        """
+        async with db.begin():
+            await db.execute(text("LOCK TABLE inventories IN SHARE MODE"))
+            await db.execute(delete(StockRollup))
+            grouped = (
+                select(
+                    func.coalesce(Inventory.sap_code, literal("")),
+                    Inventory.location_id,
+                    Location.area_id,
+                    func.sum(Inventory.available_quantity),
+                    func.count(Inventory.id).filter(Inventory.available_quantity > 0),
+                    func.now()
+                )
+                .join(Location, Location.id == Inventory.location_id)
+                .group_by(func.coalesce(Inventory.sap_code, literal("")), Inventory.location_id, Location.area_id)
+            )
+            await db.execute(
+                insert(StockRollup).from_select(
+                    ["sap_code", "location_id", "area_id", "available_quantity", "box_count", "updated_date"],
+                    grouped
+                )
+            )
+            groups = await db.scalar(select(func.count()).select_from(StockRollup))
+        logger.info(f"Rebuilt {groups} stock rollup rows")
+        return groups
+
+    @staticmethod
+    async def get_stock_summary(
+        db: AsyncSession,
+        group_by: str = "sap_code",
+        sap_code: Optional[str] = None,
+        area_id: Optional[int] = None,
+        location_id: Optional[int] = None,
+        page: int = 1,
+        size: int = 50
+    ) -> dict:
+        """Stock totals per group, read from stock_rollups (cost grows with groups, not boxes)"""
+        if group_by not in STOCK_GROUPS:
+            raise ValidationException(f"group_by phải là một trong: {', '.join(STOCK_GROUPS)}")
+        page = max(page, 1)
+        size = min(max(size, 1), 1000)
+
+        filters = [StockRollup.box_count > 0]
+        if sap_code:
+            filters.append(StockRollup.sap_code == sap_code)
+        if area_id is not None:
+            filters.append(StockRollup.area_id == area_id)
+        if location_id is not None:
+            filters.append(StockRollup.location_id == location_id)
+
+        keys = STOCK_GROUPS[group_by]
+        grouped = (
+            select(
+                *keys,
+                func.sum(StockRollup.available_quantity).label("available_quantity"),
+                func.sum(StockRollup.box_count).label("box_count"),
+                func.max(StockRollup.updated_date).label("updated_date")
+            )
+            .where(*filters)
+            .group_by(*keys)
+            .subquery()
+        )
+
+        columns = [grouped.c[key.name] for key in keys]
+        query = select(grouped)
+        if group_by in ("area", "sap_code_area"):
+            query = query.add_columns(Area.code.label("area_code"), Area.name.label("area_name")).outerjoin(
+                Area, Area.id == grouped.c.area_id
+            )
+        if group_by == "location":
+            query = query.add_columns(Location.code.label("location_code"), Location.area_id).outerjoin(
+                Location, Location.id == grouped.c.location_id
+            )
+
+        total_items = await db.scalar(select(func.count()).select_from(grouped)) or 0
+        result = await db.execute(query.order_by(*columns).offset((page - 1) * size).limit(size))
+
+        data = []
+        for row in result.mappings():
+            item = dict(row)
+            item["available_quantity"] = int(item["available_quantity"] or 0)
+            item["box_count"] = int(item["box_count"] or 0)
+            item["updated_date"] = item["updated_date"].isoformat() if item["updated_date"] else None
+            data.append(item)
+
+        return {
+            "data": data,
+            "meta": {
+                "page": page,
+                "size": size,
+                "total_items": total_items,
+                "total_pages": (total_items + size - 1) // size
+            }
+        }
@@ -0,0 +1,87 @@
+"""
+Mã kho SAP -> kho WMS (areas.id), tra cứu trong bộ nhớ tiến trình
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache, MISSING, WAREHOUSE_CODES
+from app.core.config import settings
+from app.modules.inventory.models import AreaWarehouseCode
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_whs_code(whs_code: Optional[str]) -> Optional[str]:
+    if whs_code is None:
+        return None
+    whs_code = whs_code.strip().upper()
+    return whs_code or None
+
+
+class WarehouseCodeResolver:
+    """
+    The whole area_warehouse_codes table as a dict, loaded once per process.
+
+    Writers call `invalidate()`, which drops the local copy and bumps a version key in the
+    shared cache so the other workers reload on their next `mapping()` call; the copy is
+    also reloaded after WAREHOUSE_CODE_CACHE_SECONDS in case the shared cache is down.
+    Bulk callers take `mapping()` once and resolve any number of codes from it.
+    """
+
+    def __init__(self):
+        self._mapping: Optional[Dict[str, int]] = None
+        self._version = MISSING
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def _version_key(self) -> str:
+        return cache.make_key(WAREHOUSE_CODES, "version")
+
+    def _is_fresh(self, version) -> bool:
+        return (
+            self._mapping is not None
+            and version == self._version
+            and time.monotonic() - self._loaded_at < settings.WAREHOUSE_CODE_CACHE_SECONDS
+        )
+
+    async def mapping(self, db: AsyncSession) -> Dict[str, int]:
+        version = await cache.get(self._version_key)
+        if self._is_fresh(version):
+            return self._mapping
+
+        async with self._lock:
+            if self._is_fresh(version):
+                return self._mapping
+            result = await db.execute(select(AreaWarehouseCode.whs_code, AreaWarehouseCode.area_id))
+            self._mapping = {normalize_whs_code(whs_code): area_id for whs_code, area_id in result.all()}
+            self._version = version
+            self._loaded_at = time.monotonic()
+            logger.info(f"Loaded {len(self._mapping)} SAP warehouse codes")
+            return self._mapping
+
+    async def resolve(self, db: AsyncSession, whs_code: Optional[str]) -> Optional[int]:
+        return resolve_whs_code(await self.mapping(db), whs_code)
+
+    async def resolve_many(self, db: AsyncSession, whs_codes: Iterable[Optional[str]]) -> Dict[str, Optional[int]]:
+        mapping = await self.mapping(db)
+        return {whs_code: resolve_whs_code(mapping, whs_code) for whs_code in whs_codes if whs_code}
+
+    async def invalidate(self) -> None:
+        self._mapping = None
+        await cache.set(self._version_key, uuid.uuid4().hex, ttl=settings.WAREHOUSE_CODE_VERSION_SECONDS)
+
+
+def resolve_whs_code(mapping: Optional[Dict[str, int]], whs_code: Optional[str]) -> Optional[int]:
+    if not mapping:
+        return None
+    return mapping.get(normalize_whs_code(whs_code))
+
+
+warehouse_codes = WarehouseCodeResolver()
@@ -1,10 +1,11 @@
 
 import strawberry
-from typing import List
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.types import Info
 
 from app.modules.locations.schemas import (
+    Area,
     Location,
     LocationCreate,
     LocationUpdate
@@ -13,9 +14,17 @@ from app.modules.locations.service import LocationService
 
 
 # Strawberry types for GraphQL
+@strawberry.experimental.pydantic.type(model=Area, all_fields=True)
+class AreaType:
+    pass
+
 @strawberry.experimental.pydantic.type(model=Location, all_fields=True)
 class LocationType:
-    pass
+
+    @strawberry.field
+    async def area(self, info: Info) -> Optional[AreaType]:
+        """Area of the location (batched per request)"""
+        return await info.context.loaders.area_by_id.load(self.area_id)
 
 @strawberry.experimental.pydantic.input(model=LocationCreate, all_fields=True)
 class LocationCreateInput:
@@ -33,45 +42,40 @@ class LocationQuery:
     @strawberry.field
     async def locations(self, info: Info) -> List[LocationType]:
         """Get all locations"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             locations = await LocationService.get_locations(db)
             return [LocationSchema.from_orm(loc) for loc in locations]
 
     @strawberry.field
     async def location(self, info: Info, id: int) -> LocationType:
         """Get location by ID"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             loc = await LocationService.get_location_by_id(db, id)
             return LocationSchema.from_orm(loc)
 
     @strawberry.field
     async def location_by_code(self, info: Info, code: str) -> LocationType:
         """Get location by code"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             loc = await LocationService.get_location_by_code(db, code)
             return LocationSchema.from_orm(loc)
 
     @strawberry.field
     async def locations_by_area(self, info: Info, area_id: int) -> List[LocationType]:
         """Get locations by area"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             locations = await LocationService.get_locations_by_area(db, area_id)
             return [LocationSchema.from_orm(loc) for loc in locations]
 
     @strawberry.field
     async def active_locations(self, info: Info) -> List[LocationType]:
         """Get active locations"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             locations = await LocationService.get_active_locations(db)
             return [LocationSchema.from_orm(loc) for loc in locations]
 
@@ -83,24 +87,21 @@ class LocationMutation:
     @strawberry.mutation
     async def create_location(self, info: Info, input: LocationCreateInput) -> LocationType:
         """Create new location"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             loc = await LocationService.create_location(db, input)
             return LocationSchema.from_orm(loc)
 
     @strawberry.mutation
     async def update_location(self, info: Info, id: int, input: LocationUpdateInput) -> LocationType:
         """Update existing location"""
-        from app.core.database import AsyncSessionLocal
         from app.modules.locations.schemas import Location as LocationSchema
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             loc = await LocationService.update_location(db, id, input)
             return LocationSchema.from_orm(loc)
 
     @strawberry.mutation
     async def delete_location(self, info: Info, id: int) -> bool:
         """Delete location"""
-        from app.core.database import AsyncSessionLocal
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             return await LocationService.delete_location(db, id)
\ No newline at end of file
@@ -10,6 +10,7 @@ from app.modules.locations.schemas import (
     SubLocationCreate
 )
 from app.core.exceptions import NotFoundException
+from app.core.cache import cache, LOCATIONS, DASHBOARD_STATS, INVENTORY_DASHBOARD
 
 
 class LocationService:
@@ -108,6 +109,7 @@ class LocationService:
         db.add(location)
         await db.commit()
         await db.refresh(location)
+        await cache.invalidate(LOCATIONS, DASHBOARD_STATS)
         return location
 
     @staticmethod
@@ -123,6 +125,7 @@ class LocationService:
             setattr(location, field, value)
         await db.commit()
         await db.refresh(location)
+        await cache.invalidate(LOCATIONS, INVENTORY_DASHBOARD)
         return location
 
     @staticmethod
@@ -131,6 +134,7 @@ class LocationService:
         location = await LocationService.get_location_by_id(db, location_id)
         await db.delete(location)
         await db.commit()
+        await cache.invalidate(LOCATIONS, DASHBOARD_STATS)
         return True
 
     @staticmethod
@@ -187,4 +191,5 @@ class LocationService:
         for location in locations_to_create:
             await db.refresh(location)
 
+        await cache.invalidate(LOCATIONS, DASHBOARD_STATS)
         return locations_to_create
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Stamp client_id / po_number of the import requirement on inventories that do not have them.
+
+The import origin migration already stamps existing rows and confirming a container row
+stamps its box; this re-runs the same rule to repair rows missed by either. Runs in short
+batches; safe to repeat.
+
+    python -m scripts.backfill_import_origin [batch_size]
+"""
+import asyncio
+import sys
+
+from app.core.database import AsyncSessionLocal, engine, read_engine, external_apps_engine
+from app.modules.inventory.import_origin import ImportOrigin
+
+
+async def main(batch_size: int) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            stamped = await ImportOrigin.backfill(db, batch_size)
+        print(f"inventories: {stamped} rows stamped")
+    finally:
+        for pool_engine in (engine, read_engine, external_apps_engine):
+            await pool_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,147 @@
+"""
+Local fake Keycloak realm for development and tests.
+
+Implements the OpenID Connect endpoints used by app.core.keycloak and
+app.core.security (well-known, certs, auth, token, userinfo, logout) with an RSA
+key generated at start-up. Every login succeeds as FAKE_USER.
+
+Run it as a server and point the backend at it:
+
+    uvicorn scripts.fake_idp:app --port 8081
+    KEYCLOAK_URL=http://localhost:8081 uvicorn app.main:app
+
+or use it in process:
+
+    client = KeycloakClient(server_url="http://fake-idp", transport=httpx.ASGITransport(app=app))
+"""
+import secrets
+import time
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Form, Header, Request, Response
+from fastapi.responses import JSONResponse, RedirectResponse
+from jose import jwk, jwt
+
+from app.core.config import settings
+
+KID = "fake-idp-key"
+ACCESS_TOKEN_SECONDS = 300
+REFRESH_TOKEN_SECONDS = 1800
+
+FAKE_USER = {
+    "sub": "00000000-0000-0000-0000-000000000001",
+    "preferred_username": "fake.user",
+    "name": "Fake User",
+    "email": "fake.user@example.com",
+    "realm_access": {"roles": ["admin", "user"]},
+    "groups": []
+}
+
+_private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+_private_pem = _private_key.private_bytes(
+    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+)
+_public_jwk = jwk.construct(
+    _private_key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo),
+    "RS256"
+).to_dict()
+_public_jwk.update({"kid": KID, "use": "sig", "alg": "RS256"})
+
+# code / refresh token -> issued at; access tokens are self-contained JWTs
+_codes: Dict[str, float] = {}
+_refresh_tokens: Dict[str, float] = {}
+
+app = FastAPI(title="Fake Keycloak")
+
+
+def _error(error: str, status_code: int = 400) -> JSONResponse:
+    return JSONResponse({"error": error, "error_description": error.replace("_", " ")}, status_code=status_code)
+
+
+def _issuer(request: Request, realm: str) -> str:
+    return f"{str(request.base_url).rstrip('/')}/realms/{realm}"
+
+
+def _token_response(request: Request, realm: str) -> Dict:
+    now = int(time.time())
+    claims = {
+        **FAKE_USER,
+        "iss": _issuer(request, realm),
+        "aud": "account",
+        "azp": settings.KEYCLOAK_CLIENT_ID,
+        "iat": now,
+        "exp": now + ACCESS_TOKEN_SECONDS,
+        "jti": secrets.token_urlsafe(8)
+    }
+    refresh = secrets.token_urlsafe(32)
+    _refresh_tokens[refresh] = time.time()
+    return {
+        "access_token": jwt.encode(claims, _private_pem, algorithm="RS256", headers={"kid": KID}),
+        "expires_in": ACCESS_TOKEN_SECONDS,
+        "refresh_token": refresh,
+        "refresh_expires_in": REFRESH_TOKEN_SECONDS,
+        "token_type": "Bearer",
+        "scope": "openid profile email"
+    }
+
+
+@app.get("/realms/{realm}/.well-known/openid-configuration")
+async def well_known(realm: str, request: Request):
+    base = f"{_issuer(request, realm)}/protocol/openid-connect"
+    return {
+        "issuer": _issuer(request, realm),
+        "authorization_endpoint": f"{base}/auth",
+        "token_endpoint": f"{base}/token",
+        "userinfo_endpoint": f"{base}/userinfo",
+        "end_session_endpoint": f"{base}/logout",
+        "jwks_uri": f"{base}/certs"
+    }
+
+
+@app.get("/realms/{realm}/protocol/openid-connect/certs")
+async def certs(realm: str):
+    return {"keys": [_public_jwk]}
+
+
+@app.get("/realms/{realm}/protocol/openid-connect/auth")
+async def authorize(realm: str, redirect_uri: str, state: str = ""):
+    code = secrets.token_urlsafe(16)
+    _codes[code] = time.time()
+    return RedirectResponse(f"{redirect_uri}?{urlencode({'code': code, 'state': state})}")
+
+
+@app.post("/realms/{realm}/protocol/openid-connect/token")
+async def token(
+    realm: str,
+    request: Request,
+    grant_type: str = Form(...),
+    code: Optional[str] = Form(None),
+    refresh_token: Optional[str] = Form(None)
+):
+    if grant_type == "authorization_code":
+        if code is None or _codes.pop(code, None) is None:
+            return _error("invalid_grant")
+    elif grant_type == "refresh_token":
+        if refresh_token is None or _refresh_tokens.pop(refresh_token, None) is None:
+            return _error("invalid_grant")
+    else:
+        return _error("unsupported_grant_type")
+    return _token_response(request, realm)
+
+
+@app.get("/realms/{realm}/protocol/openid-connect/userinfo")
+async def userinfo(realm: str, authorization: str = Header(...)):
+    try:
+        jwt.decode(authorization.removeprefix("Bearer "), _public_jwk, algorithms=["RS256"], audience="account")
+    except Exception:
+        return _error("invalid_token", 401)
+    return FAKE_USER
+
+
+@app.post("/realms/{realm}/protocol/openid-connect/logout")
+async def logout(realm: str, refresh_token: str = Form(...)):
+    _refresh_tokens.pop(refresh_token, None)
+    return Response(status_code=204)
@@ -0,0 +1,54 @@
+"""
+Bulk import of open SAP documents into the WMS request tables (morning sync job).
+
+Upserts open OWTR documents into internal_warehouse_transfer_requests/products_in_iwtr
+and open ORDR documents into outbound_shipment_requests_on_order/products_in_osr,
+see app.modules.inventory.external_apps_service.SapDocumentImportService. Safe to re-run.
+
+    python -m scripts.import_sap_documents
+    python -m scripts.import_sap_documents --from 2026-10-01 --to 2026-10-18 --only iwtr --mirror
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from app.core.database import (
+    AsyncSessionLocal,
+    ReadAsyncSessionLocal,
+    ExternalAppsAsyncSessionLocal,
+    engine,
+    read_engine,
+    external_apps_engine
+)
+from app.modules.inventory.external_apps_service import SapDocumentImportService
+
+
+async def main(args: argparse.Namespace) -> None:
+    jobs = {
+        "iwtr": SapDocumentImportService.import_open_iwtr,
+        "osr": SapDocumentImportService.import_open_osr,
+    }
+    sap_session = ReadAsyncSessionLocal if args.mirror else ExternalAppsAsyncSessionLocal
+    try:
+        for name, job in jobs.items():
+            if args.only and args.only != name:
+                continue
+            async with AsyncSessionLocal() as db, sap_session() as external_apps_db:
+                external_apps_db.info["sap_live"] = not args.mirror
+                result = await job(
+                    db, external_apps_db, from_date=args.from_date, to_date=args.to_date, updated_by=args.updated_by
+                )
+            print(f"{name}: {result.model_dump_json()}")
+    finally:
+        for pool_engine in (engine, read_engine, external_apps_engine):
+            await pool_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="from_date", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--to", dest="to_date", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--only", choices=["iwtr", "osr"], default=None)
+    parser.add_argument("--mirror", action="store_true", help="read from the local SAP mirror instead of SAP")
+    parser.add_argument("--updated-by", default="system")
+    asyncio.run(main(parser.parse_args()))
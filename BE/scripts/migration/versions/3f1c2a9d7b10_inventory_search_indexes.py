@@ -0,0 +1,105 @@
+"""inventory search indexes
+
+pg_trgm GIN indexes for the substring (ILIKE '%...%') filters of the inventory
+dashboards, lower(col) text_pattern_ops btree indexes for exact / prefix code
+filters (see app.core.search.code_search_filter) and btree indexes on the join
+and ordering columns. Built CONCURRENTLY so the tables stay writable.
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Substring search (ILIKE '%...%')
+TRIGRAM_INDEXES = [
+    ("inventories", "name"),
+    ("inventories", "serial_pallet"),
+    ("inventories", "identifier"),
+    ("inventories", "po"),
+    ("inventories", "lot"),
+    ("inventories", "vendor"),
+    ("inventories", "sap_code"),
+    ("inventories", "updated_by"),
+]
+
+# Exact / prefix code search (lower(col) = 'abc', lower(col) LIKE 'abc%')
+PATTERN_INDEXES = [
+    ("inventories", "serial_pallet"),
+    ("inventories", "identifier"),
+    ("inventories", "po"),
+    ("inventories", "lot"),
+    ("inventories", "sap_code"),
+]
+
+# Joins, foreign keys and ordering
+BTREE_INDEXES = [
+    ("ix_inventories_location_id", "inventories", ["location_id"]),
+    ("ix_inventories_updated_date_id", "inventories", ["updated_date", "id"]),
+    ("ix_locations_area_id", "locations", ["area_id"]),
+    ("ix_locations_parent_location_id", "locations", ["parent_location_id"]),
+    ("ix_container_inventories_inventory_identifier", "container_inventories", ["inventory_identifier"]),
+    ("ix_container_inventories_import_pallet_id", "container_inventories", ["import_pallet_id"]),
+    ("ix_container_inventories_import_container_id", "container_inventories", ["import_container_id"]),
+    ("ix_import_pallet_info_warehouse_import_requirement_id", "import_pallet_info", ["warehouse_import_requirement_id"]),
+    ("ix_import_pallet_info_serial_pallet", "import_pallet_info", ["serial_pallet"]),
+    ("ix_warehouse_import_requirements_client_id", "warehouse_import_requirements", ["client_id"]),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        for table, column in TRIGRAM_INDEXES:
+            op.create_index(
+                f"ix_{table}_{column}_trgm",
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+        for table, column in PATTERN_INDEXES:
+            op.create_index(
+                f"ix_{table}_{column}_lower_pattern",
+                table,
+                [sa.text(f"lower({column}) text_pattern_ops")],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+        for name, table, columns in BTREE_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(BTREE_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+        for table, column in reversed(PATTERN_INDEXES):
+            op.drop_index(f"ix_{table}_{column}_lower_pattern", table_name=table, postgresql_concurrently=True, if_exists=True)
+
+        for table, column in reversed(TRIGRAM_INDEXES):
+            op.drop_index(f"ix_{table}_{column}_trgm", table_name=table, postgresql_concurrently=True, if_exists=True)
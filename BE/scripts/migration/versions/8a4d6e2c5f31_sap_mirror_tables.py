@@ -0,0 +1,148 @@
+"""sap mirror tables
+
+Local copies of the SAP transfer (OWTR/WTR1) and sales order (ORDR/RDR1)
+documents plus the per-document sync state, filled by
+app.modules.inventory.sap_mirror_service. The mirror tables have the columns
+of the SAP tables (app.modules.inventory.sap_mirror_models).
+
+Revision ID: 8a4d6e2c5f31
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d6e2c5f31'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sap_owtr",
+        sa.Column("DocEntry", sa.Integer(), primary_key=True),
+        sa.Column("DocNum", sa.Integer()),
+        sa.Column("DocType", sa.String(1)),
+        sa.Column("CANCELED", sa.String(1)),
+        sa.Column("DocStatus", sa.String(1)),
+        sa.Column("DocDate", sa.DateTime()),
+        sa.Column("DocDueDate", sa.DateTime()),
+        sa.Column("TaxDate", sa.DateTime()),
+        sa.Column("UpdateDate", sa.DateTime()),
+        sa.Column("CardCode", sa.String(15)),
+        sa.Column("CardName", sa.String(100)),
+        sa.Column("BPLId", sa.Integer()),
+        sa.Column("Filler", sa.String(8)),
+        sa.Column("ToWhsCode", sa.String(8)),
+        sa.Column("OwnerCode", sa.Integer()),
+        sa.Column("Comments", sa.Text()),
+        sa.Column("JrnlMemo", sa.Text()),
+        sa.Column("U_CodeSerial", sa.String(254)),
+        sa.Column("U_CodeInv", sa.String(254)),
+        sa.Column("U_Docnum", sa.String(254)),
+        sa.Column("U_InvCode", sa.String(254)),
+        sa.Column("U_Description_vn", sa.String(254)),
+        sa.Column("U_Pur_NVGiao", sa.String(254)),
+        sa.Column("U_Pur_NVNhan", sa.String(254)),
+        sa.Column("U_Category", sa.String(254)),
+        sa.Column("U_hangmuc", sa.String(254)),
+        sa.Column("U_OriginalNo", sa.String(254)),
+    )
+    op.create_index("ix_sap_owtr_doc_num", "sap_owtr", ["DocNum"])
+    op.create_index("ix_sap_owtr_status_date", "sap_owtr", ["DocStatus", "DocDate"])
+
+    op.create_table(
+        "sap_wtr1",
+        sa.Column("DocEntry", sa.Integer(), primary_key=True),
+        sa.Column("LineNum", sa.Integer(), primary_key=True),
+        sa.Column("ItemCode", sa.String(50)),
+        sa.Column("Dscription", sa.String(100)),
+        sa.Column("BaseEntry", sa.Integer()),
+        sa.Column("BaseLine", sa.Integer()),
+        sa.Column("Quantity", sa.Numeric(19, 6)),
+        sa.Column("UomCode", sa.String(100)),
+        sa.Column("FromWhsCod", sa.String(8)),
+        sa.Column("WhsCode", sa.String(8)),
+        sa.Column("ShipDate", sa.DateTime()),
+        sa.Column("FreeTxt", sa.Text()),
+        sa.Column("U_PO", sa.String(254)),
+    )
+
+    op.create_table(
+        "sap_ordr",
+        sa.Column("DocEntry", sa.Integer(), primary_key=True),
+        sa.Column("DocNum", sa.Integer()),
+        sa.Column("DocType", sa.String(1)),
+        sa.Column("CANCELED", sa.String(1)),
+        sa.Column("DocStatus", sa.String(1)),
+        sa.Column("DocDate", sa.DateTime()),
+        sa.Column("DocDueDate", sa.DateTime()),
+        sa.Column("TaxDate", sa.DateTime()),
+        sa.Column("UpdateDate", sa.DateTime()),
+        sa.Column("CardCode", sa.String(15)),
+        sa.Column("CardName", sa.String(100)),
+        sa.Column("CntctCode", sa.Integer()),
+        sa.Column("SlpCode", sa.Integer()),
+        sa.Column("OwnerCode", sa.Integer()),
+        sa.Column("Comments", sa.Text()),
+        sa.Column("U_CodeSerial", sa.String(254)),
+        sa.Column("U_CodeInv", sa.String(254)),
+        sa.Column("U_Docnum", sa.String(254)),
+        sa.Column("U_InvCode", sa.String(254)),
+        sa.Column("U_Description_vn", sa.String(254)),
+        sa.Column("U_Pur_NVGiao", sa.String(254)),
+        sa.Column("U_Pur_NVNhan", sa.String(254)),
+        sa.Column("U_Category", sa.String(254)),
+        sa.Column("U_hangmuc", sa.String(254)),
+        sa.Column("U_OriginalNo", sa.String(254)),
+        sa.Column("U_GRPO", sa.String(254)),
+        sa.Column("U_DNBH", sa.String(254)),
+        sa.Column("U_CTA", sa.String(254)),
+        sa.Column("U_SQDSX", sa.String(254)),
+        sa.Column("U_MaKH", sa.String(254)),
+        sa.Column("U_YCKH", sa.String(254)),
+    )
+    op.create_index("ix_sap_ordr_doc_num", "sap_ordr", ["DocNum"])
+    op.create_index("ix_sap_ordr_status_date", "sap_ordr", ["DocStatus", "DocDate"])
+
+    op.create_table(
+        "sap_rdr1",
+        sa.Column("DocEntry", sa.Integer(), primary_key=True),
+        sa.Column("LineNum", sa.Integer(), primary_key=True),
+        sa.Column("ItemCode", sa.String(50)),
+        sa.Column("Dscription", sa.String(100)),
+        sa.Column("BaseEntry", sa.Integer()),
+        sa.Column("BaseLine", sa.Integer()),
+        sa.Column("Quantity", sa.Numeric(19, 6)),
+        sa.Column("UomCode", sa.String(100)),
+        sa.Column("WhsCode", sa.String(8)),
+        sa.Column("ShipDate", sa.DateTime()),
+        sa.Column("FreeTxt", sa.Text()),
+        sa.Column("U_PO", sa.String(254)),
+        sa.Column("U_QDDNGH", sa.String(254)),
+        sa.Column("U_soPOPI", sa.String(254)),
+    )
+
+    op.create_table(
+        "sap_sync_state",
+        sa.Column("document", sa.String(10), primary_key=True),
+        sa.Column("last_doc_entry", sa.Integer()),
+        sa.Column("last_update_date", sa.DateTime()),
+        sa.Column("last_synced_at", sa.DateTime()),
+        sa.Column("last_run_at", sa.DateTime()),
+        sa.Column("last_run_rows", sa.Integer()),
+        sa.Column("last_run_ms", sa.Integer()),
+        sa.Column("total_rows_synced", sa.BigInteger()),
+        sa.Column("last_error", sa.Text()),
+    )
+
+
+def downgrade() -> None:
+    for table in ["sap_sync_state", "sap_rdr1", "sap_ordr", "sap_wtr1", "sap_owtr"]:
+        op.drop_table(table)
@@ -0,0 +1,92 @@
+"""inventory import origin
+
+client_id / po_number of the import requirement stamped on inventories
+(app.modules.inventory.import_origin), so the inventory dashboards filter and
+group on inventories alone instead of joining container_inventories ->
+warehouse_import_containers -> warehouse_import_requirements. Existing rows are
+stamped here from their latest container row (the same rule as
+ImportOrigin.backfill, which `python -m scripts.backfill_import_origin` re-runs).
+
+Revision ID: a4c9e2f7d615
+Revises: f2b8d5c1a374
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7d615'
+down_revision: Union[str, None] = 'f2b8d5c1a374'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ["client_id", "po_number"]
+
+
+BACKFILL_SQL = """
+UPDATE inventories AS i
+SET client_id = origin.client_id, po_number = origin.po_number
+FROM (
+    SELECT DISTINCT ON (ci.inventory_identifier)
+           ci.inventory_identifier,
+           r.client_id,
+           coalesce(p.po_number, r.po_number) AS po_number
+    FROM container_inventories ci
+    JOIN import_pallet_info p ON p.id = ci.import_pallet_id
+    JOIN warehouse_import_requirements r ON r.id = p.warehouse_import_requirement_id
+    ORDER BY ci.inventory_identifier, ci.id DESC
+) AS origin
+WHERE i.identifier = origin.inventory_identifier
+  AND i.client_id IS NULL
+  AND i.po_number IS NULL
+"""
+
+
+def upgrade() -> None:
+    # inventories belongs to create_tables, which already adds the columns on a new database
+    for name in COLUMNS:
+        op.execute(f"ALTER TABLE inventories ADD COLUMN IF NOT EXISTS {name} VARCHAR(255)")
+
+    op.execute(BACKFILL_SQL)
+
+    with op.get_context().autocommit_block():
+        for name in COLUMNS:
+            op.create_index(
+                f"ix_inventories_{name}",
+                "inventories",
+                [name],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        # PO filter of the dashboards (see app.core.search.code_search_filter)
+        op.create_index(
+            "ix_inventories_po_number_trgm",
+            "inventories",
+            ["po_number"],
+            postgresql_using="gin",
+            postgresql_ops={"po_number": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_inventories_po_number_lower_pattern",
+            "inventories",
+            [sa.text("lower(po_number) text_pattern_ops")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ["ix_inventories_po_number_lower_pattern", "ix_inventories_po_number_trgm"]:
+            op.drop_index(name, table_name="inventories", postgresql_concurrently=True, if_exists=True)
+        for name in reversed(COLUMNS):
+            op.drop_index(f"ix_inventories_{name}", table_name="inventories", postgresql_concurrently=True, if_exists=True)
+    for name in reversed(COLUMNS):
+        op.drop_column("inventories", name)
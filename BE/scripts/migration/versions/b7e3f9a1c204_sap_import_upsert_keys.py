@@ -0,0 +1,62 @@
+"""sap import upsert keys
+
+Unique index on internal_warehouse_transfer_requests.ma_yc_cknb, the conflict
+target of the bulk SAP document import (ma_yc_xk is already unique), and
+indexes on the request foreign keys of products_in_iwtr / products_in_osr used
+when the import replaces document lines. Built CONCURRENTLY.
+
+Revision ID: b7e3f9a1c204
+Revises: 8a4d6e2c5f31
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f9a1c204'
+down_revision: Union[str, None] = '8a4d6e2c5f31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BTREE_INDEXES = [
+    ("ix_products_in_iwtr_request_id", "products_in_iwtr", ["internal_warehouse_transfer_requests_id"]),
+    ("ix_products_in_osr_request_id", "products_in_osr", ["outbound_shipment_request_on_order_id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_internal_warehouse_transfer_requests_ma_yc_cknb",
+            "internal_warehouse_transfer_requests",
+            ["ma_yc_cknb"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+        for name, table, columns in BTREE_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(BTREE_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+        op.drop_index(
+            "ux_internal_warehouse_transfer_requests_ma_yc_cknb",
+            table_name="internal_warehouse_transfer_requests",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
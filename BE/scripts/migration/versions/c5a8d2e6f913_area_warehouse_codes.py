@@ -0,0 +1,40 @@
+"""area warehouse codes
+
+Mapping of SAP warehouse codes (OWTR.Filler / ToWhsCode, WTR1.FromWhsCod /
+WhsCode, RDR1.WhsCode) to WMS areas, edited through
+PUT /api/areas/{area_id}/warehouse-codes and read by
+app.modules.inventory.warehouse_codes.
+
+Revision ID: c5a8d2e6f913
+Revises: b7e3f9a1c204
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8d2e6f913'
+down_revision: Union[str, None] = 'b7e3f9a1c204'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "area_warehouse_codes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("whs_code", sa.String(8), nullable=False, unique=True),
+        sa.Column("area_id", sa.Integer(), sa.ForeignKey("areas.id"), nullable=False),
+        sa.Column("updated_by", sa.String(15), nullable=True),
+        sa.Column("updated_date", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_area_warehouse_codes_area_id", "area_warehouse_codes", ["area_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_area_warehouse_codes_area_id", table_name="area_warehouse_codes")
+    op.drop_table("area_warehouse_codes")
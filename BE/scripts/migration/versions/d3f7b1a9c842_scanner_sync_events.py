@@ -0,0 +1,39 @@
+"""scanner sync events
+
+Ledger of events applied through POST /api/scanner-sync/events, keyed by
+(device_id, sequence) so a resent offline batch is not applied twice.
+
+Revision ID: d3f7b1a9c842
+Revises: c5a8d2e6f913
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7b1a9c842'
+down_revision: Union[str, None] = 'c5a8d2e6f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scanner_sync_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("device_id", sa.String(64), nullable=False),
+        sa.Column("sequence", sa.BigInteger(), nullable=False),
+        sa.Column("event_type", sa.String(20), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("reason", sa.String(255), nullable=True),
+        sa.Column("applied_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.UniqueConstraint("device_id", "sequence", name="uq_scanner_sync_events_device_sequence"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scanner_sync_events")
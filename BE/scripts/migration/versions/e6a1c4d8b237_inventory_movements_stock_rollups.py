@@ -0,0 +1,73 @@
+"""inventory movements and stock rollups
+
+Append-only ledger of stock changes (inventory_movements) and stock totals per
+(sap_code, location, area) kept in the same transaction
+(app.modules.inventory.stock_ledger). The rollups are seeded from the current
+inventories; `python -m scripts.rebuild_stock_rollups` recomputes them later.
+
+Revision ID: e6a1c4d8b237
+Revises: d3f7b1a9c842
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c4d8b237'
+down_revision: Union[str, None] = 'd3f7b1a9c842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_movements",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("inventory_id", sa.BigInteger(), nullable=False),
+        sa.Column("identifier", sa.String(20), nullable=True),
+        sa.Column("movement_type", sa.String(10), nullable=False),
+        sa.Column("sap_code", sa.String(20), nullable=True),
+        sa.Column("quantity_delta", sa.Integer(), nullable=False),
+        sa.Column("balance_after", sa.Integer(), nullable=False),
+        sa.Column("from_location_id", sa.Integer(), nullable=True),
+        sa.Column("to_location_id", sa.Integer(), nullable=True),
+        sa.Column("reference", sa.String(50), nullable=True),
+        sa.Column("created_by", sa.String(50), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_inventory_movements_inventory_id", "inventory_movements", ["inventory_id"])
+    op.create_index("ix_inventory_movements_created_at", "inventory_movements", ["created_at"])
+
+    op.create_table(
+        "stock_rollups",
+        sa.Column("sap_code", sa.String(20), primary_key=True),
+        sa.Column("location_id", sa.Integer(), primary_key=True),
+        sa.Column("area_id", sa.Integer(), primary_key=True),
+        sa.Column("available_quantity", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("box_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_date", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_stock_rollups_area_id", "stock_rollups", ["area_id"])
+
+    op.execute(
+        """
+        INSERT INTO stock_rollups (sap_code, location_id, area_id, available_quantity, box_count, updated_date)
+        SELECT coalesce(i.sap_code, ''), i.location_id, l.area_id,
+               sum(i.available_quantity), count(i.id) FILTER (WHERE i.available_quantity > 0), now()
+        FROM inventories i
+        JOIN locations l ON l.id = i.location_id
+        GROUP BY coalesce(i.sap_code, ''), i.location_id, l.area_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_rollups_area_id", table_name="stock_rollups")
+    op.drop_table("stock_rollups")
+    op.drop_index("ix_inventory_movements_created_at", table_name="inventory_movements")
+    op.drop_index("ix_inventory_movements_inventory_id", table_name="inventory_movements")
+    op.drop_table("inventory_movements")
@@ -0,0 +1,48 @@
+"""inventory group summaries
+
+Inventory dashboard totals per group (area, po, client, sap_code), recomputed by
+the group summary scheduler (app.modules.inventory.group_summary) every
+GROUP_SUMMARY_REFRESH_SECONDS. The table starts empty; until the first refresh
+the dashboard aggregates the live tables.
+
+Revision ID: f2b8d5c1a374
+Revises: e6a1c4d8b237
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d5c1a374'
+down_revision: Union[str, None] = 'e6a1c4d8b237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_group_summaries",
+        sa.Column("group_by", sa.String(10), primary_key=True),
+        sa.Column("group_value", sa.String(255), primary_key=True),
+        sa.Column("group_name", sa.String(255), nullable=True),
+        sa.Column("total_available_quantity", sa.BigInteger(), nullable=False),
+        sa.Column("total_initial_quantity", sa.BigInteger(), nullable=False),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.Column("total_unique_products", sa.Integer(), nullable=False),
+        sa.Column("total_clients", sa.Integer(), nullable=False),
+        sa.Column("total_pos", sa.Integer(), nullable=False),
+        sa.Column("total_locations", sa.Integer(), nullable=False),
+        sa.Column("total_pallets", sa.Integer(), nullable=False),
+        sa.Column("total_containers", sa.Integer(), nullable=False),
+        sa.Column("last_updated", sa.DateTime(), nullable=True),
+        sa.Column("last_received", sa.DateTime(), nullable=True),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inventory_group_summaries")
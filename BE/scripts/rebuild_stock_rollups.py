@@ -0,0 +1,26 @@
+"""
+Recompute stock_rollups from inventories.
+
+Needed after inventories were changed outside the application (manual SQL, restore);
+the application keeps the rollups current on its own. Writers wait while it runs.
+
+    python -m scripts.rebuild_stock_rollups
+"""
+import asyncio
+
+from app.core.database import AsyncSessionLocal, engine, read_engine, external_apps_engine
+from app.modules.inventory.stock_ledger import StockLedger
+
+
+async def main() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            groups = await StockLedger.rebuild_rollups(db)
+        print(f"stock_rollups: {groups} rows")
+    finally:
+        for pool_engine in (engine, read_engine, external_apps_engine):
+            await pool_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
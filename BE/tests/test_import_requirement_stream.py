@@ -0,0 +1,88 @@
+import json
+from unittest import mock
+
+import pytest
+import pytest_asyncio
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.database import Base
+from app.core.exceptions import NotFoundException
+from app.modules.inventory.models import (
+    Area,
+    Location,
+    Inventory,
+    WarehouseImportRequirement,
+    ImportPalletInfo,
+    ContainerInventory
+)
+from app.modules.inventory.service import WarehouseImportService
+
+TABLES = [Area, Location, Inventory, WarehouseImportRequirement, ImportPalletInfo, ContainerInventory]
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync: Base.metadata.create_all(sync, tables=[t.__table__ for t in TABLES]))
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add(WarehouseImportRequirement(id=1, client_id="KH1", wo_code="WO1", sap_wo="SWO1", lot_number="L1"))
+            await session.flush()
+            session.add_all([
+                ImportPalletInfo(id=1, warehouse_import_requirement_id=1, serial_pallet="P1"),
+                ImportPalletInfo(id=2, warehouse_import_requirement_id=1, serial_pallet="P2"),
+            ])
+            await session.flush()
+            session.add_all([
+                ContainerInventory(id=1, import_pallet_id=1, inventory_identifier="B1", quantity_imported=5),
+                ContainerInventory(id=2, import_pallet_id=1, inventory_identifier="B2", quantity_imported=5),
+            ])
+            await session.commit()
+        async with session_factory() as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+async def _body(chunks) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.asyncio
+async def test_streamed_document_matches_the_buffered_one(db):
+    streamed = json.loads(await _body(await WarehouseImportService.stream_wms_import_requirement_by_id(db, 1)))
+    buffered = await WarehouseImportService.get_wms_import_requirement_by_id(db, 1)
+    assert streamed == jsonable_encoder(buffered)
+    assert [len(pallet["list_box"]) for pallet in streamed["general_info"]["list_pallet"]] == [2, 0]
+
+    with pytest.raises(NotFoundException):
+        await WarehouseImportService.stream_wms_import_requirement_by_id(db, 2)
+
+
+@pytest.mark.asyncio
+async def test_error_before_the_first_pallet_is_raised_before_the_response_starts(db):
+    async def failing(db, req_id):
+        raise RuntimeError("connection lost")
+        yield
+
+    with mock.patch.object(WarehouseImportService, "_iter_wms_pallets", failing):
+        with pytest.raises(RuntimeError):
+            await WarehouseImportService.stream_wms_import_requirement_by_id(db, 1)
+
+
+@pytest.mark.asyncio
+async def test_later_error_aborts_the_stream_without_closing_the_document(db):
+    async def failing(db, req_id):
+        yield {"id": 1, "list_box": []}
+        raise RuntimeError("connection lost")
+
+    with mock.patch.object(WarehouseImportService, "_iter_wms_pallets", failing):
+        chunks = await WarehouseImportService.stream_wms_import_requirement_by_id(db, 1)
+        received = []
+        with pytest.raises(RuntimeError):
+            async for chunk in chunks:
+                received.append(chunk)
+    assert not "".join(received).endswith("]}}")
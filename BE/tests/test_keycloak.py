@@ -0,0 +1,99 @@
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.keycloak import KeycloakClient, KeycloakError
+from scripts import fake_idp
+
+REDIRECT_URI = "http://localhost/callback"
+
+
+class CountingTransport(httpx.ASGITransport):
+    """ASGITransport over the fake IdP that counts the requests per path"""
+
+    def __init__(self):
+        super().__init__(app=fake_idp.app)
+        self.calls = {}
+
+    async def handle_async_request(self, request):
+        self.calls[request.url.path] = self.calls.get(request.url.path, 0) + 1
+        return await super().handle_async_request(request)
+
+    def count(self, endpoint: str) -> int:
+        return sum(n for path, n in self.calls.items() if path.endswith(f"/openid-connect/{endpoint}"))
+
+
+@pytest.fixture
+def transport():
+    return CountingTransport()
+
+
+@pytest_asyncio.fixture
+async def client(transport):
+    keycloak = KeycloakClient(server_url="http://fake-idp", realm="test", client_id="wms", transport=transport)
+    try:
+        yield keycloak
+    finally:
+        await keycloak.aclose()
+
+
+async def _login(client: KeycloakClient) -> dict:
+    response = await client.http.get(await client.auth_url(REDIRECT_URI))
+    code = parse_qs(urlparse(response.headers["location"]).query)["code"][0]
+    return await client.token(code, REDIRECT_URI)
+
+
+@pytest.mark.asyncio
+async def test_token_and_refresh(client):
+    tokens = await _login(client)
+    assert tokens["token_type"] == "Bearer"
+
+    refreshed = await client.refresh_token(tokens["refresh_token"])
+    assert refreshed["access_token"] != tokens["access_token"]
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    # Refresh tokens are single use
+    with pytest.raises(KeycloakError) as error:
+        await client.refresh_token(tokens["refresh_token"])
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_userinfo_is_cached_per_token(client, transport):
+    first, second = await _login(client), await _login(client)
+
+    user = await client.userinfo(first["access_token"])
+    user["name"] = "changed by the caller"
+    assert (await client.userinfo(first["access_token"]))["name"] == fake_idp.FAKE_USER["name"]
+    assert transport.count("userinfo") == 1
+
+    await client.userinfo(second["access_token"])
+    assert transport.count("userinfo") == 2
+
+    with pytest.raises(KeycloakError) as error:
+        await client.userinfo("not-a-token")
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_evicts_only_the_revoked_session(client, transport):
+    first, other = await _login(client), await _login(client)
+    refreshed = await client.refresh_token(first["refresh_token"])
+    for access_token in (first["access_token"], refreshed["access_token"], other["access_token"]):
+        await client.userinfo(access_token)
+    assert transport.count("userinfo") == 3
+
+    await client.logout(refreshed["refresh_token"])
+    assert transport.count("logout") == 1
+
+    # The other session is still served from the cache; both tokens of the revoked one are refetched
+    await client.userinfo(other["access_token"])
+    assert transport.count("userinfo") == 3
+    await client.userinfo(first["access_token"])
+    await client.userinfo(refreshed["access_token"])
+    assert transport.count("userinfo") == 5
+
+    with pytest.raises(KeycloakError):
+        await client.refresh_token(refreshed["refresh_token"])
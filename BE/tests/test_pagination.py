@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import column, table
+
+from app.core.exceptions import ValidationException
+from app.core.pagination import encode_cursor
+from app.modules.inventory.service import TransactionDashboardService
+
+TRANSACTIONS = table("transactions", column("updated_date"), column("transaction_type"), column("id"))
+
+
+def test_transactions_cursor_round_trips():
+    cursor = encode_cursor([datetime(2026, 1, 2, 3, 4, 5), "import", 42])
+    condition = TransactionDashboardService._keyset_condition(TRANSACTIONS, cursor)
+    assert condition.compile().params == {
+        "param_1": datetime(2026, 1, 2, 3, 4, 5),
+        "param_2": "import",
+        "param_3": 42
+    }
+
+
+@pytest.mark.parametrize("values", [
+    ["2026-01-02T03:04:05", 1, 42],
+    ["2026-01-02T03:04:05", "import", "42"],
+    [None, {"a": 1}, 42],
+    [None, "import", [42]],
+])
+def test_transactions_cursor_with_wrong_types_is_rejected(values):
+    with pytest.raises(ValidationException):
+        TransactionDashboardService._keyset_condition(TRANSACTIONS, encode_cursor(values))
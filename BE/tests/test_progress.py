@@ -0,0 +1,109 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from app.core.config import settings
+from app.core.progress import ProgressBroker
+
+
+class FakeConnection:
+    """asyncpg connection stand-in: `terminate` drops it, `close` waits for `release_close`"""
+
+    def __init__(self):
+        self.closed = False
+        self.closing = asyncio.Event()
+        self.release_close = asyncio.Event()
+        self.release_close.set()
+        self._on_terminate = None
+
+    def add_termination_listener(self, callback):
+        self._on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+        self._on_terminate(self)
+
+    async def close(self):
+        self.closing.set()
+        await self.release_close.wait()
+        self.closed = True
+
+
+class FakeConnect:
+    """asyncpg.connect returning the queued connections; each call waits for `allow`"""
+
+    def __init__(self, *connections):
+        self.connections = list(connections)
+        self.calls = 0
+        self.allow = asyncio.Event()
+        self.allow.set()
+
+    async def __call__(self, dsn):
+        self.calls += 1
+        await self.allow.wait()
+        return self.connections.pop(0)
+
+
+@pytest.fixture
+def fast_timers():
+    with mock.patch.object(settings, "PROGRESS_HEARTBEAT_SECONDS", 0.01), \
+            mock.patch.object(settings, "PROGRESS_RECONNECT_SECONDS", 0.01):
+        yield
+
+
+async def _wait_for(condition, timeout: float = 1.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_resync_is_sent_once_the_listen_is_back(fast_timers):
+    first, second = FakeConnection(), FakeConnection()
+    connect = FakeConnect(first, second)
+    broker = ProgressBroker()
+    try:
+        with mock.patch("app.core.progress.asyncpg.connect", connect):
+            async with broker.subscribe("import:1") as queue:
+                await asyncio.wait_for(broker.listening.wait(), 1)
+
+                connect.allow.clear()
+                first.terminate()
+                await _wait_for(lambda: connect.calls == 2)
+                # Still disconnected: a reload now could miss deltas committed before the LISTEN is back
+                assert queue.empty()
+
+                connect.allow.set()
+                event = await asyncio.wait_for(queue.get(), 1)
+                assert event == {"topic": "import:1", "type": "resync"}
+                assert broker.listening.is_set()
+    finally:
+        await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_subscriber_arriving_while_the_listener_closes_is_served(fast_timers):
+    first, second = FakeConnection(), FakeConnection()
+    first.release_close.clear()
+    connect = FakeConnect(first, second)
+    broker = ProgressBroker()
+    try:
+        with mock.patch("app.core.progress.asyncpg.connect", connect):
+            async with broker.subscribe("osr:1"):
+                await asyncio.wait_for(broker.listening.wait(), 1)
+            await asyncio.wait_for(first.closing.wait(), 1)
+
+            async with broker.subscribe("osr:2"):
+                first.release_close.set()
+                await _wait_for(lambda: connect.calls == 2 and broker.listening.is_set())
+                assert not broker._task.done()
+    finally:
+        await broker.stop()
@@ -0,0 +1,69 @@
+from unittest import mock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.database import Base
+from app.modules.inventory.models import (
+    Area,
+    Location,
+    Inventory,
+    InternalWarehouseTransferRequest,
+    ProductsInIWTR,
+    InventoriesInIWTR
+)
+from app.modules.inventory.scan_engine import ScanIngestionService, IWTR_SCANS
+
+TABLES = [Area, Location, Inventory, InternalWarehouseTransferRequest, ProductsInIWTR, InventoriesInIWTR]
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync: Base.metadata.create_all(sync, tables=[t.__table__ for t in TABLES]))
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add_all([
+                Area(id=1, code="K1", name="Kho 1"),
+                Location(id=1, code="L1", name="L1", area_id=1, barcode="L1", updated_by="tester"),
+                Inventory(id=1, identifier="BOX1", location_id=1, initial_quantity=10, available_quantity=10),
+                InternalWarehouseTransferRequest(id=5, ma_yc_cknb="CK5"),
+                ProductsInIWTR(id=7, internal_warehouse_transfer_requests_id=5, product_code="P7", total_quantity=20),
+                # (product, box) recorded twice before scans were deduplicated
+                InventoriesInIWTR(product_in_iwtr_id=7, inventory_identifier="BOX1", quantity_dispatched=4),
+                InventoriesInIWTR(product_in_iwtr_id=7, inventory_identifier="BOX1", quantity_dispatched=4),
+            ])
+            await session.commit()
+        async with session_factory() as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+def _scan(identifier: str, quantity: int) -> dict:
+    return {
+        "product_in_iwtr_id": 7,
+        "inventory_identifier": identifier,
+        "serial_pallet": None,
+        "scan_by": "tester",
+        "quantity_dispatched": quantity
+    }
+
+
+@pytest.mark.asyncio
+async def test_existing_duplicate_scan_rows_are_reported_once(db):
+    # Only the duplicate check runs here: the stock / counter updates use UPDATE ... FROM (VALUES ...),
+    # which SQLite cannot parse
+    with mock.patch("app.modules.inventory.scan_engine.cache.invalidate", new=mock.AsyncMock()):
+        result = await ScanIngestionService.ingest(db, IWTR_SCANS, 5, [_scan("BOX1", 3), _scan("BOX1", 3)])
+
+    assert [row["inventory_identifier"] for row in result["duplicates"]] == ["BOX1", "BOX1"]
+    assert result["details"] == []
+    assert result["rejected"] == []
+    assert result["progress"]["quantity_scanned"] == 0
+
+    box = await db.get(Inventory, 1)
+    assert box.available_quantity == 10
@@ -0,0 +1,75 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.database import Base
+from app.core.exceptions import ValidationException
+from app.core.search import MATCH_EXACT, MATCH_PREFIX, code_search_filter, text_search_filter
+from app.modules.inventory.models import Area, Location, Inventory
+
+IDENTIFIERS = ["B0000123456", "b0000123456-2", "PO-2024001", "X_1"]
+
+
+def _sql(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync: Base.metadata.create_all(
+                sync, tables=[t.__table__ for t in (Area, Location, Inventory)]
+            ))
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add(Area(id=1, code="K1", name="Kho 1"))
+            session.add(Location(id=1, code="L1", name="L1", area_id=1, barcode="L1", updated_by="tester"))
+            session.add_all([
+                Inventory(id=i, identifier=identifier, location_id=1, initial_quantity=1, available_quantity=1)
+                for i, identifier in enumerate(IDENTIFIERS, start=1)
+            ])
+            await session.commit()
+        async with session_factory() as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+async def _matches(db, condition) -> list:
+    result = await db.execute(select(Inventory.identifier).where(condition).order_by(Inventory.id))
+    return result.scalars().all()
+
+
+def test_code_filter_defaults_to_the_substring_match():
+    for value in ["123456", "2024001", "B0000123456", "PO_2024_001", "Bong den"]:
+        assert _sql(code_search_filter(Inventory.identifier, value)) == \
+            _sql(text_search_filter(Inventory.identifier, value))
+    assert "ILIKE '%%123456%%'" in _sql(code_search_filter(Inventory.identifier, "123456"))
+
+
+@pytest.mark.asyncio
+async def test_code_filter_finds_codes_containing_the_value(db):
+    assert await _matches(db, code_search_filter(Inventory.identifier, "123456")) == ["B0000123456", "b0000123456-2"]
+    assert await _matches(db, code_search_filter(Inventory.identifier, "2024001")) == ["PO-2024001"]
+
+
+@pytest.mark.asyncio
+async def test_exact_and_prefix_matches_are_case_insensitive(db):
+    assert await _matches(db, code_search_filter(Inventory.identifier, "B0000123456", MATCH_EXACT)) == \
+        ["B0000123456"]
+    assert await _matches(db, code_search_filter(Inventory.identifier, "B0000123456", MATCH_PREFIX)) == \
+        ["B0000123456", "b0000123456-2"]
+    assert await _matches(db, code_search_filter(Inventory.identifier, "123456", MATCH_PREFIX)) == []
+    # LIKE wildcards in the value are matched literally
+    assert await _matches(db, code_search_filter(Inventory.identifier, "X_", MATCH_PREFIX)) == ["X_1"]
+    assert _sql(code_search_filter(Inventory.identifier, "B0000123456", MATCH_PREFIX)) == \
+        "lower(inventories.identifier) LIKE 'b0000123456%%' ESCAPE '\\\\'"
+
+
+def test_unknown_match_mode_is_rejected():
+    with pytest.raises(ValidationException):
+        code_search_filter(Inventory.identifier, "B0000123456", "fuzzy")